@@ -0,0 +1,144 @@
+"""
+Catalog-scale benchmark for GET /products/search.
+
+Seeds a throwaway database with synthetic products, builds the search
+indexes through the app's own startup hook and measures text and prefix
+queries in-process. Needs a real MongoDB ($text is server-side).
+
+    cd aerion_crud
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/bench_search.py --products 100000
+
+Exit code 1 when a mode misses its p95 target.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+CRUD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# p95 latency targets in milliseconds
+TARGETS_MS = {"text": 50.0, "prefix": 15.0}
+
+CATEGORIES = ["Body", "Engine", "Interior", "Electrical", "Fasteners", "Fluids", "Chassis", "Tyres"]
+SYSTEMS = ["Powertrain", "Body Shop", "Paint Shop", "Final Assembly", "Stamping", "Welding"]
+MATERIALS = ["Steel", "Aluminum", "ABS Plastic", "Rubber", "Copper", "Polyurethane", "Carbon Fibre"]
+PARTS = ["Sheet", "Panel", "Hose", "Harness", "Sensor Module", "Bracket", "Gasket", "Cushion", "Bolt Set", "Rivets"]
+
+
+def synthetic_product(i: int) -> Dict:
+    name = f"{random.choice(MATERIALS)} {random.choice(PARTS)} {i:06d}"
+    return {
+        "name": name,
+        "name_key": name.lower(),
+        "price": round(random.uniform(1, 5000), 2),
+        "stock": random.randint(0, 2000),
+        "category": random.choice(CATEGORIES),
+        "aircraft_system": random.choice(SYSTEMS),
+        "description": f"{name} for {random.choice(SYSTEMS).lower()} line, grade {random.randint(1, 9)}",
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def seed(collection, products: int, batch: int = 5000):
+    await collection.delete_many({})
+    for start in range(0, products, batch):
+        await collection.insert_many([synthetic_product(i) for i in range(start, min(products, start + batch))])
+
+
+async def drive(client, params_list: List[Dict], concurrency: int) -> Dict:
+    gate = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(params):
+        nonlocal errors
+        async with gate:
+            started = time.perf_counter()
+            response = await client.get("/products/search", params=params)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in params_list))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(params_list),
+        "errors": errors,
+        "throughput_rps": round(len(params_list) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Product search benchmark")
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--db", default="aerion_search_bench")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded database")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    sys.path.insert(0, CRUD_DIR)
+    import httpx
+    import main as crud
+
+    bench_db = crud.client[args.db]
+    # endpoints read the module-level collection, so point it at the bench data
+    crud.collection = bench_db[crud.COLLECTION_NAME]
+
+    started = time.perf_counter()
+    await seed(crud.collection, args.products)
+    await crud.ensure_product_indexes()
+    print(f"🌱 {args.products} products seeded and indexed in {time.perf_counter() - started:.1f}s")
+
+    words = [w.lower() for w in MATERIALS + PARTS + CATEGORIES + SYSTEMS]
+    workloads = {
+        "text": [{"q": random.choice(words), "page": random.randint(1, 5)} for _ in range(args.requests)],
+        "prefix": [
+            {"q": random.choice(MATERIALS)[: random.randint(1, 4)], "mode": "prefix", "page_size": 10}
+            for _ in range(args.requests)
+        ],
+    }
+
+    results = {}
+    failed = False
+    try:
+        transport = httpx.ASGITransport(app=crud.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for mode, params_list in workloads.items():
+                result = await drive(client, params_list, args.concurrency)
+                result["target_p95_ms"] = TARGETS_MS[mode]
+                result["met"] = result["p95_ms"] <= TARGETS_MS[mode] and not result["errors"]
+                failed = failed or not result["met"]
+                results[mode] = result
+                print(f"{'✅' if result['met'] else '🚨'} {mode}: {json.dumps(result)}")
+    finally:
+        if not args.keep:
+            await crud.client.drop_database(args.db)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"products": args.products, **results}, f, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
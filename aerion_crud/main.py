@@ -1,36 +1,30 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Query
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
 import logging
-import uvicorn
 import os
-import cloudinary
-import cloudinary.uploader
-from bson import ObjectId
 import bcrypt
-from passlib.context import CryptContext
-from jose import jwt
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware 
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import jwt , JWTError
+
+# jose, cloudinary and uvicorn are imported on first use to keep cold start fast
 
 
 load_dotenv()
 
 
 # ------------------ SETUP ------------------
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
 # ==========================================================
 #           PASSWORD HASHING & JWT CONFIGURATION
 # ==========================================================
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this-in-production-minimum-32-chars")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
@@ -42,6 +36,10 @@ DB_NAME = "aerion"
 COLLECTION_NAME = "products"
 SUPPLIERS_COLLECTION = "suppliers"
 ADMIN_COLLECTION = "admins"
+VERSIONS_COLLECTION = "collection_versions"  # polled by the MCP server (supplier index, data_version)
+SALES_COLLECTION = "sales"
+PURCHASES_COLLECTION = "purchases"
+DAILY_ROLLUPS_COLLECTION = "daily_rollups"  # one document per UTC day, kept current on every sale/purchase
 
 
 # ------------------ DATABASE ------------------
@@ -54,14 +52,30 @@ db = client[DB_NAME]
 collection = db[COLLECTION_NAME]
 suppliers_collection = db[SUPPLIERS_COLLECTION]
 admins_collection = db[ADMIN_COLLECTION]
+versions_collection = db[VERSIONS_COLLECTION]
+sales_collection = db[SALES_COLLECTION]
+purchases_collection = db[PURCHASES_COLLECTION]
+rollups_collection = db[DAILY_ROLLUPS_COLLECTION]
 
 # ------------------ CLOUDINARY ------------------
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+_cloudinary_uploader = None
+
+
+def get_cloudinary_uploader():
+    """Configure Cloudinary on the first upload instead of at import."""
+    global _cloudinary_uploader
+    if _cloudinary_uploader is None:
+        import cloudinary
+        import cloudinary.uploader
+
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+            secure=True
+        )
+        _cloudinary_uploader = cloudinary.uploader
+    return _cloudinary_uploader
 
 # ------------------ APP ------------------
 app = FastAPI(title="Extended CRUD Server with Suppliers")
@@ -101,11 +115,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 async def get_current_admin(token: str = Depends(oauth2_scheme)):
     """Verify JWT token and get current admin."""
+    from jose import jwt, JWTError
+
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -143,13 +160,31 @@ class Supplier(BaseModel):
     address: str
     products_supplied: List[str]
 
+class Sale(BaseModel):
+    product_name: str
+    quantity: int = Field(..., gt=0)
+    unit_price: Optional[float] = None  # defaults to the product's price
+    sold_at: Optional[datetime] = None
+
+class Purchase(BaseModel):
+    product_name: str
+    quantity: int = Field(..., gt=0)
+    amount_paid: Optional[float] = None
+    unit_cost: Optional[float] = None  # amount_paid = unit_cost * quantity when amount_paid is omitted
+    supplier_name: Optional[str] = None  # defaults to the supplier listing the product
+    purchased_at: Optional[datetime] = None
+
 # ------------------ HELPERS ------------------
 def serialize_item(item):
     return {**item, "_id": str(item["_id"])}
 
+async def bump_version(collection_name: str):
+    """Signal readers that cache a collection (MCP supplier index, SDK run coalescing) that it changed."""
+    await versions_collection.update_one({"_id": collection_name}, {"$inc": {"version": 1}}, upsert=True)
+
 def upload_image_to_cloudinary(file: UploadFile) -> str:
     try:
-        result = cloudinary.uploader.upload(file.file)
+        result = get_cloudinary_uploader().upload(file.file)
         return result["secure_url"]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image upload failed: {e}")
@@ -241,7 +276,7 @@ async def register_admin(
         
         image_url = None
         if image:
-            result = cloudinary.uploader.upload(image.file)
+            result = get_cloudinary_uploader().upload(image.file)
             image_url = result.get("secure_url")
         
         hashed_password = hash_password(password)
@@ -365,8 +400,38 @@ async def add_supplier(supplier: Supplier):
     supplier_data = supplier.dict()
     supplier_data["created_at"] = datetime.utcnow()
     await suppliers_collection.insert_one(supplier_data)
+    await bump_version(SUPPLIERS_COLLECTION)
     return {"success": True, "message": f"Supplier '{supplier.name}' added!"}
 
+# ------------------ PRODUCT SEARCH INDEXES ------------------
+PRODUCT_TEXT_INDEX = "product_text"
+PRODUCT_PREFIX_INDEX = "product_name_key"
+SEARCH_FIELDS = {"name": 1, "price": 1, "stock": 1, "category": 1, "aircraft_system": 1, "description": 1, "image_url": 1}
+
+
+def name_key(name: str) -> str:
+    """Lower-cased name used for index-backed, case-insensitive prefix matching."""
+    return name.strip().lower()
+
+
+@app.on_event("startup")
+async def ensure_product_indexes():
+    """Create the search indexes and backfill name_key on products created before it existed."""
+    await collection.create_index(
+        [("name", "text"), ("category", "text"), ("aircraft_system", "text"), ("description", "text")],
+        weights={"name": 10, "category": 4, "aircraft_system": 4, "description": 1},
+        name=PRODUCT_TEXT_INDEX,
+    )
+    await collection.create_index([("name_key", 1)], name=PRODUCT_PREFIX_INDEX)
+
+    backfilled = 0
+    async for p in collection.find({"name_key": {"$exists": False}}, {"name": 1}):
+        await collection.update_one({"_id": p["_id"]}, {"$set": {"name_key": name_key(p.get("name", ""))}})
+        backfilled += 1
+    if backfilled:
+        logger.info(f"🔎 name_key backfilled on {backfilled} products")
+
+
 # ------------------ PRODUCT CRUD ------------------
 @app.post("/products")
 async def add_product(
@@ -387,9 +452,11 @@ async def add_product(
         "aircraft_system": aircraft_system,
         "description": description,
         "image_url": image_url,
+        "name_key": name_key(name),
         "created_at": datetime.utcnow()
     }
     await collection.insert_one(product_data)
+    await bump_version(COLLECTION_NAME)
     return {"success": True, "message": f"Product '{name}' added successfully!"}
 
 @app.get("/products")
@@ -399,6 +466,46 @@ async def get_all_products():
         products.append(serialize_item(item))
     return {"success": True, "data": products}
 
+@app.get("/products/search")
+async def search_products(
+    q: str = Query(..., min_length=1),
+    mode: str = Query("text", pattern="^(text|prefix)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+):
+    """
+    mode=text   -> full-text over name, category, aircraft_system, description,
+                   ranked by text score (name matches weigh most)
+    mode=prefix -> autocomplete on the product name, alphabetical
+    Both are served by indexes; declared before /products/{name} so it is not shadowed.
+    """
+    skip = (page - 1) * page_size
+
+    if mode == "prefix":
+        key = name_key(q)
+        # a range on the lower-cased key uses the index, unlike a case-insensitive regex
+        flt = {"name_key": {"$gte": key, "$lt": key + "\uffff"}}
+        cursor = collection.find(flt, {"name": 1, "category": 1, "aircraft_system": 1}).sort("name_key", 1)
+    else:
+        flt = {"$text": {"$search": q}}
+        cursor = collection.find(flt, {**SEARCH_FIELDS, "score": {"$meta": "textScore"}}).sort(
+            [("score", {"$meta": "textScore"})]
+        )
+
+    items = await cursor.skip(skip).limit(page_size).to_list(length=page_size)
+    total = await collection.count_documents(flt)
+
+    return {
+        "success": True,
+        "mode": mode,
+        "query": q,
+        "page": page,
+        "page_size": page_size,
+        "total": total,
+        "has_more": skip + len(items) < total,
+        "data": [serialize_item(i) for i in items],
+    }
+
 @app.get("/products/{name}")
 async def get_product(name: str):
     product = await collection.find_one({"name": name})
@@ -406,7 +513,249 @@ async def get_product(name: str):
         raise HTTPException(status_code=404, detail="Product not found")
     return {"success": True, "data": serialize_item(product)}
 
+# ------------------ SALES, PURCHASES & DAILY ROLLUPS ------------------
+# Only POST /sales and POST /purchases maintain the daily rollups. The
+# existing product writes (POST /products) carry no sale or cost, so they
+# are not counted, and no frontend page records sales or purchases yet:
+# until a client (POS, ERP import, admin tool) calls these two endpoints,
+# the reports stay at zero. Data written to `sales` / `purchases` by other
+# means can be folded in with POST /admin/reports/rebuild-rollups.
+ROLLUP_FIELDS = ("sales_amount", "units_sold", "sales_count", "purchases_amount", "units_purchased", "purchase_count")
+
+
+def as_utc(moment: Optional[datetime]) -> datetime:
+    """Naive UTC, as stored by Mongo; now when not given."""
+    if moment is None:
+        return datetime.utcnow()
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def day_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+
+async def bump_rollup(moment: datetime, **amounts):
+    """Add one sale/purchase to its day's rollup; report reads never touch the raw collections."""
+    await rollups_collection.update_one(
+        {"_id": day_key(moment)},
+        {"$inc": amounts, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+@app.on_event("startup")
+async def ensure_report_indexes():
+    await sales_collection.create_index([("sold_at", -1)], name="sold_at")
+    await purchases_collection.create_index([("purchased_at", -1)], name="purchased_at")
+    await purchases_collection.create_index([("supplier_name", 1), ("purchased_at", -1)], name="supplier_purchased_at")
+
+
+@app.post("/sales")
+async def record_sale(sale: Sale):
+    product = await collection.find_one({"name": sale.product_name}, {"price": 1})
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    # conditional $inc: never sells stock that is not there, even under concurrent sales
+    result = await collection.update_one(
+        {"_id": product["_id"], "stock": {"$gte": sale.quantity}},
+        {"$inc": {"stock": -sale.quantity}},
+    )
+    if not result.modified_count:
+        raise HTTPException(status_code=409, detail="Not enough stock")
+
+    unit_price = sale.unit_price if sale.unit_price is not None else product.get("price", 0)
+    sold_at = as_utc(sale.sold_at)
+    doc = {
+        "product_name": sale.product_name,
+        "quantity": sale.quantity,
+        "unit_price": unit_price,
+        "amount": unit_price * sale.quantity,
+        "sold_at": sold_at,
+    }
+    await sales_collection.insert_one(doc)
+    await bump_rollup(sold_at, sales_amount=doc["amount"], units_sold=sale.quantity, sales_count=1)
+    await bump_version(COLLECTION_NAME)
+    return {"success": True, "message": f"Sold {sale.quantity} x '{sale.product_name}'", "data": serialize_item(doc)}
+
+
+@app.post("/purchases")
+async def record_purchase(purchase: Purchase):
+    if purchase.amount_paid is None and purchase.unit_cost is None:
+        raise HTTPException(status_code=400, detail="Provide amount_paid or unit_cost")
+
+    supplier_name = purchase.supplier_name
+    if not supplier_name:
+        supplier = await suppliers_collection.find_one({"products_supplied": purchase.product_name}, {"name": 1})
+        supplier_name = supplier.get("name") if supplier else "Unknown"
+
+    result = await collection.update_one({"name": purchase.product_name}, {"$inc": {"stock": purchase.quantity}})
+    if not result.matched_count:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    amount = purchase.amount_paid if purchase.amount_paid is not None else purchase.unit_cost * purchase.quantity
+    purchased_at = as_utc(purchase.purchased_at)
+    doc = {
+        "product_name": purchase.product_name,
+        "quantity_purchased": purchase.quantity,
+        "amount_paid": amount,
+        "supplier_name": supplier_name,
+        "purchased_at": purchased_at,
+    }
+    await purchases_collection.insert_one(doc)
+    await bump_rollup(purchased_at, purchases_amount=amount, units_purchased=purchase.quantity, purchase_count=1)
+    await bump_version(COLLECTION_NAME)
+    return {"success": True, "message": f"Purchased {purchase.quantity} x '{purchase.product_name}'", "data": serialize_item(doc)}
+
+
+def _day_range(start: Optional[str], end: Optional[str]) -> dict:
+    """Filter on rollup ids ("YYYY-MM-DD" sorts chronologically)."""
+    flt = {}
+    if start:
+        flt["$gte"] = start
+    if end:
+        flt["$lte"] = end
+    return {"_id": flt} if flt else {}
+
+
+async def rollup_totals(start: Optional[str], end: Optional[str]) -> dict:
+    pipeline = [
+        {"$match": _day_range(start, end)},
+        {"$group": {"_id": None, **{f: {"$sum": f"${f}"} for f in ROLLUP_FIELDS}, "days": {"$sum": 1}}},
+    ]
+    rows = await rollups_collection.aggregate(pipeline).to_list(length=1)
+    totals = rows[0] if rows else {}
+    return {f: totals.get(f, 0) for f in (*ROLLUP_FIELDS, "days")}
+
+
+async def stock_valuation() -> dict:
+    """Current stock valued at list price, aggregated server-side over products."""
+    pipeline = [
+        {"$group": {
+            "_id": None,
+            "stock_value": {"$sum": {"$multiply": [{"$ifNull": ["$price", 0]}, {"$ifNull": ["$stock", 0]}]}},
+            "units_in_stock": {"$sum": {"$ifNull": ["$stock", 0]}},
+        }},
+    ]
+    rows = await collection.aggregate(pipeline).to_list(length=1)
+    return {"stock_value": rows[0]["stock_value"] if rows else 0, "units_in_stock": rows[0]["units_in_stock"] if rows else 0}
+
+
+def day_query():
+    return Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="UTC day, YYYY-MM-DD (inclusive)")
+
+
+@app.get("/admin/profit-loss-report")
+async def profit_loss_report(start: Optional[str] = day_query(), end: Optional[str] = day_query(), include_daily: bool = False):
+    totals = await rollup_totals(start, end)
+    stock = await stock_valuation()
+    profit_loss = totals["sales_amount"] - totals["purchases_amount"]
+    period = f"{start or 'beginning'} to {end or 'today'}"
+
+    report = {
+        "report_type": "profit_loss",
+        "status": "success",
+        "period": {"start": start, "end": end},
+        "message": "\n".join([
+            f"Period: {period} ({totals['days']} active days)",
+            f"Sales: Rs. {totals['sales_amount']:,.0f} from {totals['sales_count']} sales ({totals['units_sold']} units)",
+            f"Purchases: Rs. {totals['purchases_amount']:,.0f} from {totals['purchase_count']} purchases "
+            f"({totals['units_purchased']} units)",
+            f"Net {'profit' if profit_loss >= 0 else 'loss'}: Rs. {abs(profit_loss):,.0f}",
+            f"Stock on hand: {stock['units_in_stock']} units worth Rs. {stock['stock_value']:,.0f} at list price",
+        ]),
+        "data": {
+            "total_sales": totals["sales_amount"],
+            "total_purchases": totals["purchases_amount"],
+            "profit_loss": profit_loss,
+            "units_sold": totals["units_sold"],
+            "units_purchased": totals["units_purchased"],
+            "stock_value": stock["stock_value"],
+            "units_in_stock": stock["units_in_stock"],
+        },
+    }
+    if include_daily:
+        report["daily"] = await rollups_collection.find(
+            _day_range(start, end), {f: 1 for f in ROLLUP_FIELDS}
+        ).sort("_id", 1).to_list(length=None)
+    return {"success": True, "report": report}
+
+
+@app.get("/admin/purchase-report")
+async def purchase_report(
+    start: Optional[str] = day_query(),
+    end: Optional[str] = day_query(),
+    limit: int = Query(100, ge=1, le=500),
+):
+    """Totals come from the daily rollups; `data` is the newest `limit` purchases in range (index-backed)."""
+    totals = await rollup_totals(start, end)
+
+    flt = {}
+    if start or end:
+        flt["purchased_at"] = {}
+        if start:
+            flt["purchased_at"]["$gte"] = datetime.strptime(start, "%Y-%m-%d")
+        if end:
+            flt["purchased_at"]["$lt"] = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1)
+    purchases = await purchases_collection.find(flt).sort("purchased_at", -1).limit(limit).to_list(length=limit)
+
+    data = []
+    for p in purchases:
+        item = serialize_item(p)
+        item["purchased_at"] = p["purchased_at"].isoformat()
+        data.append(item)
+
+    return {
+        "success": True,
+        "report": {
+            "report_type": "supplier_purchases",
+            "status": "success",
+            "total_records": totals["purchase_count"],
+            "total_spent": totals["purchases_amount"],
+            "message": f"{totals['purchase_count']} purchases, Rs. {totals['purchases_amount']:,.0f} spent"
+                       + (f" (showing latest {len(data)})" if len(data) < totals["purchase_count"] else ""),
+            "data": data,
+        },
+    }
+
+
+@app.post("/admin/reports/rebuild-rollups")
+async def rebuild_rollups(current_admin: dict = Depends(get_current_admin)):
+    """
+    Recompute every daily rollup from the raw sales and purchases (repair /
+    backfill). Run it while no sales or purchases are being recorded.
+    """
+    def by_day(date_field: str, amount_field: str, quantity_field: str, names: tuple) -> list:
+        amount_key, units_key, count_key = names
+        return [{"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${date_field}"}},
+            amount_key: {"$sum": f"${amount_field}"},
+            units_key: {"$sum": f"${quantity_field}"},
+            count_key: {"$sum": 1},
+        }}]
+
+    days: dict = {}
+    async for row in sales_collection.aggregate(by_day("sold_at", "amount", "quantity", ROLLUP_FIELDS[:3])):
+        days.setdefault(row.pop("_id"), {}).update(row)
+    async for row in purchases_collection.aggregate(
+        by_day("purchased_at", "amount_paid", "quantity_purchased", ROLLUP_FIELDS[3:])
+    ):
+        days.setdefault(row.pop("_id"), {}).update(row)
+
+    now = datetime.utcnow()
+    await rollups_collection.delete_many({})
+    if days:
+        await rollups_collection.insert_many([
+            {"_id": day, **{f: fields.get(f, 0) for f in ROLLUP_FIELDS}, "updated_at": now}
+            for day, fields in days.items()
+        ])
+    return {"success": True, "message": f"Rebuilt {len(days)} daily rollups"}
+
+
 # ------------------ RUN ------------------
 if __name__ == "__main__":
+    import uvicorn
     logger.info("🚀 Starting Server on port 8006...")
     uvicorn.run("main:app", host="0.0.0.0", port=8006, reload=True)
\ No newline at end of file
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+
+# =========================================================
+# ✅ ALERT DEDUPLICATION & SUPPRESSION WINDOWS
+# =========================================================
+
+ALERTS_COLLECTION = "alerts"
+SEVERITY_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+
+# a repeat of the same alert at the same severity is suppressed this long
+DEFAULT_WINDOWS = {"CRITICAL": 900, "HIGH": 1800, "MEDIUM": 3600, "LOW": 14400}
+
+
+def fingerprint(kind: str, subject: str) -> str:
+    return f"{kind.strip().lower()}:{' '.join(str(subject).lower().split())}"
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat() if ts else None
+
+
+class AlertDeduplicator:
+    """
+    One document per (alert type, product/machine) in the `alerts` collection,
+    holding the last severity sent. A new alert goes out when nothing is on
+    record, when the severity rises ("escalated"), or when the suppression
+    window of its severity has passed ("reminder"). Repeats at the same or a
+    lower severity are counted and suppressed.
+    """
+
+    def __init__(self, collection, windows: Optional[Dict[str, float]] = None):
+        self.collection = collection
+        self.windows = {**DEFAULT_WINDOWS, **(windows or {})}
+        # one lock per fingerprint with a check in progress; dropped when the last one finishes
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+
+    def window(self, severity: str) -> float:
+        return self.windows.get(severity, DEFAULT_WINDOWS["MEDIUM"])
+
+    async def check(self, kind: str, subject: str, severity: str, message: str) -> Dict:
+        """Decide whether to send, and record the decision. -> decision dict for the agent."""
+        severity = severity.upper() if severity.upper() in SEVERITY_RANK else "MEDIUM"
+        fp = fingerprint(kind, subject)
+        lock = self._locks.setdefault(fp, asyncio.Lock())
+        self._lock_users[fp] = self._lock_users.get(fp, 0) + 1
+        try:
+            async with lock:
+                return await self._check(fp, kind, subject, severity, message)
+        finally:
+            self._lock_users[fp] -= 1
+            if not self._lock_users[fp]:
+                del self._lock_users[fp]
+                del self._locks[fp]
+
+    async def _check(self, fp: str, kind: str, subject: str, severity: str, message: str) -> Dict:
+        """Runs under the fingerprint's lock."""
+        now = time.time()
+        record = await self.collection.find_one({"_id": fp})
+
+        if record is None:
+            decision = "new"
+        elif SEVERITY_RANK[severity] > SEVERITY_RANK.get(record["severity"], 0):
+            decision = "escalated"
+        elif now - record["last_sent_ts"] >= self.window(record["severity"]):
+            decision = "reminder"
+        else:
+            decision = "suppressed"
+
+        if decision == "suppressed":
+            await self.collection.update_one(
+                {"_id": fp},
+                {"$set": {"last_seen_ts": now, "last_seen_severity": severity},
+                 "$inc": {"suppressed_count": 1}},
+            )
+            return {
+                "decision": "suppressed",
+                "fingerprint": fp,
+                "severity": record["severity"],
+                "reported_severity": severity,
+                "first_sent_at": _iso(record["first_sent_ts"]),
+                "last_sent_at": _iso(record["last_sent_ts"]),
+                "suppressed_count": record.get("suppressed_count", 0) + 1,
+                "next_alert_after": _iso(record["last_sent_ts"] + self.window(record["severity"])),
+                "note": "Already reported; no new alert sent. Do not raise it again unless severity rises.",
+            }
+
+        await self.collection.update_one(
+            {"_id": fp},
+            {
+                "$set": {
+                    "kind": kind,
+                    "subject": subject,
+                    "severity": severity,
+                    "last_sent_ts": now,
+                    "last_seen_ts": now,
+                    "last_seen_severity": severity,
+                    "last_message": message,
+                    "suppressed_count": 0,
+                },
+                "$setOnInsert": {"first_sent_ts": now},
+                "$inc": {"sent_count": 1},
+            },
+            upsert=True,
+        )
+        return {
+            "decision": decision,
+            "fingerprint": fp,
+            "severity": severity,
+            "previous_severity": record["severity"] if record else None,
+            "message": message,
+            "next_alert_after": _iso(now + self.window(severity)),
+        }
+
+    async def active(self) -> Dict:
+        """Alerts still inside their suppression window."""
+        now = time.time()
+        alerts = []
+        async for a in self.collection.find({}):
+            until = a["last_sent_ts"] + self.window(a["severity"])
+            if until > now:
+                alerts.append({
+                    "fingerprint": a["_id"],
+                    "severity": a["severity"],
+                    "sent_count": a.get("sent_count", 0),
+                    "suppressed_count": a.get("suppressed_count", 0),
+                    "last_sent_at": _iso(a["last_sent_ts"]),
+                    "suppressed_until": _iso(until),
+                })
+        alerts.sort(key=lambda a: -SEVERITY_RANK[a["severity"]])
+        return {"windows_seconds": self.windows, "active": alerts}
@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# =========================================================
+# ✅ STREAMING ANOMALY DETECTION (EWMA z-score)
+# =========================================================
+
+SIGNALS = ["temperature_celsius", "vibration_mm_s", "power_kw", "cycle_time_seconds"]
+
+
+class EwmaAnomalyDetector:
+    """
+    Scores each sensor reading against its machine's own exponentially
+    weighted baseline (mean + variance per signal), then folds it in.
+
+    State is a handful of (machines x signals) arrays, so memory per machine
+    is constant whatever the ingest rate, and a batch of readings for the
+    whole fleet is scored and applied with vector ops. Each signal keeps its
+    own reading count: a signal that has never been reported has no baseline,
+    and its EWMA starts from its first real value.
+    """
+
+    def __init__(
+        self,
+        signals: Sequence[str] = SIGNALS,
+        alpha: float = 0.1,
+        threshold: float = 3.0,
+        warmup: int = 10,
+        capacity: int = 64,
+    ):
+        self.signals = list(signals)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+
+        self._index: Dict[str, int] = {}
+        k = len(self.signals)
+        self.mean = np.zeros((capacity, k))
+        self.var = np.zeros((capacity, k))
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.seen = np.zeros((capacity, k), dtype=np.int64)
+        self.last_z = np.zeros((capacity, k))
+        self.last_score = np.zeros(capacity)
+        self.anomalies = np.zeros(capacity, dtype=np.int64)
+
+    # ------------------ machines ------------------
+
+    def _grow(self, needed: int):
+        capacity = len(self.count)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in ("mean", "var", "last_z", "seen"):
+            old = getattr(self, name)
+            grown = np.zeros((new_capacity, old.shape[1]), dtype=old.dtype)
+            grown[:capacity] = old
+            setattr(self, name, grown)
+        for name in ("count", "last_score", "anomalies"):
+            old = getattr(self, name)
+            grown = np.zeros(new_capacity, dtype=old.dtype)
+            grown[:capacity] = old
+            setattr(self, name, grown)
+
+    def indices(self, machine_ids: Sequence[str]) -> np.ndarray:
+        for mid in machine_ids:
+            if mid not in self._index:
+                self._index[mid] = len(self._index)
+        self._grow(len(self._index))
+        return np.fromiter((self._index[mid] for mid in machine_ids), dtype=np.int64, count=len(machine_ids))
+
+    def __contains__(self, machine_id: str) -> bool:
+        return machine_id in self._index
+
+    # ------------------ ingest ------------------
+
+    def _apply(self, idx: np.ndarray, x: np.ndarray) -> np.ndarray:
+        """One reading per machine: score against the baseline, then update it."""
+        mean, var, count, seen = self.mean[idx], self.var[idx], self.count[idx], self.seen[idx]
+        present = ~np.isnan(x)
+        # a missing value leaves its signal untouched (no score, no update)
+        x = np.where(present, x, mean)
+
+        warm = present & (seen >= self.warmup) & (var > 0)
+        z = np.where(warm, (x - mean) / np.sqrt(np.where(var > 0, var, 1.0)), 0.0)
+        score = np.abs(z).max(axis=1)
+        ready = count >= self.warmup
+        flagged = ready & (score > self.threshold)
+
+        first = present & (seen == 0)
+        diff = x - mean
+        incr = self.alpha * diff
+        self.mean[idx] = np.where(first, x, np.where(present, mean + incr, mean))
+        self.var[idx] = np.where(first, 0.0, np.where(present, (1 - self.alpha) * (var + diff * incr), var))
+        self.seen[idx] = seen + present
+        self.count[idx] = count + 1
+
+        self.last_z[idx] = np.where(ready[:, None], z, 0.0)
+        self.last_score[idx] = np.where(ready, score, 0.0)
+        self.anomalies[idx] += flagged
+        return flagged
+
+    def ingest(self, machine_ids: Sequence[str], readings: np.ndarray) -> np.ndarray:
+        """
+        Score and apply a batch: readings is (batch x signals), NaN for a
+        missing signal (skipped: neither scored nor folded into the baseline).
+        Returns the anomaly flag per reading, in input order.
+        """
+        idx = self.indices(machine_ids)
+        x = np.asarray(readings, dtype=np.float64).reshape(len(idx), len(self.signals))
+
+        # several readings of one machine in a batch are applied in order,
+        # one vectorized pass per occurrence rank
+        order = np.argsort(idx, kind="stable")
+        sorted_idx = idx[order]
+        group_start = np.r_[0, np.flatnonzero(np.diff(sorted_idx)) + 1]
+        group_of = np.repeat(group_start, np.diff(np.r_[group_start, len(idx)]))
+        rank = np.empty(len(idx), dtype=np.int64)
+        rank[order] = np.arange(len(idx)) - group_of
+
+        flagged = np.zeros(len(idx), dtype=bool)
+        for r in range(int(rank.max()) + 1 if len(idx) else 0):
+            rows = np.flatnonzero(rank == r)
+            flagged[rows] = self._apply(idx[rows], x[rows])
+        return flagged
+
+    def ingest_records(self, records: List[Dict]) -> np.ndarray:
+        """Same as ingest() for dicts like {"machine_id": ..., "temperature_celsius": ...}."""
+        readings = np.array(
+            [[np.nan if r.get(s) is None else r[s] for s in self.signals] for r in records],
+            dtype=np.float64,
+        )
+        return self.ingest([r["machine_id"] for r in records], readings)
+
+    # ------------------ read ------------------
+
+    def status(self, machine_id: str) -> Optional[Dict]:
+        i = self._index.get(machine_id)
+        if i is None:
+            return None
+        warm = self.count[i] >= self.warmup
+        return {
+            "score": round(float(self.last_score[i]), 2),
+            "anomalous": bool(warm and self.last_score[i] > self.threshold),
+            "z_scores": {s: round(float(z), 2) for s, z in zip(self.signals, self.last_z[i])},
+            "baseline": {
+                s: round(float(m), 2) if n else None
+                for s, m, n in zip(self.signals, self.mean[i], self.seen[i])
+            },
+            "readings": int(self.count[i]),
+            "anomalies_total": int(self.anomalies[i]),
+            "baseline_ready": bool(warm),
+        }
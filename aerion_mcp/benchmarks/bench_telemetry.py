@@ -0,0 +1,79 @@
+"""
+Telemetry store benchmark: 30 days of readings for a large fleet.
+
+Writes synthetic readings day by day (each new day seals the previous one),
+then times the queries the MCP tools run.
+
+    cd aerion_mcp
+    python benchmarks/bench_telemetry.py --machines 2000 --days 30 --interval-minutes 15
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry_store import DAY_SECONDS, TelemetryStore, day_start  # noqa: E402
+
+
+def timed(label: str, fn, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"   {label:<42} {best * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetry store benchmark")
+    parser.add_argument("--machines", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--interval-minutes", type=int, default=15)
+    parser.add_argument("--dir", default=None, help="store directory (default: temp dir, removed afterwards)")
+    args = parser.parse_args()
+
+    root = args.dir or tempfile.mkdtemp(prefix="aerion_telemetry_")
+    store = TelemetryStore(root)
+    rng = np.random.default_rng(3)
+    machine_ids = [f"M-{i:05d}" for i in range(args.machines)]
+    base = rng.uniform([60, 5, 10, 30], [90, 15, 40, 45], size=(args.machines, len(store.signals)))
+
+    first_day = date.today() - timedelta(days=args.days - 1)
+    per_day = DAY_SECONDS // (args.interval_minutes * 60)
+    started = time.perf_counter()
+    for d in range(args.days):
+        day0 = day_start((first_day + timedelta(days=d)).isoformat())
+        # one append per reading interval, the whole fleet at once
+        for step in range(per_day):
+            values = base * (1 + 0.002 * d) + rng.normal(0, 0.5, base.shape)
+            store.append(machine_ids, np.full(args.machines, day0 + step * args.interval_minutes * 60), values)
+    elapsed = time.perf_counter() - started
+    rows = args.machines * args.days * per_day
+    size_mb = sum(
+        os.path.getsize(os.path.join(dp, f)) for dp, _, fs in os.walk(root) for f in fs
+    ) / 1e6
+    print(f"📝 {rows:,} readings written in {elapsed:.1f}s ({rows / elapsed:,.0f}/s), {size_mb:.0f} MB on disk")
+
+    end = day_start(date.today().isoformat()) + DAY_SECONDS
+    start = end - args.days * DAY_SECONDS
+    print("📊 queries (best of 5):")
+    timed("30-day daily trend, whole fleet", lambda: store.daily_trend(
+        first_day.isoformat(), date.today().isoformat(), "temperature_celsius"))
+    timed("30-day raw range, one machine", lambda: store.query(machine_ids[-1], start, end))
+    timed("30-day hourly downsample, one machine", lambda: store.downsample(machine_ids[-1], start, end, 3600))
+    timed("24h summary, one machine (open day)", lambda: store.downsample(machine_ids[0], end - DAY_SECONDS, end, DAY_SECONDS))
+
+    if not args.dir:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# =========================================================
+# ✅ DOWNTIME ANALYTICS (MTBF / MTTR / AVAILABILITY)
+# =========================================================
+
+
+def _day(value) -> int:
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def _week_start(day: int) -> str:
+    d = date.fromordinal(day)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+class DowntimeAnalytics:
+    """
+    Per-machine downtime accumulators kept as NumPy arrays.
+
+    A full load is one vectorized pass (bincount / ufunc.at) over every event;
+    after that each new event is an O(1) update of the accumulators, reason
+    counts and weekly buckets. Derived metrics are recomputed for the whole
+    fleet in one vector pass, only when something changed.
+
+    Observation window per machine: from the earlier of its last maintenance
+    date and its first downtime event, up to `as_of` (default: latest event in
+    the fleet, so snapshot data is not diluted by the wall clock).
+    """
+
+    def __init__(self):
+        self.machine_ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.stages: List[str] = []
+        self.failures = np.zeros(0, dtype=np.int64)
+        self.downtime_hours = np.zeros(0, dtype=np.float64)
+        self.observed_since = np.zeros(0, dtype=np.int64)
+        self.last_event_day = 0
+        self.reasons: List[Counter] = []
+        self.weekly: List[Dict[str, List[float]]] = []
+        self._metrics: Optional[Dict[str, np.ndarray]] = None
+        self._metrics_as_of: Optional[int] = None
+
+    # ------------------ build / update ------------------
+
+    def load(self, machines: List[Dict]):
+        self.machine_ids = [m["machine_id"] for m in machines]
+        self._index = {mid: i for i, mid in enumerate(self.machine_ids)}
+        self.names = [m.get("machine_name", m["machine_id"]) for m in machines]
+        self.stages = [m.get("production_stage", "unknown") for m in machines]
+        self.reasons = [Counter() for _ in machines]
+        self.weekly = [{} for _ in machines]
+
+        idx, days, hours = [], [], []
+        for i, m in enumerate(machines):
+            for e in m.get("downtime_history") or []:
+                idx.append(i)
+                days.append(_day(e["date"]))
+                hours.append(float(e.get("duration_hours", 0)))
+                self.reasons[i][e.get("reason") or "unspecified"] += 1
+                bucket = self.weekly[i].setdefault(_week_start(days[-1]), [0, 0.0])
+                bucket[0] += 1
+                bucket[1] += hours[-1]
+
+        n = len(machines)
+        idx_a = np.asarray(idx, dtype=np.int64)
+        days_a = np.asarray(days, dtype=np.int64)
+        self.failures = np.bincount(idx_a, minlength=n).astype(np.int64)
+        self.downtime_hours = np.bincount(idx_a, weights=np.asarray(hours, dtype=np.float64), minlength=n)
+
+        maintenance = np.array([
+            _day(m["maintenance"]["last_maintenance_date"])
+            if (m.get("maintenance") or {}).get("last_maintenance_date") else np.iinfo(np.int64).max
+            for m in machines
+        ], dtype=np.int64)
+        self.observed_since = maintenance.copy()
+        np.minimum.at(self.observed_since, idx_a, days_a)
+
+        self.last_event_day = int(days_a.max()) if len(days_a) else date.today().toordinal()
+        self._metrics = None
+
+    def record(self, machine_id: str, event_date, duration_hours: float, reason: str):
+        """Fold one new downtime event into the accumulators (O(1))."""
+        i = self._index[machine_id]
+        day = _day(event_date)
+        self.failures[i] += 1
+        self.downtime_hours[i] += duration_hours
+        self.observed_since[i] = min(self.observed_since[i], day)
+        self.last_event_day = max(self.last_event_day, day)
+        self.reasons[i][reason or "unspecified"] += 1
+        bucket = self.weekly[i].setdefault(_week_start(day), [0, 0.0])
+        bucket[0] += 1
+        bucket[1] += duration_hours
+        self._metrics = None
+
+    def __contains__(self, machine_id: str) -> bool:
+        return machine_id in self._index
+
+    def position(self, machine_id: str) -> int:
+        return self._index[machine_id]
+
+    # ------------------ metrics ------------------
+
+    def metrics(self, as_of: Optional[int] = None) -> Dict[str, np.ndarray]:
+        as_of = as_of or self.last_event_day
+        if self._metrics is not None and self._metrics_as_of == as_of:
+            return self._metrics
+
+        since = np.minimum(self.observed_since, as_of)
+        period = (as_of - since + 1).astype(np.float64) * 24
+        uptime = np.maximum(period - self.downtime_hours, 0)
+        failures = self.failures.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mtbf = np.where(failures > 0, uptime / failures, np.nan)
+            mttr = np.where(failures > 0, self.downtime_hours / failures, 0.0)
+            availability = np.where(period > 0, uptime / period, 1.0)
+
+        self._metrics = {
+            "period_hours": period,
+            "uptime_hours": uptime,
+            "mtbf_hours": mtbf,
+            "mttr_hours": mttr,
+            "availability": availability,
+        }
+        self._metrics_as_of = as_of
+        return self._metrics
+
+    def machine_report(self, i: int, metrics: Dict[str, np.ndarray], top_reasons: int = 3) -> Dict:
+        mtbf = metrics["mtbf_hours"][i]
+        return {
+            "machine_id": self.machine_ids[i],
+            "machine_name": self.names[i],
+            "stage": self.stages[i],
+            "failures": int(self.failures[i]),
+            "downtime_hours": round(float(self.downtime_hours[i]), 2),
+            "mtbf_hours": None if np.isnan(mtbf) else round(float(mtbf), 1),
+            "mttr_hours": round(float(metrics["mttr_hours"][i]), 2),
+            "availability": round(float(metrics["availability"][i]), 4),
+            "top_reasons": self.reasons[i].most_common(top_reasons),
+        }
+
+    def stage_report(self, metrics: Dict[str, np.ndarray]) -> List[Dict]:
+        stages = sorted(set(self.stages))
+        stage_idx = np.array([stages.index(s) for s in self.stages], dtype=np.int64)
+        n = len(stages)
+
+        failures = np.bincount(stage_idx, weights=self.failures, minlength=n)
+        downtime = np.bincount(stage_idx, weights=self.downtime_hours, minlength=n)
+        period = np.bincount(stage_idx, weights=metrics["period_hours"], minlength=n)
+        uptime = np.bincount(stage_idx, weights=metrics["uptime_hours"], minlength=n)
+
+        report = []
+        for s, name in enumerate(stages):
+            reasons = Counter()
+            for i in np.flatnonzero(stage_idx == s):
+                reasons.update(self.reasons[i])
+            report.append({
+                "stage": name,
+                "machines": int((stage_idx == s).sum()),
+                "failures": int(failures[s]),
+                "downtime_hours": round(float(downtime[s]), 2),
+                "mtbf_hours": round(float(uptime[s] / failures[s]), 1) if failures[s] else None,
+                "mttr_hours": round(float(downtime[s] / failures[s]), 2) if failures[s] else 0.0,
+                "availability": round(float(uptime[s] / period[s]), 4) if period[s] else 1.0,
+                "top_reasons": reasons.most_common(3),
+            })
+        return report
+
+    def weekly_rollup(self, i: int, weeks: int = 8) -> List[Dict]:
+        first_week = _week_start(self.last_event_day - 7 * (weeks - 1))
+        return [
+            {"week_start": week, "failures": int(count), "downtime_hours": round(hours, 2)}
+            for week, (count, hours) in sorted(self.weekly[i].items())
+            if week >= first_week
+        ]
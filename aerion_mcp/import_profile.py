@@ -0,0 +1,68 @@
+"""
+Import-time profile for a service module.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+reports total cold-import time plus the slowest top-level packages.
+
+    python import_profile.py                          # MCP server (server.py)
+    python import_profile.py --dir ../aerion_crud --module main
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(directory: str, module: str):
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=directory,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr.strip().splitlines()[-1])
+
+    packages = {}
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 1 and name == module:
+            packages[name] = cumulative
+        elif indent == 3:  # direct imports of the profiled module
+            root = name.split(".")[0]
+            packages[root] = packages.get(root, 0) + cumulative
+    return wall, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile report")
+    parser.add_argument("--dir", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--module", default="server")
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    wall, packages = profile(args.dir, args.module)
+    total_ms = packages.get(args.module, 0) / 1000
+
+    print(f"📦 import {args.module} ({args.dir})")
+    print(f"   interpreter + import wall time: {wall * 1000:.0f} ms")
+    print(f"   module cumulative import time:  {total_ms:.0f} ms")
+    print("   slowest direct imports:")
+    ranked = sorted(((n, us) for n, us in packages.items() if n != args.module), key=lambda x: -x[1])
+    for name, us in ranked[: args.top]:
+        print(f"     {us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
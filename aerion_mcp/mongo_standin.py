@@ -0,0 +1,232 @@
+# mongo_standin.py
+# In-memory stand-in for the small slice of the Motor API the servers use.
+# Selected with MONGO_URI=memory:// for offline benchmarks and local runs.
+import copy
+import json
+import os
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+
+def _get(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _match_value(value, cond) -> bool:
+    if isinstance(cond, dict) and any(k.startswith("$") for k in cond):
+        for op, arg in cond.items():
+            if op == "$in" and not (value in arg or (isinstance(value, list) and any(v in arg for v in value))):
+                return False
+            if op == "$nin" and value in arg:
+                return False
+            if op == "$ne" and value == arg:
+                return False
+            if op == "$gt" and not (value is not None and value > arg):
+                return False
+            if op == "$gte" and not (value is not None and value >= arg):
+                return False
+            if op == "$lt" and not (value is not None and value < arg):
+                return False
+            if op == "$lte" and not (value is not None and value <= arg):
+                return False
+            if op == "$exists" and (value is not None) != bool(arg):
+                return False
+        return True
+    if isinstance(value, list) and not isinstance(cond, list):
+        return cond in value
+    return value == cond
+
+
+def matches(doc: dict, flt: Optional[dict]) -> bool:
+    for key, cond in (flt or {}).items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in cond):
+                return False
+        elif not _match_value(_get(doc, key), cond):
+            return False
+    return True
+
+
+def _project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        out = {k: copy.deepcopy(doc[k]) for k in include if k in doc}
+        if projection.get("_id", 1):
+            out["_id"] = doc.get("_id")
+        return out
+    return {k: copy.deepcopy(v) for k, v in doc.items() if projection.get(k, 1)}
+
+
+UPDATE_OPERATORS = {"$set", "$inc", "$max", "$setOnInsert"}
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool = False):
+    unknown = set(update) - UPDATE_OPERATORS
+    if unknown:
+        # fail loudly: silently skipping a write would let benchmarks "pass"
+        raise NotImplementedError(f"Mongo stand-in does not support {sorted(unknown)}")
+    for key, value in update.get("$set", {}).items():
+        doc[key] = value
+    for key, value in update.get("$inc", {}).items():
+        doc[key] = doc.get(key, 0) + value
+    for key, value in update.get("$max", {}).items():
+        if doc.get(key) is None or value > doc[key]:
+            doc[key] = value
+    if inserting:
+        for key, value in update.get("$setOnInsert", {}).items():
+            doc[key] = value
+
+
+class _Result:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class InMemoryCursor:
+    def __init__(self, docs: List[dict], projection: Optional[dict] = None):
+        self._docs = docs
+        self._projection = projection
+        self._limit = 0
+        self._skip = 0
+
+    def sort(self, key, direction: int = 1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, d in reversed(keys):
+            self._docs.sort(key=lambda doc: (_get(doc, field) is None, _get(doc, field)), reverse=d < 0)
+        return self
+
+    def skip(self, n: int):
+        self._skip = n
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def _selected(self) -> List[dict]:
+        docs = self._docs[self._skip:]
+        if self._limit:
+            docs = docs[: self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        docs = self._selected()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        self._iter = iter(self._selected())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class InMemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.docs: List[dict] = []
+
+    def find(self, flt: Optional[dict] = None, projection: Optional[dict] = None) -> InMemoryCursor:
+        return InMemoryCursor([d for d in self.docs if matches(d, flt)], projection)
+
+    async def find_one(self, flt: Optional[dict] = None, projection: Optional[dict] = None):
+        for d in self.docs:
+            if matches(d, flt):
+                return _project(d, projection)
+        return None
+
+    async def count_documents(self, flt: Optional[dict] = None) -> int:
+        return sum(1 for d in self.docs if matches(d, flt))
+
+    async def insert_one(self, doc: dict):
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(copy.deepcopy(doc))
+        return _Result(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs: List[dict], ordered: bool = True):
+        ids = [(await self.insert_one(d)).inserted_id for d in docs]
+        return _Result(inserted_ids=ids)
+
+    async def update_one(self, flt: dict, update: dict, upsert: bool = False):
+        for d in self.docs:
+            if matches(d, flt):
+                _apply_update(d, update)
+                return _Result(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            doc = {k: v for k, v in flt.items() if not k.startswith("$") and not isinstance(v, dict)}
+            _apply_update(doc, update, inserting=True)
+            result = await self.insert_one(doc)
+            return _Result(matched_count=0, modified_count=0, upserted_id=result.inserted_id)
+        return _Result(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def update_many(self, flt: dict, update: dict):
+        hits = [d for d in self.docs if matches(d, flt)]
+        for d in hits:
+            _apply_update(d, update)
+        return _Result(matched_count=len(hits), modified_count=len(hits), upserted_id=None)
+
+    async def delete_many(self, flt: Optional[dict] = None):
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not matches(d, flt)]
+        return _Result(deleted_count=before - len(self.docs))
+
+    async def create_index(self, keys, **kwargs):
+        return kwargs.get("name", str(keys))
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(name)
+        return self._collections[name]
+
+
+class InMemoryMongoClient:
+    def __init__(self):
+        self._dbs: Dict[str, InMemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> InMemoryDatabase:
+        if name not in self._dbs:
+            self._dbs[name] = InMemoryDatabase()
+        return self._dbs[name]
+
+    @classmethod
+    def from_fixture(cls, db_name: str, fixture_dir: str, scale: int = 1) -> "InMemoryMongoClient":
+        """
+        Load <collection>.json files from fixture_dir. `scale` > 1 clones the
+        products N times (with suffixed names) to benchmark a large catalog.
+        """
+        client = cls()
+        db = client[db_name]
+        for collection_name in ("products", "suppliers"):
+            path = os.path.join(fixture_dir, f"{collection_name}.json")
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                docs = json.load(f)
+            if collection_name == "products" and scale > 1:
+                docs = [
+                    {**d, "name": f"{d['name']} #{i}" if i else d["name"]}
+                    for i in range(scale) for d in docs
+                ]
+            for d in docs:
+                d["_id"] = ObjectId()
+            db[collection_name].docs.extend(docs)
+        return client
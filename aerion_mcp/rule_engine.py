@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================
+# ✅ MACHINE RISK RULE ENGINE
+# =========================================================
+
+OPS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal}
+MATCH_KEYS = ("machine_id", "production_stage", "criticality")
+DEFAULT_LEVELS = {"HIGH": 4, "MEDIUM": 2}
+
+
+def rules_from_thresholds(t: Dict) -> Dict:
+    """The historical hard-coded scoring, built from machines.json's global thresholds."""
+    return {
+        "levels": DEFAULT_LEVELS,
+        "rules": {
+            "temperature": {"field": "sensor_data.temperature_celsius", "op": ">",
+                            "threshold": t.get("max_temperature", 80), "weight": 2, "reason": "High temperature"},
+            "vibration": {"field": "sensor_data.vibration_mm_s", "op": ">",
+                          "threshold": t.get("max_vibration", 14), "weight": 2, "reason": "High vibration"},
+            "maintenance": {"field": "maintenance.days_since_last_maintenance", "op": ">",
+                            "threshold": t.get("max_days_without_maintenance", 30), "weight": 1,
+                            "reason": "Maintenance overdue"},
+        },
+        "overrides": [],
+    }
+
+
+def validate_rules(spec: Dict) -> Dict:
+    rules = spec.get("rules") or {}
+    if not rules:
+        raise ValueError("rule file defines no rules")
+    for name, rule in rules.items():
+        for key in ("field", "op", "threshold", "weight"):
+            if key not in rule:
+                raise ValueError(f"rule '{name}' is missing '{key}'")
+        if rule["op"] not in OPS:
+            raise ValueError(f"rule '{name}': unknown op {rule['op']!r}")
+    for override in spec.get("overrides") or []:
+        unknown = set(override.get("match", {})) - set(MATCH_KEYS)
+        if unknown:
+            raise ValueError(f"override matches on unsupported keys {sorted(unknown)}")
+        for name, patch in (override.get("rules") or {}).items():
+            if name not in rules:
+                raise ValueError(f"override refers to undefined rule '{name}'")
+            if "op" in patch:
+                raise ValueError(f"override of '{name}' may change threshold/weight/enabled, not op")
+    return spec
+
+
+def _field(doc: Dict, path: str) -> float:
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return np.nan
+        value = value.get(part)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class CompiledRules:
+    """
+    Rules resolved for one set of machines: a (machines x rules) threshold and
+    weight matrix, with every matching override already applied. Scoring is
+    one comparison per operator plus a weighted row sum, however many
+    overrides the file contains.
+    """
+
+    def __init__(self, spec: Dict, machines: List[Dict]):
+        self.names = list(spec["rules"])
+        rules = [spec["rules"][n] for n in self.names]
+        self.fields = [r["field"] for r in rules]
+        self.reasons = [r.get("reason", n) for n, r in zip(self.names, rules)]
+        self.levels = sorted((spec.get("levels") or DEFAULT_LEVELS).items(), key=lambda kv: -kv[1])
+
+        m = len(machines)
+        self.thresholds = np.tile(np.array([float(r["threshold"]) for r in rules]), (m, 1))
+        self.weights = np.tile(
+            np.array([float(r["weight"]) if r.get("enabled", True) else 0.0 for r in rules]), (m, 1)
+        )
+        # column groups per comparison operator
+        self.op_columns = {
+            op: np.array([j for j, r in enumerate(rules) if r["op"] == op], dtype=np.int64)
+            for op in {r["op"] for r in rules}
+        }
+
+        column = {n: j for j, n in enumerate(self.names)}
+        attrs = {key: np.array([str(mach.get(key)) for mach in machines]) for key in MATCH_KEYS}
+        for override in spec.get("overrides") or []:
+            rows = np.ones(m, dtype=bool)
+            for key, value in (override.get("match") or {}).items():
+                rows &= attrs[key] == str(value)
+            if not rows.any():
+                continue
+            for name, patch in (override.get("rules") or {}).items():
+                j = column[name]
+                if "threshold" in patch:
+                    self.thresholds[rows, j] = float(patch["threshold"])
+                if "weight" in patch:
+                    self.weights[rows, j] = float(patch["weight"])
+                if patch.get("enabled") is False:
+                    self.weights[rows, j] = 0.0
+
+    def evaluate(self, machines: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """(score per machine, hit matrix machines x rules)."""
+        values = np.array([[_field(mach, f) for f in self.fields] for mach in machines], dtype=np.float64)
+        values = values.reshape(len(machines), len(self.fields))
+        hits = np.zeros(values.shape, dtype=bool)
+        for op, cols in self.op_columns.items():
+            hits[:, cols] = OPS[op](values[:, cols], self.thresholds[:, cols])  # NaN compares False
+        hits &= self.weights > 0
+        return (hits * self.weights).sum(axis=1), hits
+
+    def level(self, score: float) -> str:
+        for name, minimum in self.levels:
+            if score >= minimum:
+                return name
+        return "LOW"
+
+
+class RuleEngine:
+    """
+    Loads the rule file, recompiles when the file or the machine set changes,
+    and hot-reloads on file modification. A broken edit is logged and the
+    last good rules stay active.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.spec: Optional[Dict] = None
+        self.version = 0
+        self.last_error: Optional[str] = None
+        self._mtime: Optional[float] = None
+        self._compiled: Optional[CompiledRules] = None
+        self._compiled_key = None
+
+    def _reload_if_changed(self, fallback: Dict):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            mtime = None
+
+        if self.spec is not None and mtime == self._mtime:
+            return
+        self._mtime = mtime
+
+        if mtime is None:
+            spec = fallback
+        else:
+            try:
+                with open(self.path, "r") as f:
+                    spec = validate_rules(json.load(f))
+                self.last_error = None
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+                logger.error(f"❌ Risk rules not reloaded, keeping version {self.version}: {e}")
+                if self.spec is not None:
+                    return
+                spec = fallback
+
+        self.spec = spec
+        self.version += 1
+        self._compiled = None
+        logger.info(f"📐 Risk rules loaded (version {self.version}, {len(spec['rules'])} rules)")
+
+    def compiled(self, machines: List[Dict], thresholds: Dict) -> CompiledRules:
+        self._reload_if_changed(rules_from_thresholds(thresholds))
+        key = tuple((mach.get("machine_id"), mach.get("production_stage"), mach.get("criticality")) for mach in machines)
+        if self._compiled is None or key != self._compiled_key:
+            self._compiled = CompiledRules(self.spec, machines)
+            self._compiled_key = key
+        return self._compiled
+
+    def status(self) -> Dict:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "rules": list((self.spec or {}).get("rules", {})),
+            "overrides": len((self.spec or {}).get("overrides") or []),
+            "last_error": self.last_error,
+        }
@@ -1,20 +1,27 @@
-from fastapi import FastAPI, HTTPException, UploadFile
+from fastapi import FastAPI
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 from pydantic import BaseModel
 from mcp.server.fastmcp import FastMCP
-from motor.motor_asyncio import AsyncIOMotorClient
 import logging
-import uvicorn
 from dotenv import load_dotenv
 import os
-import cloudinary
-import cloudinary.uploader
-from cloudinary.exceptions import Error as CloudinaryError
+from datetime import datetime, timedelta, timezone
 import asyncio
-from bson import ObjectId
-import aiohttp
-from datetime import datetime, timedelta
 import json
-from typing import List, Dict
+from contextlib import asynccontextmanager
+import math
+import time
+from typing import List, Dict, Optional, Tuple
+from alert_dedup import ALERTS_COLLECTION, AlertDeduplicator
+from work_orders import ACTIVE_STATUSES, WORK_ORDERS_COLLECTION, WorkOrderQueue, WorkOrderStore, issue_category
+from tool_shaping import DEFAULT_MAX_BYTES, by_severity, fit_to_budget, project, top_n
+from supplier_index import VERSIONS_COLLECTION, SupplierIndex
+from supplier_scoring import as_utc_naive, delay_days, rebuild_from_deliveries, score_supplier, stats_update, summarize
+
+# Heavy / rarely used modules (motor, uvicorn, numpy and the numpy-backed
+# analytics engines) are imported lazily: run `python import_profile.py` to
+# see the cold-import cost per package.
 
 
 load_dotenv()
@@ -23,15 +30,12 @@ BASE_URL = os.getenv("BASE_URL")
 FACEBOOK_PAGE_ID = os.getenv("FACEBOOK_PAGE_ID")
 FACEBOOK_PAGE_ACCESS_TOKEN = os.getenv("FACEBOOK_PAGE_ACCESS_TOKEN")
 
-print("PAGE ID:", FACEBOOK_PAGE_ID)
-print("ACCESS TOKEN:", FACEBOOK_PAGE_ACCESS_TOKEN)
-
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-logger.debug(f"MONGO_URI: {os.getenv('MONGO_URI')[:10]}... (masked)")
-logger.debug(f"CLOUDINARY_CLOUD_NAME: {os.getenv('CLOUDINARY_CLOUD_NAME')}")
-logger.debug(f"CLOUDINARY_API_KEY: {os.getenv('CLOUDINARY_API_KEY')[:5]}... (masked)")
+logger.debug(f"FACEBOOK_PAGE_ID: {FACEBOOK_PAGE_ID}")
+logger.debug(f"MONGO_URI: {(os.getenv('MONGO_URI') or '')[:10]}... (masked)")
 
 
 mcp = FastMCP(name="FastMCP", stateless_http=False, json_response=True)
@@ -44,24 +48,45 @@ if not connection:
 DB_NAME = "aerion"
 COLLECTION_NAME = "products"
 SUPPLIERS_COLLECTION = "suppliers"
-
-
-client = AsyncIOMotorClient(connection)
+DELIVERIES_COLLECTION = "deliveries"
+SUPPLIER_STATS_COLLECTION = "supplier_stats"  # materialized per-supplier running sums
+
+
+# MONGO_URI=memory:// -> in-memory stand-in seeded from mock_data (offline benchmarks)
+if connection.startswith("memory://"):
+    from mongo_standin import InMemoryMongoClient
+    client = InMemoryMongoClient.from_fixture(
+        DB_NAME,
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_data"),
+        scale=int(os.getenv("STANDIN_PRODUCT_SCALE", "1")),
+    )
+    logger.info("🧪 Using in-memory Mongo stand-in")
+else:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    # motor connects on first operation, so this stays cheap
+    client = AsyncIOMotorClient(connection)
 db = client[DB_NAME]
 collection = db[COLLECTION_NAME]
 suppliers_collection = db[SUPPLIERS_COLLECTION]
-
-
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
+deliveries_collection = db[DELIVERIES_COLLECTION]
+supplier_stats_collection = db[SUPPLIER_STATS_COLLECTION]
+
+supplier_index = SupplierIndex(
+    suppliers_collection,
+    db[VERSIONS_COLLECTION],
+    poll_interval=float(os.getenv("SUPPLIER_INDEX_POLL_SECONDS", "10")),
+    retry_max=float(os.getenv("SUPPLIER_INDEX_RETRY_MAX_SECONDS", "300")),
 )
 
-if not all([cloudinary.config().cloud_name, cloudinary.config().api_key, cloudinary.config().api_secret]):
-    logger.error("Cloudinary configuration incomplete")
-    raise ValueError("Cloudinary configuration incomplete")
+# ALERT_SUPPRESS_<SEVERITY>_SECONDS overrides the repeat window per severity
+alert_dedup = AlertDeduplicator(
+    db[ALERTS_COLLECTION],
+    windows={
+        sev: float(os.environ[f"ALERT_SUPPRESS_{sev}_SECONDS"])
+        for sev in ("CRITICAL", "HIGH", "MEDIUM", "LOW")
+        if os.getenv(f"ALERT_SUPPRESS_{sev}_SECONDS")
+    },
+)
 
 
 class Product(BaseModel):
@@ -85,7 +110,9 @@ OVER_STOCK_LIMIT = 50
 
 # Get absolute path based on script location
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_PATH = os.path.join(BASE_DIR, "mock_data", "machines.json")
+# record_downtime_event writes to this file: outside local dev, point
+# MACHINES_DATA_PATH at an untracked copy instead of the bundled mock data
+DATA_PATH = os.getenv("MACHINES_DATA_PATH", os.path.join(BASE_DIR, "mock_data", "machines.json"))
 
 def load_data():
     try:
@@ -94,25 +121,68 @@ def load_data():
     except FileNotFoundError:
         logger.error(f"File not found: {DATA_PATH}")
         return {"machines": [], "thresholds": {}}
-    
+
+
+def save_data(data: dict):
+    tmp_path = DATA_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, DATA_PATH)
+
+
+def _data_mtime() -> Optional[float]:
+    try:
+        return os.path.getmtime(DATA_PATH)
+    except FileNotFoundError:
+        return None
+
+
+downtime_engine = None
+_downtime_loaded_mtime = None
+
+
+def get_downtime_engine():
+    """Full (vectorized) rebuild only when machines.json changed behind our back."""
+    global downtime_engine, _downtime_loaded_mtime
+    if downtime_engine is None:
+        from downtime_analytics import DowntimeAnalytics
+        downtime_engine = DowntimeAnalytics()
+    mtime = _data_mtime()
+    if _downtime_loaded_mtime is None or mtime != _downtime_loaded_mtime:
+        downtime_engine.load(load_data()["machines"])
+        _downtime_loaded_mtime = mtime
+    return downtime_engine
+
+
+INVENTORY_PROJECTION = {"name": 1, "stock": 1, "category": 1}
+
 
 @mcp.tool()
-async def get_all_products_inventory() -> List[dict]:
+async def get_all_products_inventory(fields: Optional[List[str]] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> Dict:
         result = []
-        async for p in collection.find():
+        async for p in collection.find({}, INVENTORY_PROJECTION):
             result.append({
                 "name": p.get("name"),
                 "stock": p.get("stock", 0),
                 "category": p.get("category")
             })
-        return result
+        return fit_to_budget({"products": project(result, fields)}, max_bytes)
 
     # ✅ Tool 2: Check stock status
 @mcp.tool()
-async def check_stock_status() -> Dict:
+async def check_stock_status(
+        include_normal: bool = False,
+        fields: Optional[List[str]] = None,
+        limit: int = 0,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Dict:
+        """
+        Low / over stock products, most severe first.
+        normal_stock is only counted unless include_normal=True.
+        """
         low, normal, over = [], [], []
 
-        async for p in collection.find():
+        async for p in collection.find({}, INVENTORY_PROJECTION):
             stock = p.get("stock", 0)
             item = {
                 "name": p.get("name"),
@@ -127,18 +197,28 @@ async def check_stock_status() -> Dict:
             else:
                 normal.append(item)
 
-        return {
-            "low_stock": low,
-            "normal_stock": normal,
-            "over_stock": over
+        low.sort(key=lambda i: i["stock"])
+        over.sort(key=lambda i: i["stock"], reverse=True)
+
+        result = {
+            "low_stock": project(top_n(low, limit), fields),
+            "over_stock": project(top_n(over, limit), fields),
+            "normal_count": len(normal),
         }
+        if include_normal:
+            result["normal_stock"] = project(top_n(normal, limit), fields)
+
+        return fit_to_budget(result, max_bytes)
 
     # ✅ Tool 3: Get supplier by product
 @mcp.tool()
 async def get_supplier_by_product(product_name: str) -> Dict:
-        supplier = await suppliers_collection.find_one({
-            "products_supplied": product_name
-        })
+        supplier = await supplier_index.lookup(product_name)
+        if not supplier:
+            # the index may lag a fresh write (or still be building at startup)
+            supplier = await suppliers_collection.find_one({
+                "products_supplied": product_name
+            })
 
         if not supplier:
             return {"error": "Supplier not found"}
@@ -150,23 +230,168 @@ async def get_supplier_by_product(product_name: str) -> Dict:
             "address": supplier.get("address")
         }
 
-    # ✅ Tool 4: Notify finance (dummy)
+# finance alerts are fingerprinted on one of these, never on the agent's wording
+FINANCE_ISSUES = {
+    "over_stock": ("over", "excess", "surplus"),
+    "out_of_stock": ("out of stock", "stockout", "stock out", "no stock", "zero stock"),
+    "low_stock": ("low", "shortage", "below", "reorder", "running out"),
+    "supplier_delay": ("delay", "late", "supplier"),
+    "pricing": ("price", "cost", "budget"),
+}
+
+
+def finance_issue(issue_type: str) -> str:
+    text = " ".join(issue_type.lower().replace("_", " ").replace("-", " ").split())
+    if text.replace(" ", "_") in FINANCE_ISSUES:
+        return text.replace(" ", "_")
+    for name, keywords in FINANCE_ISSUES.items():
+        if any(k in text for k in keywords):
+            return name
+    return "other"
+
+
+async def stock_severity(issue: str, product: str) -> str:
+    p = await collection.find_one({"name": product}, {"stock": 1})
+    if p is None:
+        return "MEDIUM"
+    stock = p.get("stock", 0)
+    if issue == "over_stock":
+        return "MEDIUM" if stock > 2 * OVER_STOCK_LIMIT else "LOW"
+    if stock <= 0:
+        return "CRITICAL"
+    return "HIGH" if stock < LOW_STOCK_LIMIT / 2 else "MEDIUM"
+
+
+    # ✅ Tool 4: Notify finance (dummy), deduplicated
 @mcp.tool()
-async def notify_finance(issue_type: str, product: str, supplier: dict) -> str:
+async def notify_finance(issue_type: str, product: str, supplier: dict, severity: Optional[str] = None) -> Dict:
+        """
+        Alert finance about a stock issue. issue_type: low_stock, out_of_stock,
+        over_stock, supplier_delay, pricing or other (free text is mapped to
+        one of these). Severity is derived from current stock unless given. A repeat of an issue already reported is suppressed:
+        check `decision` and do not re-raise "suppressed" alerts.
+        """
+        issue = finance_issue(issue_type)
+        severity = severity or await stock_severity(issue, product)
         msg = (
-            f"📢 FINANCE ALERT | {issue_type}\n"
+            f"📢 FINANCE ALERT | {issue} | {severity}\n"
             f"Product: {product}\n"
             f"Supplier: {supplier.get('name')} | {supplier.get('phone')}"
         )
-        print(msg)
-        return msg
+        result = await alert_dedup.check(f"finance:{issue}", product, severity, msg)
+        if result["decision"] != "suppressed":
+            print(msg)
+        return result
+
+
+@mcp.tool()
+async def check_alert(kind: str, subject: str, severity: str, message: str) -> Dict:
+    """
+    Dedup gate for alerts sent by other services (e.g. the SDK's WhatsApp
+    admin alerts). Records the alert and returns `decision`; the caller sends
+    it only when the decision is not "suppressed".
+    """
+    return await alert_dedup.check(kind, subject, severity, message)
+
+
+anomaly_detector = None
+telemetry_store = None
+
+
+def get_anomaly_detector():
+    global anomaly_detector
+    if anomaly_detector is None:
+        from anomaly_detector import EwmaAnomalyDetector
+        anomaly_detector = EwmaAnomalyDetector(
+            alpha=float(os.getenv("ANOMALY_EWMA_ALPHA", "0.1")),
+            threshold=float(os.getenv("ANOMALY_Z_THRESHOLD", "3.0")),
+            warmup=int(os.getenv("ANOMALY_WARMUP_READINGS", "10")),
+        )
+    return anomaly_detector
+
+
+def get_telemetry_store():
+    global telemetry_store
+    if telemetry_store is None:
+        from telemetry_store import TelemetryStore
+        telemetry_store = TelemetryStore(os.getenv("TELEMETRY_DIR", os.path.join(BASE_DIR, "telemetry_data")))
+    return telemetry_store
+
+
+def _prime_anomaly_detector(machines: List[Dict]):
+    """Seed baselines from the current snapshot for machines never seen before."""
+    detector = get_anomaly_detector()
+    unseen = [m for m in machines if m["machine_id"] not in detector]
+    if unseen:
+        detector.ingest_records([{"machine_id": m["machine_id"], **m["sensor_data"]} for m in unseen])
+
+
+def _epoch(value, default: int) -> int:
+    """Reading timestamp as epoch seconds: accepts epoch numbers or ISO strings (UTC)."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return int(value)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _series(values) -> List[Optional[float]]:
+    return [None if math.isnan(v) else round(float(v), 2) for v in values]
+
+
+def _recent_summary(machine_id: str, hours: int = 24) -> Optional[Dict]:
+    """min / mean / max per signal over the last `hours`, from the telemetry store."""
+    telemetry_store = get_telemetry_store()
+    end = int(time.time())
+    window = hours * 3600
+    buckets = telemetry_store.downsample(machine_id, end - window, end, window)
+    if not buckets["count"][0]:
+        return None
+    summary = {"hours": hours, "readings": int(buckets["count"][0])}
+    for sig in telemetry_store.signals:
+        summary[sig] = {stat: _series(buckets[f"{sig}_{stat}"])[0] for stat in ("min", "mean", "max")}
+    return summary
+
+
+@mcp.tool()
+def ingest_sensor_readings(readings: List[Dict]) -> Dict:
+    """
+    Feed live sensor readings, e.g. [{"machine_id": "ASM-01", "temperature_celsius": 81,
+    "vibration_mm_s": 12.4, "power_kw": 22, "cycle_time_seconds": 40}, ...].
+    Each reading is scored against that machine's own baseline; anomalies are returned.
+    """
+    readings = [r for r in readings if r.get("machine_id")]
+    if not readings:
+        return {"ingested": 0, "anomalies": []}
+
+    anomaly_detector = get_anomaly_detector()
+    telemetry_store = get_telemetry_store()
+    flagged = anomaly_detector.ingest_records(readings)
+
+    now = int(time.time())
+    telemetry_store.append(
+        [r["machine_id"] for r in readings],
+        [_epoch(r.get("timestamp"), now) for r in readings],
+        [[math.nan if r.get(sig) is None else r[sig] for sig in telemetry_store.signals] for r in readings],
+    )
+    anomalous = sorted({r["machine_id"] for r, f in zip(readings, flagged) if f})
+    return {
+        "ingested": len(readings),
+        "anomalies": [{"machine_id": mid, **anomaly_detector.status(mid)} for mid in anomalous],
+    }
+
 
 @mcp.tool()
 def get_machine_health(machine_id: str) -> dict:
     """
-    Fetch health data of automotive manufacturing machine.
+    Fetch health data of automotive manufacturing machine,
+    with its anomaly score against the machine's own sensor baseline.
     """
     data = load_data()
+    _prime_anomaly_detector(data["machines"])
     for m in data["machines"]:
         if m["machine_id"] == machine_id:
             return {
@@ -178,67 +403,347 @@ def get_machine_health(machine_id: str) -> dict:
                 "vibration": m["sensor_data"]["vibration_mm_s"],
                 "cycle_time": m["sensor_data"]["cycle_time_seconds"],
                 "days_since_maintenance": m["maintenance"]["days_since_last_maintenance"],
-                "criticality": m["criticality"]
+                "criticality": m["criticality"],
+                "anomaly": get_anomaly_detector().status(machine_id),
+                "last_24h": _recent_summary(machine_id)
             }
     return {"error": "Machine not found"}
 
 @mcp.tool()
-def raise_maintenance_request(machine_id: str, reason: str) -> str:
+def get_machine_telemetry(
+    machine_id: str,
+    hours: int = 24,
+    bucket_minutes: int = 60,
+    signals: Optional[List[str]] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Dict:
     """
-    Simulate maintenance request for automotive plant.
+    Sensor history of one machine over the last `hours`, downsampled to
+    `bucket_minutes` buckets (mean / min / max per signal).
     """
-    return f"🔧 Maintenance request raised for {machine_id} | Reason: {reason}"
+    telemetry_store = get_telemetry_store()
+    signals = [sig for sig in (signals or telemetry_store.signals) if sig in telemetry_store.signals]
+    end = int(time.time())
+    bucket = max(60, bucket_minutes * 60)
+    start = end - hours * 3600
+    buckets = telemetry_store.downsample(machine_id, start - start % bucket, end, bucket, signals)
+
+    result = {
+        "machine_id": machine_id,
+        "bucket_minutes": bucket // 60,
+        "bucket_start": [
+            datetime.fromtimestamp(int(t), timezone.utc).isoformat() for t in buckets["bucket_start"]
+        ],
+        "count": buckets["count"].tolist(),
+    }
+    for sig in signals:
+        for stat in ("mean", "min", "max"):
+            result[f"{sig}_{stat}"] = _series(buckets[f"{sig}_{stat}"])
+    return fit_to_budget(result, max_bytes)
+
 
 @mcp.tool()
-def analyze_machine_risk():
-    data = load_data()
-    machines = data["machines"]
-    t = data["thresholds"]
+def get_fleet_trend(
+    days: int = 30,
+    signal: str = "temperature_celsius",
+    top: int = 10,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Dict:
+    """
+    Daily trend of one sensor signal across the fleet for the last `days` days:
+    fleet daily mean plus the machines whose daily mean rose the most.
+    """
+    import numpy as np
+
+    telemetry_store = get_telemetry_store()
+    if signal not in telemetry_store.signals:
+        return {"error": f"Unknown signal, expected one of {telemetry_store.signals}"}
+
+    today = datetime.now(timezone.utc).date()
+    day_list, matrix = telemetry_store.daily_trend(
+        (today - timedelta(days=days - 1)).isoformat(), today.isoformat(), signal
+    )
+    if not day_list:
+        return {"signal": signal, "days": [], "fleet_mean": [], "rising": []}
+
+    # every listed day has readings, so no column is all-NaN
+    fleet_mean = np.nanmean(matrix, axis=0)
+
+    # rise = last observed daily mean - first observed daily mean, per machine
+    observed = ~np.isnan(matrix)
+    has_two = observed.sum(axis=1) >= 2
+    first = matrix[np.arange(len(matrix)), observed.argmax(axis=1)]
+    last = matrix[np.arange(len(matrix)), matrix.shape[1] - 1 - observed[:, ::-1].argmax(axis=1)]
+    rise = np.where(has_two, last - first, np.nan)
+
+    ranked = [i for i in np.argsort(-np.nan_to_num(rise, nan=-np.inf)) if has_two[i]][:top]
+    result = {
+        "signal": signal,
+        "days": day_list,
+        "fleet_mean": _series(fleet_mean),
+        "rising": [
+            {
+                "machine_id": telemetry_store.machine_ids[i],
+                "rise": round(float(rise[i]), 2),
+                "daily_mean": _series(matrix[i]),
+            }
+            for i in ranked
+        ],
+    }
+    return fit_to_budget(result, max_bytes)
 
-    risks = []
 
-    for m in machines:
-        score = 0
-        reasons = []
+RISK_RULES_PATH = os.getenv("RISK_RULES_PATH", os.path.join(BASE_DIR, "risk_rules.json"))
+risk_rules = None
 
-        if m["sensor_data"]["temperature_celsius"] > t["max_temperature"]:
-            score += 2
-            reasons.append("High temperature")
 
-        if m["sensor_data"]["vibration_mm_s"] > t["max_vibration"]:
-            score += 2
-            reasons.append("High vibration")
+def get_risk_rules():
+    global risk_rules
+    if risk_rules is None:
+        from rule_engine import RuleEngine
+        risk_rules = RuleEngine(RISK_RULES_PATH)
+    return risk_rules
 
-        if m["maintenance"]["days_since_last_maintenance"] > t["max_days_without_maintenance"]:
-            score += 1
-            reasons.append("Maintenance overdue")
 
-        if score >= 4:
-            level = "HIGH"
-        elif score >= 2:
-            level = "MEDIUM"
-        else:
-            level = "LOW"
+_contexts_cache: Tuple[Optional[Tuple], Dict[str, Dict]] = (None, {})
 
+
+def _rules_mtime() -> Optional[float]:
+    try:
+        return os.path.getmtime(RISK_RULES_PATH)
+    except FileNotFoundError:
+        return None
+
+
+def machine_contexts(machine_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Name, stage and current severity (risk level, CRITICAL when DOWN) per
+    machine. Scored for every machine at once and recomputed only when
+    machines.json or the rule file changes.
+    """
+    global _contexts_cache
+    key = (_data_mtime(), _rules_mtime())
+    if _contexts_cache[0] != key:
+        data = load_data()
+        machines = data["machines"]
+        rules = get_risk_rules().compiled(machines, data.get("thresholds") or {})
+        scores, _ = rules.evaluate(machines)
+        _contexts_cache = (key, {
+            m["machine_id"]: {
+                "machine_name": m.get("machine_name"),
+                "production_stage": m.get("production_stage"),
+                "severity": "CRITICAL" if m.get("status") == "DOWN" else rules.level(score),
+            }
+            for m, score in zip(machines, scores)
+        })
+    contexts = _contexts_cache[1]
+    unknown = {"machine_name": None, "production_stage": None, "severity": "MEDIUM"}
+    return {machine_id: contexts.get(machine_id, unknown) for machine_id in machine_ids}
+
+
+work_order_store = WorkOrderStore(db[WORK_ORDERS_COLLECTION])
+work_order_queue = WorkOrderQueue(
+    work_order_store,
+    batch_window=float(os.getenv("WORK_ORDER_BATCH_SECONDS", "0.05")),
+)
+_work_order_indexes = asyncio.Lock()
+_work_order_indexes_ready = False
+
+
+async def ensure_work_order_indexes():
+    global _work_order_indexes_ready
+    if _work_order_indexes_ready:
+        return
+    async with _work_order_indexes:
+        if not _work_order_indexes_ready:
+            await work_order_store.ensure_indexes()
+            _work_order_indexes_ready = True
+
+
+async def _maintenance_alert(request: Dict, order: Dict, created: bool) -> Dict:
+    msg = (f"🔧 Maintenance request {order['order_id']} for {request['machine_id']} | "
+           f"{request['severity']} | Reason: {request['reason']}")
+    # same key as the work order: a different kind of issue on the same machine is its own alert
+    subject = f"{request['machine_id']}:{request['category']}"
+    alert = await alert_dedup.check("maintenance", subject, request["severity"], msg)
+    return {**alert, "work_order": order, "work_order_created": created}
+
+
+@mcp.tool()
+async def raise_maintenance_request(
+    machine_id: str, reason: str, severity: Optional[str] = None, category: Optional[str] = None
+) -> Dict:
+    """
+    Open a maintenance work order for automotive plant.
+    category: breakdown, temperature, vibration, cycle_time, power,
+    maintenance or general (derived from the reason when omitted).
+    Idempotent: the same machine + category returns the already open order.
+    Severity is the machine's current risk level (CRITICAL when DOWN) unless
+    given. A repeat request for a machine already reported is suppressed:
+    check `decision` and do not re-raise "suppressed" requests.
+    """
+    await ensure_work_order_indexes()
+    context = machine_contexts([machine_id])[machine_id]
+    request = {
+        **context, "machine_id": machine_id, "reason": reason,
+        "category": issue_category(reason, category), "severity": severity or context["severity"],
+    }
+    order, created = await work_order_queue.submit(request)
+    return await _maintenance_alert(request, order, created)
+
+
+@mcp.tool()
+async def raise_maintenance_requests(requests: List[Dict]) -> Dict:
+    """
+    Bulk variant: requests = [{"machine_id", "reason", "severity"?, "category"?}, ...].
+    One write for the whole batch; same idempotency and alert rules per item.
+    """
+    await ensure_work_order_indexes()
+    contexts = machine_contexts([r["machine_id"] for r in requests])
+    full = [
+        {**contexts[r["machine_id"]], "machine_id": r["machine_id"], "reason": r["reason"],
+         "category": issue_category(r["reason"], r.get("category")),
+         "severity": r.get("severity") or contexts[r["machine_id"]]["severity"]}
+        for r in requests
+    ]
+    results = await work_order_store.create_many(full)
+    items = [await _maintenance_alert(r, order, created) for r, (order, created) in zip(full, results)]
+    return {
+        "created": sum(1 for _, created in results if created),
+        "existing": sum(1 for _, created in results if not created),
+        "results": items,
+    }
+
+
+@mcp.tool()
+async def update_work_order(order_id: str, status: str, note: Optional[str] = None) -> Dict:
+    """Move a work order: open -> in_progress -> completed, or cancelled."""
+    await ensure_work_order_indexes()
+    return await work_order_store.transition(order_id, status, note)
+
+
+@mcp.tool()
+async def list_work_orders(
+    status: Optional[List[str]] = None,
+    machine_id: Optional[str] = None,
+    stage: Optional[str] = None,
+    limit: int = 20,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Dict:
+    """Work orders, newest first. Defaults to active (open / in_progress) orders."""
+    await ensure_work_order_indexes()
+    result = await work_order_store.list(status or list(ACTIVE_STATUSES), machine_id, stage, limit)
+    return fit_to_budget(result, max_bytes)
+
+
+@mcp.tool()
+def analyze_machine_risk(
+    include_low: bool = False,
+    fields: Optional[List[str]] = None,
+    limit: int = 0,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Dict:
+    """
+    Machine risk, HIGH first. LOW-risk machines are only counted unless include_low=True.
+    Scored by the per-machine / per-stage / per-criticality rules in risk_rules.json.
+    """
+    data = load_data()
+    machines = data["machines"]
+    rules = get_risk_rules().compiled(machines, data.get("thresholds") or {})
+    scores, hits = rules.evaluate(machines)
+
+    risks = []
+
+    for m, score, hit in zip(machines, scores, hits):
         risks.append({
             "machine_id": m["machine_id"],
             "machine_name": m["machine_name"],
             "stage": m["production_stage"],
-            "risk": level,
-            "reasons": reasons,
+            "risk": rules.level(score),
+            "score": float(score),
+            "reasons": [reason for reason, h in zip(rules.reasons, hit) if h],
             "temperature": m["sensor_data"]["temperature_celsius"],
             "vibration": m["sensor_data"]["vibration_mm_s"],
             "status": m["status"]
         })
 
-    return risks
+    low_count = sum(1 for r in risks if r["risk"] == "LOW")
+    if not include_low:
+        risks = [r for r in risks if r["risk"] != "LOW"]
+
+    result = {
+        "machines": project(top_n(by_severity(risks), limit), fields),
+        "low_risk_count": low_count,
+    }
+    return fit_to_budget(result, max_bytes)
+
+
+@mcp.tool()
+def analyze_downtime(
+    machine_id: Optional[str] = None,
+    weeks: int = 8,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Dict:
+    """
+    Downtime numbers: MTBF, MTTR (hours), availability and top failure reasons.
+    With machine_id: that machine plus weekly rollups for the last `weeks` weeks.
+    Without: every machine (lowest availability first) and per-stage totals.
+    """
+    engine = get_downtime_engine()
+    metrics = engine.metrics()
+
+    if machine_id:
+        if machine_id not in engine:
+            return {"error": "Machine not found"}
+        i = engine.position(machine_id)
+        result = {**engine.machine_report(i, metrics), "weekly": engine.weekly_rollup(i, weeks)}
+    else:
+        machines = [engine.machine_report(i, metrics) for i in range(len(engine.machine_ids))]
+        machines.sort(key=lambda m: m["availability"])
+        result = {"machines": machines, "stages": engine.stage_report(metrics)}
+
+    return fit_to_budget(result, max_bytes)
+
+
+@mcp.tool()
+def record_downtime_event(machine_id: str, duration_hours: float, reason: str, date: Optional[str] = None) -> Dict:
+    """
+    Log a downtime event (date as YYYY-MM-DD, default today) for a machine.
+    Analytics are updated incrementally, no recomputation over history.
+    """
+    global _downtime_loaded_mtime
+    engine = get_downtime_engine()
+    if machine_id not in engine:
+        return {"error": "Machine not found"}
+
+    # validate before saving: a bad row in machines.json would break every later load
+    try:
+        event_date = datetime.fromisoformat(date).date() if date else datetime.utcnow().date()
+    except (TypeError, ValueError):
+        return {"error": f"Invalid date '{date}', expected YYYY-MM-DD"}
+    if not isinstance(duration_hours, (int, float)) or not math.isfinite(duration_hours) or duration_hours <= 0:
+        return {"error": "duration_hours must be a positive number"}
+
+    event = {"date": event_date.isoformat(), "duration_hours": float(duration_hours), "reason": reason}
+
+    data = load_data()
+    for m in data["machines"]:
+        if m["machine_id"] == machine_id:
+            m.setdefault("downtime_history", []).insert(0, event)
+    save_data(data)
+
+    engine.record(machine_id, event["date"], event["duration_hours"], reason)
+    _downtime_loaded_mtime = _data_mtime()
+
+    i = engine.position(machine_id)
+    return {"recorded": event, **engine.machine_report(i, engine.metrics())}
 
 
 @mcp.tool()
-async def analyze_inventory_risk():
+async def analyze_inventory_risk(limit: int = 0, max_bytes: int = DEFAULT_MAX_BYTES) -> Dict:
     risks = []
 
-    async for p in collection.find():
+    async for p in collection.find({}, INVENTORY_PROJECTION):
         if p.get("stock", 0) < LOW_STOCK_LIMIT:
             risks.append({
                 "product": p["name"],
@@ -254,23 +759,93 @@ async def analyze_inventory_risk():
                 "reason": "Over stocking"
             })
 
-    return risks
+    return fit_to_budget({"inventory": top_n(by_severity(risks), limit)}, max_bytes)
 
 from suppliers_data import suppliers_seed
 
 @mcp.tool()
-async def analyze_supplier_risk():
-    risks = []
-    for s in suppliers_seed:
-        delay = float(s.get("delay_score", 0.2))
-        if delay > 0.6:
-            risks.append({
-                "supplier": s.get("name"),
-                "risk": "HIGH",
-                "reason": "Frequent delivery delays",
-                "phone": s.get("phone")
-            })
-    return risks
+async def record_delivery(
+    supplier: str,
+    product: str,
+    promised_date: str,
+    delivered_at: Optional[str] = None,
+    quantity: int = 0,
+) -> Dict:
+    """
+    Record a supplier delivery (ISO dates; delivered_at defaults to now)
+    and fold it into the supplier's reliability stats.
+    """
+    try:
+        delivered = as_utc_naive(delivered_at) if delivered_at else datetime.utcnow()
+        promised = as_utc_naive(promised_date)
+    except ValueError:
+        return {"error": "promised_date and delivered_at must be ISO dates"}
+    delay = delay_days(promised, delivered)
+
+    await deliveries_collection.insert_one({
+        "supplier": supplier,
+        "product": product,
+        "quantity": quantity,
+        "promised_date": promised,
+        "delivered_at": delivered,
+        "delay_days": round(delay, 3),
+    })
+    # O(1) incremental update of the materialized view
+    await supplier_stats_collection.update_one({"_id": supplier}, stats_update(delay, delivered), upsert=True)
+    await db[VERSIONS_COLLECTION].update_one({"_id": DELIVERIES_COLLECTION}, {"$inc": {"version": 1}}, upsert=True)
+
+    stats = await supplier_stats_collection.find_one({"_id": supplier})
+    return {"supplier": supplier, "delay_days": round(delay, 2), **summarize(stats or {})}
+
+
+@mcp.tool()
+async def data_version() -> Dict:
+    """
+    Version stamp of the plant data: inventory, supplier and delivery write
+    counters plus the machine data and risk rule file times. It changes
+    whenever any of them is written.
+    """
+    tracked = [COLLECTION_NAME, SUPPLIERS_COLLECTION, DELIVERIES_COLLECTION]
+    counters = {name: 0 for name in tracked}
+    async for doc in db[VERSIONS_COLLECTION].find({"_id": {"$in": tracked}}):
+        counters[doc["_id"]] = doc.get("version", 0)
+    files = {"machines": _data_mtime() or 0, "risk_rules": _rules_mtime() or 0}
+    stamp = "-".join(str(counters[name]) for name in tracked) + "-" + "-".join(f"{t:.3f}" for t in files.values())
+    return {"version": stamp, "counters": counters, "files": files}
+
+
+@mcp.tool()
+async def rebuild_supplier_stats() -> Dict:
+    """Recompute the supplier stats view from the full delivery history (backfill / repair)."""
+    deliveries = await deliveries_collection.find(
+        {}, {"supplier": 1, "promised_date": 1, "delivered_at": 1}
+    ).to_list(length=None)
+    view = rebuild_from_deliveries(deliveries)
+
+    await supplier_stats_collection.delete_many({})
+    for supplier, stats in view.items():
+        await supplier_stats_collection.update_one({"_id": supplier}, {"$set": stats}, upsert=True)
+    return {"suppliers": len(view), "deliveries": len(deliveries)}
+
+
+@mcp.tool()
+async def analyze_supplier_risk(include_all: bool = False) -> List[Dict]:
+    """
+    Supplier delivery risk from the materialized stats view (seed score until
+    a supplier has enough deliveries). Only HIGH risk unless include_all=True.
+    """
+    stats_by_supplier = {
+        s["_id"]: s async for s in supplier_stats_collection.find({})
+    }
+
+    seeds = {s["name"]: s for s in suppliers_seed}
+    for name in stats_by_supplier:
+        seeds.setdefault(name, {"name": name})
+
+    risks = [score_supplier(seed, stats_by_supplier.get(name)) for name, seed in seeds.items()]
+    if not include_all:
+        risks = [r for r in risks if r["risk"] == "HIGH"]
+    return by_severity(risks)
 
 
 
@@ -288,7 +863,11 @@ async def root():
         "test_endpoints": {
             "database": "/test/db",
             "inventory": "/test/inventory/{product_name}",
-            "low_sellers": "/test/low-sellers"
+            "low_sellers": "/test/low-sellers",
+            "supplier_index": "/test/supplier-index",
+            "risk_rules": "/test/risk-rules",
+            "alerts": "/test/alerts",
+            "work_orders": "/work-orders"
         }
     }
 
@@ -312,9 +891,57 @@ async def test_db():
 
     
 
+# Dashboard routes live on the MCP app itself: deployments serve `server:mcp_app`,
+# so routes registered only on `app` below would never be reachable.
+
+@mcp.custom_route("/test/risk-rules", methods=["GET"])
+async def test_risk_rules(request: Request):
+    return JSONResponse(get_risk_rules().status())
+
+
+@mcp.custom_route("/test/alerts", methods=["GET"])
+async def test_alerts(request: Request):
+    return JSONResponse(await alert_dedup.active())
+
+
+@mcp.custom_route("/work-orders", methods=["GET"])
+async def get_work_orders(request: Request):
+    params = request.query_params
+    try:
+        limit = int(params.get("limit", 50))
+        skip = int(params.get("skip", 0))
+    except ValueError:
+        return JSONResponse({"error": "limit and skip must be integers"}, status_code=400)
+    await ensure_work_order_indexes()
+    statuses = [s for s in params.get("status", "open,in_progress").split(",") if s]
+    result = await work_order_store.list(statuses, params.get("machine_id"), params.get("stage"), limit, skip)
+    result["queue"] = work_order_queue.stats()
+    return JSONResponse(json.loads(json.dumps(result, default=str)))
+
+
+@mcp.custom_route("/test/supplier-index", methods=["GET"])
+async def test_supplier_index(request: Request):
+    return JSONResponse(json.loads(json.dumps(supplier_index.index_stats(), default=str)))
+
+
 mcp_app = mcp.streamable_http_app()
+_session_lifespan = mcp_app.router.lifespan_context
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await supplier_index.start()
+    try:
+        async with _session_lifespan(app):
+            yield
+    finally:
+        await supplier_index.stop()
+
+
+mcp_app.router.lifespan_context = lifespan
 app.mount("/mcp", mcp_app)
 
 if __name__ == "__main__":
+    import uvicorn
     logger.info("🚀 Starting FastAPI + MCP Server on port 8003...")
     uvicorn.run("server:mcp_app", host="0.0.0.0", port=8003, reload=True)
\ No newline at end of file
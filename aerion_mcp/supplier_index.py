@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================
+# ✅ PRODUCT → SUPPLIER REVERSE INDEX
+# =========================================================
+
+# writers bump {"_id": <collection>, "version": n} in this collection
+VERSIONS_COLLECTION = "collection_versions"
+
+SUPPLIER_FIELDS = {"_id": 1, "name": 1, "email": 1, "phone": 1, "address": 1, "products_supplied": 1}
+
+
+def _record(supplier: Dict) -> Dict:
+    return {k: supplier.get(k) for k in ("name", "email", "phone", "address")}
+
+
+class SupplierIndex:
+    """
+    product name -> supplier record, held in memory.
+    Built at startup; kept current by a Mongo change stream, applying each
+    changed supplier document in place. Without change streams (standalone
+    mongod, in-memory stand-in) or while the stream is down, the suppliers
+    version counter is polled every `poll_interval` seconds, and the stream
+    is re-attempted with exponential backoff up to `retry_max` seconds.
+    """
+
+    def __init__(self, suppliers, versions, poll_interval: float = 10.0, retry_max: float = 300.0):
+        self.suppliers = suppliers
+        self.versions = versions
+        self.poll_interval = poll_interval
+        self.retry_max = retry_max
+
+        # product -> {supplier _id: record}, in natural (insertion) order so the
+        # first supplier listing a product wins, same answer as find_one
+        self._by_product: Dict[str, Dict[Any, Dict]] = {}
+        self._products_of: Dict[Any, List[str]] = {}
+        self._version: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.mode = "not started"
+        self.stats = {"hits": 0, "misses": 0, "rebuilds": 0, "updates": 0, "stream_retries": 0}
+
+    async def _current_version(self) -> int:
+        doc = await self.versions.find_one({"_id": self.suppliers.name})
+        return (doc or {}).get("version", 0)
+
+    async def rebuild(self):
+        version = await self._current_version()
+        by_product: Dict[str, Dict[Any, Dict]] = {}
+        products_of: Dict[Any, List[str]] = {}
+        async for s in self.suppliers.find({}, SUPPLIER_FIELDS):
+            products = list(dict.fromkeys(s.get("products_supplied") or []))
+            products_of[s["_id"]] = products
+            for product in products:
+                by_product.setdefault(product, {})[s["_id"]] = _record(s)
+
+        self._by_product = by_product
+        self._products_of = products_of
+        self._version = version
+        self.stats["rebuilds"] += 1
+        logger.info(f"📇 Supplier index built: {len(by_product)} products (version {version})")
+
+    # ------------------ per-document updates ------------------
+
+    def _remove(self, supplier_id):
+        for product in self._products_of.pop(supplier_id, []):
+            owners = self._by_product.get(product, {})
+            owners.pop(supplier_id, None)
+            if not owners:
+                self._by_product.pop(product, None)
+
+    def _upsert(self, supplier: Dict):
+        supplier_id = supplier["_id"]
+        products = list(dict.fromkeys(supplier.get("products_supplied") or []))
+        for product in set(self._products_of.get(supplier_id, [])) - set(products):
+            owners = self._by_product[product]
+            owners.pop(supplier_id, None)
+            if not owners:
+                del self._by_product[product]
+        record = _record(supplier)
+        for product in products:
+            # an existing entry keeps its position, a new supplier goes last
+            self._by_product.setdefault(product, {})[supplier_id] = record
+        self._products_of[supplier_id] = products
+
+    def apply_change(self, event: Dict) -> bool:
+        """Fold one change-stream event in; False when only a rebuild can catch up."""
+        op = event.get("operationType")
+        if op == "delete":
+            self._remove(event["documentKey"]["_id"])
+        elif op in ("insert", "update", "replace"):
+            doc = event.get("fullDocument")
+            if doc is None:
+                # updated then deleted before the lookup ran
+                self._remove(event["documentKey"]["_id"])
+            else:
+                self._upsert(doc)
+        else:
+            return False
+        self.stats["updates"] += 1
+        return True
+
+    # ------------------ keeping current ------------------
+
+    async def _watch(self):
+        async with self.suppliers.watch(full_document="updateLookup") as stream:
+            self.mode = "change_stream"
+            # catch writes that landed while the stream was down
+            await self.rebuild()
+            async for event in stream:
+                if event.get("operationType") == "invalidate":
+                    return
+                if not self.apply_change(event):
+                    await self.rebuild()
+
+    async def _poll(self, duration: float):
+        """Poll the version counter for `duration` seconds."""
+        loop = asyncio.get_running_loop()
+        until = loop.time() + duration
+        while True:
+            await asyncio.sleep(min(self.poll_interval, max(0.0, until - loop.time())))
+            try:
+                if await self._current_version() != self._version:
+                    await self.rebuild()
+            except Exception as e:
+                logger.warning(f"⚠️ Supplier index poll failed: {e}")
+            if loop.time() >= until:
+                return
+
+    async def _keep_current(self):
+        delay = self.poll_interval
+        while True:
+            try:
+                await self._watch()
+                delay = self.poll_interval
+                logger.info("Supplier index: change stream closed, reopening")
+            except Exception as e:
+                # change streams need a replica set; poll meanwhile and try again later
+                logger.info(
+                    f"Supplier index: change stream unavailable ({e}), "
+                    f"polling version counter, retrying in {delay:g}s"
+                )
+                self.mode = "polling"
+                await self._poll(delay)
+                delay = min(self.retry_max, delay * 2)
+            self.stats["stream_retries"] += 1
+
+    async def start(self):
+        """Build the index and start keeping it current (called at app startup)."""
+        async with self._lock:
+            if self._task is not None:
+                return
+            try:
+                await self.rebuild()
+            except Exception as e:
+                # the background loop rebuilds once the database is reachable
+                logger.warning(f"⚠️ Supplier index build failed at startup: {e}")
+            self._task = asyncio.ensure_future(self._keep_current())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self.mode = "stopped"
+
+    async def lookup(self, product_name: str) -> Optional[Dict]:
+        owners = self._by_product.get(product_name)
+        supplier = next(iter(owners.values())) if owners else None
+        self.stats["hits" if supplier else "misses"] += 1
+        return supplier
+
+    def index_stats(self) -> Dict:
+        return {**self.stats, "mode": self.mode, "products": len(self._by_product), "version": self._version}
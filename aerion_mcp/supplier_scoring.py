@@ -0,0 +1,126 @@
+import math
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+# =========================================================
+# ✅ SUPPLIER RELIABILITY SCORING
+# =========================================================
+
+# a delivery counts as on time up to this many calendar days after the promised date
+ON_TIME_GRACE_DAYS = 0
+# below this many deliveries the static seed score is still used
+MIN_DELIVERIES = 3
+HIGH_RISK_LATE_RATE = 0.6
+MEDIUM_RISK_LATE_RATE = 0.3
+
+
+def as_utc_naive(value) -> datetime:
+    """ISO string or datetime -> naive UTC (offsets are converted, not dropped)."""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def delay_days(promised_date, delivered_at) -> float:
+    """
+    Whole calendar days (UTC) between the promised and the delivery date:
+    positive when late, negative when early, 0 for any time on the promised day.
+    """
+    return float((as_utc_naive(delivered_at).date() - as_utc_naive(promised_date).date()).days)
+
+
+def stats_update(delay: float, delivered_at: datetime) -> Dict:
+    """
+    One delivery as an atomic $inc on the supplier's running sums.
+    count / sum / sum of squares are enough for on-time rate, mean and
+    variance, so the view never needs a rescan of the deliveries history.
+    """
+    return {
+        "$inc": {
+            "deliveries": 1,
+            "on_time": 1 if delay <= ON_TIME_GRACE_DAYS else 0,
+            "delay_sum": delay,
+            "delay_sq_sum": delay * delay,
+        },
+        # $max: a back-dated delivery must not overwrite a newer one
+        "$max": {"last_delivery_at": delivered_at},
+    }
+
+
+def summarize(stats: Dict) -> Dict:
+    """Turn the running sums of one supplier into reliability figures."""
+    n = stats.get("deliveries", 0)
+    if not n:
+        return {"deliveries": 0}
+
+    mean = stats["delay_sum"] / n
+    # population variance; clamp float noise below zero
+    variance = max(0.0, stats["delay_sq_sum"] / n - mean * mean)
+    on_time_rate = stats["on_time"] / n
+    return {
+        "deliveries": n,
+        "on_time_rate": round(on_time_rate, 3),
+        "mean_delay_days": round(mean, 2),
+        "delay_stddev_days": round(math.sqrt(variance), 2),
+        "last_delivery_at": stats.get("last_delivery_at"),
+    }
+
+
+def risk_level(late_rate: float) -> str:
+    if late_rate > HIGH_RISK_LATE_RATE:
+        return "HIGH"
+    if late_rate > MEDIUM_RISK_LATE_RATE:
+        return "MEDIUM"
+    return "LOW"
+
+
+def score_supplier(seed: Dict, stats: Optional[Dict]) -> Dict:
+    """Risk for one supplier from its materialized stats, falling back to the seed score."""
+    summary = summarize(stats or {})
+    if summary["deliveries"] >= MIN_DELIVERIES:
+        late_rate = 1 - summary["on_time_rate"]
+        source = "deliveries"
+    else:
+        late_rate = float(seed.get("delay_score", 0.2))
+        source = "seed"
+
+    level = risk_level(late_rate)
+    if source == "deliveries":
+        reason = (
+            f"{round(late_rate * 100)}% of {summary['deliveries']} deliveries late, "
+            f"mean delay {summary['mean_delay_days']} days"
+        )
+    else:
+        reason = {
+            "HIGH": "Frequent delivery delays",
+            "MEDIUM": "Occasional delivery delays",
+        }.get(level, "Reliable deliveries")
+
+    return {
+        "supplier": seed.get("name"),
+        "risk": level,
+        "reason": reason,
+        "late_rate": round(late_rate, 3),
+        "source": source,
+        "phone": seed.get("phone"),
+        **{k: v for k, v in summary.items() if k != "last_delivery_at"},
+    }
+
+
+def rebuild_from_deliveries(deliveries: List[Dict]) -> Dict[str, Dict]:
+    """Recompute every supplier's running sums (one-off backfill / repair)."""
+    view: Dict[str, Dict] = {}
+    for d in deliveries:
+        delay = delay_days(d["promised_date"], d["delivered_at"])
+        stats = view.setdefault(d["supplier"], {
+            "deliveries": 0, "on_time": 0, "delay_sum": 0.0, "delay_sq_sum": 0.0, "last_delivery_at": None,
+        })
+        for key, value in stats_update(delay, d["delivered_at"])["$inc"].items():
+            stats[key] += value
+        delivered_at = as_utc_naive(d["delivered_at"])
+        if stats["last_delivery_at"] is None or delivered_at > stats["last_delivery_at"]:
+            stats["last_delivery_at"] = delivered_at
+    return view
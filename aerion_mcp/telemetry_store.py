@@ -0,0 +1,253 @@
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from anomaly_detector import SIGNALS
+
+
+# =========================================================
+# ✅ COLUMNAR TELEMETRY STORE
+# =========================================================
+
+DAY_SECONDS = 86400
+SEALED_MARKER = "_SEALED"
+
+
+def day_of(ts: int) -> str:
+    return datetime.fromtimestamp(int(ts) - int(ts) % DAY_SECONDS, timezone.utc).date().isoformat()
+
+
+def day_start(day: str) -> int:
+    return int(datetime.fromisoformat(day).replace(tzinfo=timezone.utc).timestamp())
+
+
+class TelemetryStore:
+    """
+    Append-only sensor history, one directory per UTC day:
+
+        <root>/2026-01-19/ts.bin           int64 epoch seconds
+                          machine.bin      int32 machine number
+                          <signal>.bin     float32, one file per signal
+
+    Columns are raw arrays read through np.memmap, so queries touch only the
+    pages they need. The current day is appended in arrival order; once a
+    newer day starts the older one is sealed: rows sorted by (machine, ts),
+    an offsets index written (one machine = one contiguous slice) and an
+    hourly rollup (count / sum / min / max per machine) stored next to it.
+    Long-range trends read the rollups, not the raw rows.
+    """
+
+    def __init__(self, root: str, signals: Sequence[str] = SIGNALS):
+        self.root = root
+        self.signals = list(signals)
+        self.dtypes = {"ts": np.int64, "machine": np.int32, **{s: np.float32 for s in self.signals}}
+        os.makedirs(root, exist_ok=True)
+
+        self._registry_path = os.path.join(root, "machines.json")
+        self.machine_ids: List[str] = []
+        if os.path.exists(self._registry_path):
+            with open(self._registry_path, "r") as f:
+                self.machine_ids = json.load(f)
+        self._index = {mid: i for i, mid in enumerate(self.machine_ids)}
+
+    # ------------------ layout ------------------
+
+    def _dir(self, day: str) -> str:
+        return os.path.join(self.root, day)
+
+    def _path(self, day: str, name: str) -> str:
+        return os.path.join(self._dir(day), f"{name}.bin")
+
+    def days(self) -> List[str]:
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(self._dir(d)))
+
+    def is_sealed(self, day: str) -> bool:
+        return os.path.exists(os.path.join(self._dir(day), SEALED_MARKER))
+
+    def rows(self, day: str) -> int:
+        try:
+            return os.path.getsize(self._path(day, "ts")) // np.dtype(np.int64).itemsize
+        except FileNotFoundError:
+            return 0
+
+    def _column(self, day: str, name: str) -> np.ndarray:
+        n = self.rows(day)
+        if n == 0:
+            return np.zeros(0, dtype=self.dtypes[name])
+        return np.memmap(self._path(day, name), dtype=self.dtypes[name], mode="r", shape=(n,))
+
+    def _register(self, machine_ids: Sequence[str]) -> np.ndarray:
+        new = [mid for mid in dict.fromkeys(machine_ids) if mid not in self._index]
+        if new:
+            for mid in new:
+                self._index[mid] = len(self.machine_ids)
+                self.machine_ids.append(mid)
+            tmp_path = self._registry_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.machine_ids, f)
+            os.replace(tmp_path, self._registry_path)
+        return np.fromiter((self._index[mid] for mid in machine_ids), dtype=np.int32, count=len(machine_ids))
+
+    # ------------------ write ------------------
+
+    def append(self, machine_ids: Sequence[str], ts: Sequence[int], values: np.ndarray):
+        """values is (rows x signals); NaN where a signal was not reported."""
+        if not len(machine_ids):
+            return
+        machine = self._register(machine_ids)
+        ts = np.asarray(ts, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float32).reshape(len(ts), len(self.signals))
+
+        day_number = ts // DAY_SECONDS
+        for d in np.unique(day_number):
+            rows = day_number == d
+            day = day_of(int(d) * DAY_SECONDS)
+            os.makedirs(self._dir(day), exist_ok=True)
+            if self.is_sealed(day):
+                # late data: drop the seal so the day is re-sorted on the next seal pass
+                os.remove(os.path.join(self._dir(day), SEALED_MARKER))
+
+            columns = {"ts": ts[rows], "machine": machine[rows]}
+            columns.update({s: values[rows, k] for k, s in enumerate(self.signals)})
+            for name, data in columns.items():
+                with open(self._path(day, name), "ab") as f:
+                    f.write(np.ascontiguousarray(data, dtype=self.dtypes[name]).tobytes())
+
+        self.seal_before(day_of(int(ts.max())))
+
+    def seal_before(self, day: str):
+        for d in self.days():
+            if d < day and not self.is_sealed(d):
+                self.seal(d)
+
+    def seal(self, day: str):
+        ts = np.array(self._column(day, "ts"))
+        machine = np.array(self._column(day, "machine"))
+        order = np.lexsort((ts, machine))
+        machine = machine[order]
+
+        for name in self.dtypes:
+            data = np.array(self._column(day, name))[order]
+            tmp_path = self._path(day, name) + ".tmp"
+            data.tofile(tmp_path)
+            os.replace(tmp_path, self._path(day, name))
+
+        n_machines = len(self.machine_ids)
+        offsets = np.searchsorted(machine, np.arange(n_machines + 1)).astype(np.int64)
+        np.save(os.path.join(self._dir(day), "offsets.npy"), offsets)
+
+        # hourly rollups per machine: what trend queries read
+        slot = machine.astype(np.int64) * 24 + (ts[order] - day_start(day)) // 3600
+        size = n_machines * 24
+        for s in self.signals:
+            v = np.array(self._column(day, s), dtype=np.float64)
+            valid = ~np.isnan(v)
+            total = np.bincount(slot[valid], weights=v[valid], minlength=size)
+            low = np.full(size, np.inf)
+            high = np.full(size, -np.inf)
+            np.minimum.at(low, slot[valid], v[valid])
+            np.maximum.at(high, slot[valid], v[valid])
+            n_valid = np.bincount(slot[valid], minlength=size)
+            for stat, data, dtype in (
+                ("sum", total, np.float64),
+                ("n", n_valid, np.int32),
+                ("min", low, np.float32),
+                ("max", high, np.float32),
+            ):
+                path = os.path.join(self._dir(day), f"rollup_{s}_{stat}.npy")
+                np.save(path, data.astype(dtype).reshape(n_machines, 24))
+
+        open(os.path.join(self._dir(day), SEALED_MARKER), "w").close()
+
+    # ------------------ read ------------------
+
+    def _machine_rows(self, day: str, i: int):
+        if self.is_sealed(day):
+            offsets = np.load(os.path.join(self._dir(day), "offsets.npy"), mmap_mode="r")
+            if i + 1 >= len(offsets):
+                return slice(0, 0)
+            return slice(int(offsets[i]), int(offsets[i + 1]))
+        return np.flatnonzero(self._column(day, "machine") == i)
+
+    def _days_between(self, start: int, end: int) -> List[str]:
+        first, last = day_of(start), day_of(max(start, end - 1))
+        return [d for d in self.days() if first <= d <= last]
+
+    def query(self, machine_id: str, start: int, end: int, signals: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Raw readings of one machine with start <= ts < end, ordered by time."""
+        signals = list(signals or self.signals)
+        out: Dict[str, List[np.ndarray]] = {"ts": [], **{s: [] for s in signals}}
+        i = self._index.get(machine_id)
+
+        if i is not None:
+            for day in self._days_between(start, end):
+                rows = self._machine_rows(day, i)
+                ts = np.asarray(self._column(day, "ts")[rows])
+                keep = (ts >= start) & (ts < end)
+                out["ts"].append(ts[keep])
+                for s in signals:
+                    out[s].append(np.asarray(self._column(day, s)[rows])[keep])
+
+        result = {k: np.concatenate(v) if v else np.zeros(0, dtype=self.dtypes[k]) for k, v in out.items()}
+        order = np.argsort(result["ts"], kind="stable")
+        return {k: v[order] for k, v in result.items()}
+
+    def downsample(
+        self,
+        machine_id: str,
+        start: int,
+        end: int,
+        bucket_seconds: int,
+        signals: Optional[Sequence[str]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Per-bucket count / mean / min / max of one machine's readings."""
+        signals = list(signals or self.signals)
+        data = self.query(machine_id, start, end, signals)
+        n = max(1, -(-(end - start) // bucket_seconds))
+        bucket = (data["ts"] - start) // bucket_seconds
+
+        out = {"bucket_start": start + np.arange(n, dtype=np.int64) * bucket_seconds}
+        out["count"] = np.bincount(bucket, minlength=n)
+        for s in signals:
+            v = data[s].astype(np.float64)
+            valid = ~np.isnan(v)
+            n_valid = np.bincount(bucket[valid], minlength=n)
+            total = np.bincount(bucket[valid], weights=v[valid], minlength=n)
+            low = np.full(n, np.inf)
+            high = np.full(n, -np.inf)
+            np.minimum.at(low, bucket[valid], v[valid])
+            np.maximum.at(high, bucket[valid], v[valid])
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[f"{s}_mean"] = np.where(n_valid > 0, total / n_valid, np.nan)
+            out[f"{s}_min"] = np.where(n_valid > 0, low, np.nan)
+            out[f"{s}_max"] = np.where(n_valid > 0, high, np.nan)
+        return out
+
+    def _daily_sums(self, day: str, signal: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(sum, count) of a signal per machine for one day."""
+        n_machines = len(self.machine_ids)
+        if self.is_sealed(day):
+            total = np.load(os.path.join(self._dir(day), f"rollup_{signal}_sum.npy"), mmap_mode="r").sum(axis=1)
+            count = np.load(os.path.join(self._dir(day), f"rollup_{signal}_n.npy"), mmap_mode="r").sum(axis=1)
+        else:
+            machine = np.asarray(self._column(day, "machine"), dtype=np.int64)
+            v = np.asarray(self._column(day, signal), dtype=np.float64)
+            valid = ~np.isnan(v)
+            total = np.bincount(machine[valid], weights=v[valid], minlength=n_machines)
+            count = np.bincount(machine[valid], minlength=n_machines)
+        # machines registered after the day was sealed have no rows in it
+        pad = n_machines - len(total)
+        return np.pad(total, (0, pad)), np.pad(count, (0, pad))
+
+    def daily_trend(self, start_day: str, end_day: str, signal: str) -> Tuple[List[str], np.ndarray]:
+        """Daily mean per machine: (days, array of machines x days), NaN where no data."""
+        days = [d for d in self.days() if start_day <= d <= end_day]
+        matrix = np.full((len(self.machine_ids), len(days)), np.nan)
+        for j, day in enumerate(days):
+            total, count = self._daily_sums(day, signal)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                matrix[:, j] = np.where(count > 0, total / count, np.nan)
+        return days, matrix
@@ -0,0 +1,56 @@
+# tool_shaping.py
+# Keeps MCP tool payloads small: projections, top-N by severity and a byte budget.
+import json
+from typing import Dict, List, Optional
+
+DEFAULT_MAX_BYTES = 8000
+
+RISK_ORDER = {"HIGH": 0, "OVER": 1, "MEDIUM": 2, "LOW": 3}
+
+
+def _size(value) -> int:
+    return len(json.dumps(value, default=str, ensure_ascii=False).encode("utf-8"))
+
+
+def estimate_tokens(value) -> int:
+    """~4 bytes per token; close enough to budget LLM context."""
+    return max(1, _size(value) // 4)
+
+
+def project(items: List[dict], fields: Optional[List[str]]) -> List[dict]:
+    if not fields:
+        return items
+    return [{k: item.get(k) for k in fields if k in item} for item in items]
+
+
+def top_n(items: List[dict], n: int) -> List[dict]:
+    return items[:n] if n and n > 0 else items
+
+
+def by_severity(items: List[dict], key: str = "risk") -> List[dict]:
+    return sorted(items, key=lambda i: RISK_ORDER.get(i.get(key), len(RISK_ORDER)))
+
+
+def fit_to_budget(payload: Dict, max_bytes: int = DEFAULT_MAX_BYTES) -> Dict:
+    """
+    Drop items from the tail of the longest lists until the payload fits
+    `max_bytes`. Lists should already be ordered by severity, so the least
+    important items go first. Adds `_truncated` markers and `payload_tokens`.
+    """
+    sizes = {k: [_size(i) + 1 for i in v] for k, v in payload.items() if isinstance(v, list)}
+    total = _size(payload)
+    omitted: Dict[str, int] = {}
+
+    while max_bytes and total > max_bytes:
+        candidates = [k for k, v in payload.items() if isinstance(v, list) and v]
+        if not candidates:
+            break
+        key = max(candidates, key=lambda k: len(payload[k]))
+        payload[key].pop()
+        total -= sizes[key].pop()
+        omitted[key] = omitted.get(key, 0) + 1
+
+    if omitted:
+        payload["_truncated"] = {k: f"{n} more items omitted (max_bytes={max_bytes})" for k, n in omitted.items()}
+    payload["payload_tokens"] = estimate_tokens(payload)
+    return payload
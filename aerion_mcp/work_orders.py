@@ -0,0 +1,281 @@
+import asyncio
+import hashlib
+import re
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+# =========================================================
+# ✅ MAINTENANCE WORK ORDERS (durable, idempotent)
+# =========================================================
+
+WORK_ORDERS_COLLECTION = "work_orders"
+
+ACTIVE_STATUSES = ("open", "in_progress")
+TRANSITIONS = {
+    "open": {"in_progress", "cancelled"},
+    "in_progress": {"open", "completed", "cancelled"},
+    "completed": set(),
+    "cancelled": set(),
+}
+
+LIST_PROJECTION = {
+    "machine_id": 1, "machine_name": 1, "production_stage": 1, "category": 1, "reason": 1, "severity": 1,
+    "status": 1, "created_at": 1, "updated_at": 1, "request_count": 1, "last_requested_at": 1,
+}
+
+
+# issue categories: the risk rule ids (risk_rules.json) plus breakdown / general.
+# Orders and alerts are keyed on the category, never on the free-text reason.
+ISSUE_CATEGORIES = {
+    "breakdown": ("down", "breakdown", "broken", "stopped", "failure", "failed", "not running", "jam"),
+    "temperature": ("temperature", "overheat", "hot", "thermal", "cooling", "coolant"),
+    "vibration": ("vibration", "vibrating", "shaking", "bearing", "imbalance", "misalign"),
+    "cycle_time": ("cycle", "slow", "throughput", "speed"),
+    "power": ("power", "electrical", "current", "voltage", "motor draw"),
+    "maintenance": ("maintenance", "overdue", "service", "inspection", "lubrication", "wear"),
+}
+DEFAULT_CATEGORY = "general"
+
+
+def issue_category(reason: str, category: Optional[str] = None) -> str:
+    """An explicit known category wins; otherwise the first category whose keywords appear in the reason."""
+    if category and category.strip().lower() in ISSUE_CATEGORIES:
+        return category.strip().lower()
+    text = " ".join(re.sub(r"[^a-z0-9]+", " ", (reason or "").lower()).split())
+    for name, keywords in ISSUE_CATEGORIES.items():
+        if any(re.search(rf"\b{re.escape(k)}", text) for k in keywords):
+            return name
+    return DEFAULT_CATEGORY
+
+
+def idempotency_key(machine_id: str, category: str) -> str:
+    """Same machine + same issue category -> same key."""
+    return hashlib.sha1(f"{machine_id.strip().upper()}|{category}".encode()).hexdigest()[:20]
+
+
+def _only_duplicate_keys(error: Exception) -> bool:
+    """BulkWriteError from insert_many whose write errors are all E11000 duplicates."""
+    write_errors = (getattr(error, "details", None) or {}).get("writeErrors") or []
+    return bool(write_errors) and all(e.get("code") == 11000 for e in write_errors)
+
+
+def _public(order: Dict) -> Dict:
+    order = {k: v for k, v in order.items() if k != "active_key"}
+    order["order_id"] = order.pop("_id")
+    for key in ("created_at", "updated_at", "last_requested_at", "closed_at"):
+        if isinstance(order.get(key), datetime):
+            order[key] = order[key].isoformat()
+    return order
+
+
+class WorkOrderStore:
+    """
+    One document per work order. While an order is open or in progress its
+    `active_key` is the idempotency key, and a unique index on that field
+    keeps one active order per (machine, issue category). Closing an order
+    frees the key, so a later request for the same issue opens a new order.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("active_key", 1)], unique=True, name="active_key")
+        await self.collection.create_index(
+            [("status", 1), ("machine_id", 1), ("created_at", -1)], name="status_machine"
+        )
+        await self.collection.create_index(
+            [("status", 1), ("production_stage", 1), ("created_at", -1)], name="status_stage"
+        )
+        await self.collection.create_index([("machine_id", 1), ("created_at", -1)], name="machine")
+        await self.collection.create_index([("production_stage", 1), ("created_at", -1)], name="stage")
+
+    async def create_many(self, requests: List[Dict]) -> List[Tuple[Dict, bool]]:
+        """
+        Bulk, idempotent create. Each request: machine_id, category, reason and
+        optional severity / machine_name / production_stage / count. -> (order, created)
+        per request, in order. One $in lookup, one insert_many, one update per
+        distinct repeat count.
+        """
+        now = datetime.utcnow()
+        keyed = [(idempotency_key(r["machine_id"], r["category"]), r) for r in requests]
+        keys = list(dict.fromkeys(k for k, _ in keyed))
+
+        existing = {
+            o["active_key"]: o
+            async for o in self.collection.find({"active_key": {"$in": keys}})
+        }
+
+        new_docs: Dict[str, Dict] = {}
+        for key, r in keyed:
+            if key in existing:
+                continue
+            if key in new_docs:
+                new_docs[key]["request_count"] += r.get("count", 1)
+                continue
+            new_docs[key] = {
+                "_id": f"WO-{now.strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}",
+                "active_key": key,
+                "idempotency_key": key,
+                "machine_id": r["machine_id"],
+                "machine_name": r.get("machine_name"),
+                "production_stage": r.get("production_stage"),
+                "category": r["category"],
+                "reason": r["reason"],
+                "severity": r.get("severity", "MEDIUM"),
+                "status": "open",
+                "created_at": now,
+                "updated_at": now,
+                "last_requested_at": now,
+                "request_count": r.get("count", 1),
+            }
+
+        if new_docs:
+            try:
+                await self.collection.insert_many(list(new_docs.values()), ordered=False)
+            except Exception as e:
+                # another writer opened some of these first: theirs win
+                if not _only_duplicate_keys(e):
+                    raise
+                raced = {
+                    o["active_key"]: o
+                    async for o in self.collection.find({"active_key": {"$in": list(new_docs)}})
+                    if o["_id"] != new_docs[o["active_key"]]["_id"]
+                }
+                for key in raced:
+                    new_docs.pop(key)
+                existing.update(raced)
+
+        # repeats of already-active orders: count them, don't create
+        repeats: Dict[str, int] = {}
+        for key, r in keyed:
+            if key in existing:
+                repeats[key] = repeats.get(key, 0) + r.get("count", 1)
+        by_count: Dict[int, List[str]] = {}
+        for key, count in repeats.items():
+            by_count.setdefault(count, []).append(key)
+        for count, group in by_count.items():
+            await self.collection.update_many(
+                {"active_key": {"$in": group}},
+                {"$inc": {"request_count": count}, "$set": {"last_requested_at": now}},
+            )
+        for key, count in repeats.items():
+            existing[key]["request_count"] = existing[key].get("request_count", 0) + count
+            existing[key]["last_requested_at"] = now
+
+        results, seen_new = [], set()
+        for key, _ in keyed:
+            if key in new_docs:
+                results.append((_public(new_docs[key]), key not in seen_new))
+                seen_new.add(key)
+            else:
+                results.append((_public(existing[key]), False))
+        return results
+
+    async def transition(self, order_id: str, status: str, note: Optional[str] = None) -> Dict:
+        if status not in TRANSITIONS:
+            return {"error": f"Unknown status '{status}'", "allowed": list(TRANSITIONS)}
+        allowed_from = [s for s, targets in TRANSITIONS.items() if status in targets]
+        now = datetime.utcnow()
+        update = {"status": status, "updated_at": now}
+        if note:
+            update["note"] = note
+        if status not in ACTIVE_STATUSES:
+            # frees the idempotency key; the order id keeps the slot unique
+            update["active_key"] = f"closed:{order_id}"
+            update["closed_at"] = now
+
+        result = await self.collection.update_one({"_id": order_id, "status": {"$in": allowed_from}}, {"$set": update})
+        order = await self.collection.find_one({"_id": order_id})
+        if order is None:
+            return {"error": f"Work order {order_id} not found"}
+        if not result.matched_count:
+            return {
+                "error": f"Cannot move {order_id} from {order['status']} to {status}",
+                "allowed": sorted(TRANSITIONS[order["status"]]),
+            }
+        return _public(order)
+
+    async def list(
+        self,
+        status: Optional[List[str]] = None,
+        machine_id: Optional[str] = None,
+        stage: Optional[str] = None,
+        limit: int = 50,
+        skip: int = 0,
+    ) -> Dict:
+        """Newest first; status / machine / stage filters each hit one of the indexes above."""
+        flt: Dict = {}
+        if status:
+            flt["status"] = {"$in": status}
+        if machine_id:
+            flt["machine_id"] = machine_id
+        if stage:
+            flt["production_stage"] = stage
+        limit = max(1, min(limit, 200))
+        total = await self.collection.count_documents(flt)
+        cursor = self.collection.find(flt, LIST_PROJECTION).sort("created_at", -1).skip(skip).limit(limit)
+        orders = [_public(o) for o in await cursor.to_list(length=limit)]
+        return {"total": total, "count": len(orders), "has_more": skip + len(orders) < total, "orders": orders}
+
+
+class WorkOrderQueue:
+    """
+    Front of the store for high-frequency callers. Requests arriving within
+    `batch_window` seconds are written with one create_many; identical
+    requests in the same batch share a single result.
+    """
+
+    def __init__(self, store: WorkOrderStore, batch_window: float = 0.05, max_batch: int = 200):
+        self.store = store
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._pending: Dict[str, Tuple[Dict, asyncio.Future]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.submitted = 0
+
+    async def submit(self, request: Dict) -> Tuple[Dict, bool]:
+        self.submitted += 1
+        key = idempotency_key(request["machine_id"], request["category"])
+        if key in self._pending:
+            queued, future = self._pending[key]
+            queued["count"] = queued.get("count", 1) + 1
+            order, _ = await asyncio.shield(future)
+            return order, False
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[key] = ({**request, "count": 1}, future)
+        if len(self._pending) >= self.max_batch:
+            self._flush_now()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush_now)
+        return await asyncio.shield(future)
+
+    def _flush_now(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.ensure_future(self._flush(batch))
+
+    async def _flush(self, batch: Dict[str, Tuple[Dict, asyncio.Future]]):
+        self.batches += 1
+        items = list(batch.values())
+        try:
+            results = await self.store.create_many([request for request, _ in items])
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {"submitted": self.submitted, "batches": self.batches, "pending": len(self._pending)}
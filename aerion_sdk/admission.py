@@ -0,0 +1,172 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+
+# =========================================================
+# ✅ ADMISSION CONTROL
+# =========================================================
+
+PRIORITY_INCIDENT = 0    # operator questions about the plant
+PRIORITY_DASHBOARD = 1   # report refreshes from the frontend
+PRIORITY_BACKGROUND = 2  # scheduled snapshot jobs
+
+
+class AdmissionRejected(Exception):
+    """Queue full (or wait too long): the caller should retry after `retry_after` seconds."""
+
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        super().__init__(f"{lane}: {reason}, retry after {retry_after}s")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Lane:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.running = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_queued = 0
+        self.waits: deque = deque(maxlen=500)
+        self.service_seconds = 0.0  # EWMA of how long a slot is held
+
+    def stats(self) -> Dict:
+        waits = sorted(self.waits)
+        return {
+            "limit": self.limit,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_avg_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "wait_p95_ms": round(waits[int(0.95 * (len(waits) - 1))] * 1000, 1) if waits else 0.0,
+            "service_avg_s": round(self.service_seconds, 2),
+        }
+
+
+class AdmissionController:
+    """
+    Caps concurrent model runs per lane (endpoint) and overall.
+    Requests that cannot start wait in one bounded priority queue: a freed
+    slot goes to the most urgent waiter whose lane still has room (FIFO within
+    a priority). A full queue, or a wait longer than `queue_timeout`, is
+    rejected with a Retry-After estimate.
+    """
+
+    def __init__(self, limits: Dict[str, int], total_limit: int, max_queue: int = 32, queue_timeout: float = 30.0):
+        self.lanes = {name: _Lane(max(1, limit)) for name, limit in limits.items()}
+        self.total_limit = max(1, total_limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self._waiters: List[tuple] = []  # heap of (priority, seq, lane, future)
+        self._seq = itertools.count()
+
+    def _lane(self, name: str) -> _Lane:
+        if name not in self.lanes:
+            self.lanes[name] = _Lane(self.total_limit)
+        return self.lanes[name]
+
+    def _has_room(self, lane: _Lane) -> bool:
+        return self.running < self.total_limit and lane.running < lane.limit
+
+    def _start(self, name: str):
+        lane = self.lanes[name]
+        lane.running += 1
+        lane.admitted += 1
+        self.running += 1
+
+    def _dispatch(self):
+        """Hand freed slots to waiters, most urgent first, skipping lanes that are full."""
+        skipped = []
+        while self._waiters and self.running < self.total_limit:
+            waiter = heapq.heappop(self._waiters)
+            _, _, name, future = waiter
+            if future.done():
+                continue
+            if self._has_room(self.lanes[name]):
+                self.lanes[name].queued -= 1
+                self._start(name)
+                future.set_result(None)
+            else:
+                skipped.append(waiter)
+        for waiter in skipped:
+            heapq.heappush(self._waiters, waiter)
+
+    def retry_after(self, name: str) -> int:
+        lane = self._lane(name)
+        per_slot = lane.service_seconds or 5.0
+        ahead = len(self._waiters) + 1
+        return max(1, math.ceil(per_slot * ahead / self.total_limit))
+
+    def queued(self) -> int:
+        return sum(lane.queued for lane in self.lanes.values())
+
+    @asynccontextmanager
+    async def slot(self, name: str, priority: int = PRIORITY_DASHBOARD):
+        lane = self._lane(name)
+        started = time.perf_counter()
+
+        if not self._has_room(lane) and self.queued() >= self.max_queue:
+            lane.rejected += 1
+            raise AdmissionRejected(name, "queue full", self.retry_after(name))
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), name, future))
+        lane.queued += 1
+        lane.max_queued = max(lane.max_queued, lane.queued)
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                lane.queued -= 1
+                lane.timed_out += 1
+                raise AdmissionRejected(name, "queue wait timed out", self.retry_after(name))
+            # granted right at the deadline: keep the slot
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(name, started, record=False)
+            else:
+                future.cancel()
+                lane.queued -= 1
+            raise
+
+        lane.waits.append(time.perf_counter() - started)
+        held_from = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(name, held_from)
+
+    def _release(self, name: str, held_from: float, record: bool = True):
+        lane = self.lanes[name]
+        if record:
+            held = time.perf_counter() - held_from
+            lane.service_seconds = held if not lane.service_seconds else 0.8 * lane.service_seconds + 0.2 * held
+        lane.running -= 1
+        self.running -= 1
+        self._dispatch()
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "total_limit": self.total_limit,
+            "queued": self.queued(),
+            "max_queue": self.max_queue,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+        }
+
@@ -0,0 +1,229 @@
+"""
+Offline benchmark for the agent endpoints.
+
+Runs the SDK app in-process against the scripted fake model and a local MCP
+server backed by the in-memory Mongo stand-in. No network access needed.
+
+    cd aerion_sdk
+    python benchmarks/bench_agents.py --spawn-mcp ../aerion_mcp --requests 50 --concurrency 10
+
+Orchestrator queries differ per request (the request number is appended), so
+they measure real runs. The report endpoints have no input, so concurrent
+requests share runs; add --no-coalesce to run every request on its own.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+SDK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# =========================================================
+# ✅ PER-STAGE TIMING
+# =========================================================
+
+
+def make_stage_timer():
+    from agents.tracing.processor_interface import TracingProcessor
+    from dateutil import parser
+
+    class StageTimer(TracingProcessor):
+        """Sums span durations by span type: generation, function (tool), handoff, ..."""
+
+        def __init__(self):
+            self.stages: Dict[str, List[float]] = {}
+
+        def reset(self):
+            self.stages = {}
+
+        def on_trace_start(self, trace):
+            pass
+
+        def on_trace_end(self, trace):
+            pass
+
+        def on_span_start(self, span):
+            pass
+
+        def on_span_end(self, span):
+            if not span.started_at or not span.ended_at:
+                return
+            seconds = (parser.parse(span.ended_at) - parser.parse(span.started_at)).total_seconds()
+            self.stages.setdefault(span.span_data.type, []).append(seconds)
+
+        def summary(self) -> Dict[str, Dict[str, float]]:
+            return {
+                stage: {"count": len(d), "avg_ms": round(sum(d) / len(d) * 1000, 1), "total_s": round(sum(d), 2)}
+                for stage, d in self.stages.items()
+            }
+
+        def shutdown(self):
+            pass
+
+        def force_flush(self):
+            pass
+
+    return StageTimer()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+# =========================================================
+# ✅ LOCAL MCP SERVER (in-memory Mongo)
+# =========================================================
+
+
+def spawn_mcp(mcp_dir: str, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MONGO_URI": "memory://",
+        "CLOUDINARY_CLOUD_NAME": os.getenv("CLOUDINARY_CLOUD_NAME", "offline"),
+        "CLOUDINARY_API_KEY": os.getenv("CLOUDINARY_API_KEY", "offline"),
+        "CLOUDINARY_API_SECRET": os.getenv("CLOUDINARY_API_SECRET", "offline"),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:mcp_app", "--port", str(port), "--log-level", "warning"],
+        cwd=mcp_dir,
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return proc
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("MCP server did not start")
+
+
+# =========================================================
+# ✅ BENCHMARK
+# =========================================================
+
+
+async def drive(
+    client, method: str, path: str, body: Optional[Callable[[int], Dict]], requests: int, concurrency: int
+) -> Dict:
+    gate = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    degraded = 0
+
+    async def one(i: int):
+        nonlocal errors, degraded
+        async with gate:
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body(i) if body else None)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200 or response.json().get("status") != "success":
+                errors += 1
+            elif response.json().get("degraded"):
+                # deadline / breaker fallback: a 200 "success" with no model answer
+                degraded += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "degraded": degraded,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Offline agent endpoint benchmark")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--message", default="Please review the current state of the plant")
+    parser.add_argument("--script", default=os.path.join(BENCH_DIR, "fake_script.json"))
+    parser.add_argument("--spawn-mcp", default=None, help="path to aerion_mcp; starts it with MONGO_URI=memory://")
+    parser.add_argument("--mcp-port", type=int, default=8013)
+    parser.add_argument("--no-coalesce", action="store_true", help="run every request on its own")
+    parser.add_argument("--out", default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="aerion_bench_")
+    os.environ.update({
+        "MODEL_PROVIDER": "fake",
+        "FAKE_MODEL_SCRIPT": os.path.abspath(args.script),
+        "SCHEDULER_ENABLED": "false",
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.sqlite3"),
+        "SESSIONS_DB_PATH": os.path.join(workdir, "sessions.sqlite3"),
+        "MCP_SERVER_URL": f"http://127.0.0.1:{args.mcp_port}/mcp",
+        "RUN_COALESCING_ENABLED": "false" if args.no_coalesce else "true",
+    })
+    # the Gemini client is still constructed, but never called
+    os.environ.setdefault("GEMINI_API_KEY", "offline")
+
+    mcp_proc = spawn_mcp(os.path.abspath(args.spawn_mcp), args.mcp_port) if args.spawn_mcp else None
+
+    results = {}
+    try:
+        sys.path.insert(0, SDK_DIR)
+        os.chdir(workdir)  # trace logs land in the temp dir
+
+        import httpx
+        from agents.tracing import set_trace_processors
+        import main as sdk
+
+        timer = make_stage_timer()
+        set_trace_processors([timer])
+
+        scenarios = [
+            ("GET", "/inventory/report?fresh=true", None),
+            ("GET", "/industry/analysis-report?fresh=true", None),
+            ("POST", "/factory/orchestrator-query", lambda i: {"message": f"{args.message} (request {i})"}),
+        ]
+
+        async with sdk.lifespan(sdk.app):
+            transport = httpx.ASGITransport(app=sdk.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+                for method, path, body in scenarios:
+                    timer.reset()
+                    result = await drive(client, method, path, body, args.requests, args.concurrency)
+                    result["stages"] = timer.summary()
+                    results[path] = result
+                    print(f"📊 {method} {path}: {json.dumps(result)}")
+
+        results["_coalescing"] = sdk.run_coalescer.stats()
+        results["_model_calls"] = sdk.model.calls
+    finally:
+        if mcp_proc:
+            mcp_proc.terminate()
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    problems = [f"{path}: {r['errors']} errors, {r['degraded']} degraded"
+                for path, r in results.items() if not path.startswith("_") and (r["errors"] or r["degraded"])]
+    if not results["_model_calls"]:
+        problems.append("the model was never called")
+    if problems:
+        print("❌ Benchmark invalid: " + "; ".join(problems))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
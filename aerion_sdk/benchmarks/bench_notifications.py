@@ -0,0 +1,118 @@
+"""
+Alert burst benchmark for the WhatsApp dispatcher.
+
+Fires a burst of alerts at the in-process Twilio stand-in while a ticker
+measures event-loop lag (how long a concurrent agent run would be held up).
+Compares the dispatcher with calling a blocking client inline.
+
+    cd aerion_sdk
+    python benchmarks/bench_notifications.py --alerts 500 --recipients 5 --latency-ms 100 --failure-rate 0.1
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List
+
+SDK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SDK_DIR)
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.01) -> List[float]:
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+    return lags
+
+
+def summarize(lags: List[float]) -> Dict:
+    lags = sorted(lags) or [0.0]
+    return {
+        "loop_lag_p50_ms": round(lags[len(lags) // 2], 1),
+        "loop_lag_p99_ms": round(lags[int(0.99 * (len(lags) - 1))], 1),
+        "loop_lag_max_ms": round(lags[-1], 1),
+    }
+
+
+async def run_dispatcher(args) -> Dict:
+    import httpx
+    import fake_twilio
+    from notifications import WhatsAppDispatcher
+
+    dispatcher = WhatsAppDispatcher(
+        "ACbench", "token", "whatsapp:+14155238886",
+        api_base="http://fake-twilio",
+        workers=args.workers,
+        digest_window=args.digest_seconds,
+        backoff_base=0.05,
+        transport=httpx.ASGITransport(app=fake_twilio.app),
+    )
+    dispatcher.start()
+    stop = asyncio.Event()
+    lag_task = asyncio.ensure_future(measure_lag(stop))
+
+    started = time.perf_counter()
+    for i in range(args.alerts):
+        dispatcher.notify(f"+1555000{i % args.recipients:04d}", f"Machine M-{i % 40:02d} HIGH risk (alert {i})")
+    enqueue_ms = (time.perf_counter() - started) * 1000
+    await dispatcher.stop(drain_seconds=120)
+    total_s = time.perf_counter() - started
+
+    stop.set()
+    stats = dispatcher.stats()
+    return {
+        "mode": "dispatcher",
+        "enqueue_ms": round(enqueue_ms, 2),
+        "delivered_s": round(total_s, 2),
+        "alerts_sent": stats["alerts_sent"],
+        "messages_sent": stats["messages_sent"],
+        "retries": stats["retries"],
+        "failed": stats["failed"],
+        **summarize(await lag_task),
+    }
+
+
+async def run_blocking(args) -> Dict:
+    """Baseline: one blocking send per alert on the event loop (what a sync client does)."""
+    stop = asyncio.Event()
+    lag_task = asyncio.ensure_future(measure_lag(stop))
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    for i in range(min(args.alerts, args.blocking_sample)):
+        time.sleep(args.latency_ms / 1000)
+        await asyncio.sleep(0)
+    total_s = time.perf_counter() - started
+
+    stop.set()
+    return {
+        "mode": f"blocking ({min(args.alerts, args.blocking_sample)} alerts)",
+        "delivered_s": round(total_s, 2),
+        **summarize(await lag_task),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="WhatsApp dispatcher burst benchmark")
+    parser.add_argument("--alerts", type=int, default=500)
+    parser.add_argument("--recipients", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--digest-seconds", type=float, default=0.5)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--blocking-sample", type=int, default=30)
+    args = parser.parse_args()
+
+    import fake_twilio
+    fake_twilio.app.state.latency_ms = args.latency_ms
+    fake_twilio.app.state.failure_rate = args.failure_rate
+
+    for result in (await run_dispatcher(args), await run_blocking(args)):
+        print(result)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
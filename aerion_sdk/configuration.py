@@ -1,10 +1,16 @@
 import os
+import httpx
 from dotenv import load_dotenv
-from agents import  AsyncOpenAI, OpenAIChatCompletionsModel, SQLiteSession
+from openai import DefaultAsyncHttpxClient
+from agents import  AsyncOpenAI, OpenAIChatCompletionsModel
 from agents.run import RunConfig
-from agents.mcp import MCPServerStreamableHttp, MCPServerStreamableHttpParams
-from twilio.rest import Client
-from agents.mcp import MCPServerStreamableHttp, MCPServerStreamableHttpParams
+from agents.mcp import MCPServerStreamableHttpParams
+from mcp_pool import PooledMCPServer
+from model_cache import CompletionCache, CachedChatCompletionsModel
+from sessions import SessionManager
+from admission import AdmissionController
+from resilience import CircuitBreaker
+from notifications import WhatsAppDispatcher
 
 
 load_dotenv()
@@ -13,9 +19,19 @@ load_dotenv()
 # ======================== Model Configuration =======================
 
 gemini_api_key = os.getenv("GEMINI_API_KEY")
+MODEL_HTTP_MAX_CONNECTIONS = int(os.getenv("MODEL_HTTP_MAX_CONNECTIONS", "20"))
+
+# one pooled keep-alive client, warmed up at boot (see warmup.py)
 external_client = AsyncOpenAI(
     api_key= gemini_api_key,
     base_url= "https://generativelanguage.googleapis.com/v1beta/openai/",
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=MODEL_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=MODEL_HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=120,
+        ),
+    ),
 )
     
 model = OpenAIChatCompletionsModel(
@@ -23,29 +39,137 @@ model = OpenAIChatCompletionsModel(
     openai_client= external_client,
 )
 
+# MODEL_PROVIDER=fake swaps Gemini for a scripted offline model (benchmarks)
+MODEL_PROVIDER = os.getenv("MODEL_PROVIDER", "gemini")
+FAKE_MODEL_SCRIPT = os.getenv("FAKE_MODEL_SCRIPT", "benchmarks/fake_script.json")
+
+if MODEL_PROVIDER == "fake":
+    from fake_model import ScriptedModel, load_script
+    model = ScriptedModel(load_script(FAKE_MODEL_SCRIPT))
+    print(f"🧪 Using scripted fake model from {FAKE_MODEL_SCRIPT}")
+
 config = RunConfig(
     model= model,
     model_provider=external_client,
     
 )
 
+# ======================== LLM Completion Cache =======================
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "900"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "50"))
+
+completion_cache = CompletionCache(
+    db_path=LLM_CACHE_PATH,
+    ttl_seconds=LLM_CACHE_TTL_SECONDS,
+    max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+)
+
+
+def cached_model(agent_name: str) -> CachedChatCompletionsModel:
+    """Per-agent opt-in: pass as Agent(model=cached_model("AgentName"))."""
+    if MODEL_PROVIDER == "fake":
+        return model
+    return CachedChatCompletionsModel(
+        model="gemini-2.5-flash",
+        openai_client=external_client,
+        cache=completion_cache,
+        agent_name=agent_name,
+    )
+
+# ======================== Intent Router =======================
+
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.75"))
+
+# ======================== Report Scheduler =======================
+# interval in seconds; 0 disables a job
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULE_INVENTORY_SECONDS = float(os.getenv("SCHEDULE_INVENTORY_SECONDS", "300"))
+SCHEDULE_INDUSTRY_SECONDS = float(os.getenv("SCHEDULE_INDUSTRY_SECONDS", "600"))
+SCHEDULE_MACHINE_SECONDS = float(os.getenv("SCHEDULE_MACHINE_SECONDS", "300"))
+# snapshots older than this are not served (live run instead); 0 -> two job intervals
+SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("SNAPSHOT_MAX_AGE_SECONDS", "0"))
+
+# ======================== Admission Control =======================
+# concurrent model runs per endpoint lane and in total; the rest queue by priority
+
+ADMISSION_TOTAL_LIMIT = int(os.getenv("ADMISSION_TOTAL_LIMIT", "6"))
+ADMISSION_LANE_LIMITS = {
+    "orchestrator": int(os.getenv("ADMISSION_ORCHESTRATOR_LIMIT", "4")),
+    "inventory": int(os.getenv("ADMISSION_INVENTORY_LIMIT", "2")),
+    "industry_risk": int(os.getenv("ADMISSION_INDUSTRY_LIMIT", "2")),
+    "machine_risk": int(os.getenv("ADMISSION_MACHINE_LIMIT", "2")),
+}
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+
+admission = AdmissionController(
+    limits=ADMISSION_LANE_LIMITS,
+    total_limit=ADMISSION_TOTAL_LIMIT,
+    max_queue=ADMISSION_MAX_QUEUE,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT_SECONDS,
+)
+
+# ======================== Run Coalescing =======================
+# identical concurrent runs share one execution when they read the same data
+# version (MCP data_version tool, re-read at most every DATA_VERSION_TTL_SECONDS);
+# RUN_COALESCING_ENABLED=false runs every request on its own
+
+RUN_COALESCING_ENABLED = os.getenv("RUN_COALESCING_ENABLED", "true").lower() == "true"
+DATA_VERSION_TTL_SECONDS = float(os.getenv("DATA_VERSION_TTL_SECONDS", "2"))
+
+# ======================== Deadlines & Circuit Breaker =======================
+# past the deadline (or with the breaker open) endpoints answer from MCP data alone
+# deadlines count from admission: queueing is bounded by ADMISSION_QUEUE_TIMEOUT_SECONDS (429)
+
+DEADLINE_ORCHESTRATOR_SECONDS = float(os.getenv("DEADLINE_ORCHESTRATOR_SECONDS", "20"))
+DEADLINE_REPORT_SECONDS = float(os.getenv("DEADLINE_REPORT_SECONDS", "25"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+FALLBACK_TOOL_TIMEOUT_SECONDS = float(os.getenv("FALLBACK_TOOL_TIMEOUT_SECONDS", "5"))
+
+model_breaker = CircuitBreaker(
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=BREAKER_RESET_SECONDS,
+)
+
 # ============================== MCP & Session Configuration ===================
 
 # URL = os.getenv("BASE_URL")
 # MCP_SERVER_URL=f"{URL}/mcp"
-MCP_SERVER_URL = "http://localhost:8003/mcp"
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8003/mcp")
 mcp_params = MCPServerStreamableHttpParams(url=MCP_SERVER_URL)
 CRUD_BASE_URL=os.getenv("CRUD_BASE_URL")
-session = SQLiteSession("conversation_123")
-scheduled_session = SQLiteSession("scheduled_business_decisions")
-admin_session = SQLiteSession("admin_dashboard_session")
 
-# ====================== Shared MCP Client (async context) ====================
+SESSIONS_DB_PATH = os.getenv("SESSIONS_DB_PATH", "agent_sessions.sqlite3")
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "6000"))
+SESSION_COMPACT_ABOVE = int(os.getenv("SESSION_COMPACT_ABOVE", "12000"))
+SESSION_COMPACT_SECONDS = float(os.getenv("SESSION_COMPACT_SECONDS", "300"))
 
-mcp_client = MCPServerStreamableHttp(
+session_manager = SessionManager(
+    db_path=SESSIONS_DB_PATH,
+    token_budget=SESSION_TOKEN_BUDGET,
+    compact_above=SESSION_COMPACT_ABOVE,
+)
+session = session_manager.get("conversation_123")
+scheduled_session = session_manager.get("scheduled_business_decisions")
+admin_session = session_manager.get("admin_dashboard_session")
+
+# ====================== Shared MCP Client Pool (async context) ====================
+
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "4"))
+MCP_HEALTH_CHECK_SECONDS = float(os.getenv("MCP_HEALTH_CHECK_SECONDS", "30"))
+
+MCP_TOOLS_CACHE_PATH = os.getenv("MCP_TOOLS_CACHE_PATH", "mcp_tools_cache.json")
+
+mcp_client = PooledMCPServer(
     params=mcp_params,
     name="MySharedMCPClient",
-    cache_tools_list=True
+    pool_size=MCP_POOL_SIZE,
+    cache_tools_list=True,
+    health_check_interval=MCP_HEALTH_CHECK_SECONDS,
 )
 
 # =========================== Whatsapp Configuration ========================
@@ -54,9 +178,30 @@ mcp_client = MCPServerStreamableHttp(
 TWILIO_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_WHATSAPP = "whatsapp:+14155238886"
+TWILIO_API_BASE = os.getenv("TWILIO_API_BASE", "https://api.twilio.com")
 ADMIN_PHONE_NUMBER = os.getenv("ADMIN_PHONE_NUMBER")
 
-client = Client(TWILIO_SID, TWILIO_AUTH)
+# WHATSAPP_PROVIDER=fake sends to the in-process stand-in (fake_twilio.py)
+WHATSAPP_PROVIDER = os.getenv("WHATSAPP_PROVIDER", "twilio")
+whatsapp_transport = None
+if WHATSAPP_PROVIDER == "fake":
+    import fake_twilio
+    whatsapp_transport = httpx.ASGITransport(app=fake_twilio.app)
+    TWILIO_SID, TWILIO_AUTH = TWILIO_SID or "ACfake", TWILIO_AUTH or "fake"
+    TWILIO_API_BASE = "http://fake-twilio"
+    print("🧪 WhatsApp alerts go to the in-process Twilio stand-in")
+
+whatsapp = WhatsAppDispatcher(
+    account_sid=TWILIO_SID,
+    auth_token=TWILIO_AUTH,
+    from_number=TWILIO_WHATSAPP,
+    api_base=TWILIO_API_BASE,
+    workers=int(os.getenv("WHATSAPP_WORKERS", "2")),
+    max_queue=int(os.getenv("WHATSAPP_MAX_QUEUE", "1000")),
+    digest_window=float(os.getenv("WHATSAPP_DIGEST_SECONDS", "2")),
+    max_batch=int(os.getenv("WHATSAPP_MAX_BATCH", "10")),
+    max_attempts=int(os.getenv("WHATSAPP_MAX_ATTEMPTS", "4")),
+    transport=whatsapp_transport,
+)
 if not ADMIN_PHONE_NUMBER:
     print("⚠ WARNING: ADMIN_PHONE_NUMBER .env mein set nahi hai. Admin notifications nahi jaayengi.")
-
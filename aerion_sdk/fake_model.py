@@ -0,0 +1,139 @@
+import asyncio
+import json
+import uuid
+from typing import Any, Dict, List, Optional
+
+from agents import Model, ModelResponse, Usage
+from agents.tracing import generation_span
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+)
+
+
+# =========================================================
+# ✅ DETERMINISTIC FAKE / REPLAY MODEL (offline benchmarks)
+# =========================================================
+
+
+def load_script(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ScriptedModel(Model):
+    """
+    Replays scripted turns instead of calling an LLM.
+
+    Script format:
+        {
+          "default_latency_ms": 300,
+          "agents": {
+            "InventoryAgent": {
+              "match": "inventory monitoring agent",
+              "steps": [
+                {"tool_calls": [{"name": "check_stock_status", "arguments": {}}]},
+                {"handoff": "AutomotiveDowntimeAgent"},
+                {"output": "final text", "latency_ms": 500}
+              ]
+            }
+          }
+        }
+
+    The agent is found by matching `match` inside the system instructions.
+    The step index is the number of calls this agent already made to its own
+    tools/handoffs in the input, so the model itself stays stateless.
+    """
+
+    def __init__(self, script: Dict[str, Any], model_name: str = "scripted-fake"):
+        self.script = script
+        self.model_name = model_name
+        self.default_latency = script.get("default_latency_ms", 0) / 1000
+        self.calls = 0
+
+    def _agent_script(self, system_instructions: Optional[str]) -> Dict[str, Any]:
+        for name, agent in self.script.get("agents", {}).items():
+            if agent.get("match", name) in (system_instructions or ""):
+                return agent
+        return {"steps": [{"output": self.script.get("fallback_output", "{}")}]}
+
+    def _step_index(self, input: Any, own_tools: set) -> int:
+        if isinstance(input, str):
+            return 0
+        return sum(
+            1 for item in input
+            if isinstance(item, dict) and item.get("type") == "function_call" and item.get("name") in own_tools
+        )
+
+    def _build_output(self, step: Dict[str, Any], handoffs: List[Any]) -> List[Any]:
+        if "output" in step:
+            text = step["output"] if isinstance(step["output"], str) else json.dumps(step["output"])
+            return [ResponseOutputMessage(
+                id=f"msg_{uuid.uuid4().hex[:12]}",
+                type="message",
+                role="assistant",
+                status="completed",
+                content=[ResponseOutputText(type="output_text", text=text, annotations=[])],
+            )]
+
+        calls = list(step.get("tool_calls", []))
+        if "handoff" in step:
+            target = next(h for h in handoffs if h.agent_name == step["handoff"])
+            calls.append({"name": target.tool_name, "arguments": {}})
+
+        return [
+            ResponseFunctionToolCall(
+                id=f"fc_{uuid.uuid4().hex[:12]}",
+                call_id=f"call_{uuid.uuid4().hex[:12]}",
+                type="function_call",
+                name=call["name"],
+                arguments=json.dumps(call.get("arguments", {})),
+            )
+            for call in calls
+        ]
+
+    async def _respond(self, system_instructions, input, tools, handoffs) -> ModelResponse:
+        self.calls += 1
+        agent = self._agent_script(system_instructions)
+        own_tools = {t.name for t in tools} | {h.tool_name for h in handoffs}
+        steps = agent["steps"]
+        step = steps[min(self._step_index(input, own_tools), len(steps) - 1)]
+
+        with generation_span(model=self.model_name) as span:
+            await asyncio.sleep(step.get("latency_ms", self.default_latency * 1000) / 1000)
+            output = self._build_output(step, handoffs)
+            input_tokens = len(json.dumps(input, default=str)) // 4
+            output_tokens = len(json.dumps([o.model_dump() for o in output])) // 4
+            usage = Usage(
+                requests=1,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                total_tokens=input_tokens + output_tokens,
+            )
+            span.span_data.usage = {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens}
+
+        return ModelResponse(output=output, usage=usage, response_id=None)
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs):
+        return await self._respond(system_instructions, input, tools, handoffs)
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs):
+        response = await self._respond(system_instructions, input, tools, handoffs)
+        yield ResponseCompletedEvent(
+            type="response.completed",
+            sequence_number=0,
+            response=Response(
+                id=f"resp_{uuid.uuid4().hex[:12]}",
+                created_at=0,
+                model=self.model_name,
+                object="response",
+                output=response.output,
+                tool_choice="auto",
+                tools=[],
+                top_p=None,
+                parallel_tool_calls=False,
+            ),
+        )
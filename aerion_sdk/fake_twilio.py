@@ -0,0 +1,74 @@
+import asyncio
+import os
+import random
+import uuid
+from datetime import datetime
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+# =========================================================
+# ✅ LOCAL TWILIO STAND-IN (WhatsApp Messages API)
+# =========================================================
+#
+# Accepts the same POST the dispatcher sends to Twilio and records it.
+# FAKE_TWILIO_LATENCY_MS and FAKE_TWILIO_FAILURE_RATE simulate a slow or
+# flaky provider (failures alternate 503 / 429 with Retry-After).
+#
+#   python fake_twilio.py            -> http://127.0.0.1:8099
+#   TWILIO_API_BASE=http://127.0.0.1:8099  (or WHATSAPP_PROVIDER=fake in-process)
+
+app = FastAPI(title="Fake Twilio")
+
+app.state.latency_ms = float(os.getenv("FAKE_TWILIO_LATENCY_MS", "50"))
+app.state.failure_rate = float(os.getenv("FAKE_TWILIO_FAILURE_RATE", "0"))
+app.state.messages = []
+app.state.failures = 0
+
+
+@app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+async def create_message(account_sid: str, request: Request):
+    form = {k: v[0] for k, v in parse_qs((await request.body()).decode()).items()}
+    await asyncio.sleep(app.state.latency_ms / 1000)
+
+    missing = [k for k in ("From", "To", "Body") if not form.get(k)]
+    if missing:
+        return JSONResponse(status_code=400, content={"code": 21604, "message": f"Missing {', '.join(missing)}"})
+
+    if random.random() < app.state.failure_rate:
+        app.state.failures += 1
+        if app.state.failures % 2:
+            return JSONResponse(status_code=503, content={"code": 20503, "message": "Service unavailable"})
+        return JSONResponse(status_code=429, headers={"Retry-After": "1"},
+                            content={"code": 20429, "message": "Too many requests"})
+
+    message = {
+        "sid": f"SM{uuid.uuid4().hex}",
+        "account_sid": account_sid,
+        "from": form["From"],
+        "to": form["To"],
+        "body": form["Body"],
+        "status": "queued",
+        "date_created": datetime.utcnow().isoformat(),
+    }
+    app.state.messages.append(message)
+    return JSONResponse(status_code=201, content=message)
+
+
+@app.get("/messages")
+async def list_messages():
+    return {"count": len(app.state.messages), "failures": app.state.failures, "messages": app.state.messages}
+
+
+@app.delete("/messages")
+async def reset_messages():
+    app.state.messages = []
+    app.state.failures = 0
+    return {"status": "success"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("FAKE_TWILIO_PORT", "8099")))
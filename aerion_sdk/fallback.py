@@ -0,0 +1,109 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+# =========================================================
+# ✅ DETERMINISTIC (DEGRADED) REPORTS
+# =========================================================
+
+REASONS = {
+    "deadline": "the AI analysis did not finish in time",
+    "circuit_open": "the AI model is temporarily unavailable",
+    "error": "the AI analysis failed",
+}
+
+
+class FallbackReporter:
+    """
+    Reports built straight from MCP tool output, no model involved.
+    Same data in -> same text out, and bounded by `tool_timeout` per tool.
+    """
+
+    def __init__(self, mcp_server, tool_timeout: float = 5.0):
+        self.mcp_server = mcp_server
+        self.tool_timeout = tool_timeout
+
+    async def _tool(self, name: str, arguments: Optional[Dict] = None) -> Optional[Dict]:
+        try:
+            result = await asyncio.wait_for(
+                self.mcp_server.call_tool(name, arguments or {}), timeout=self.tool_timeout
+            )
+            if getattr(result, "isError", False) or not result.content:
+                return None
+            return json.loads(result.content[0].text)
+        except Exception as e:
+            print(f"⚠️ Fallback tool {name} failed: {e}")
+            return None
+
+    async def _data(self) -> Dict[str, Optional[Dict]]:
+        machines, stock = await asyncio.gather(
+            self._tool("analyze_machine_risk", {"fields": ["machine_id", "machine_name", "risk", "reasons", "status"]}),
+            self._tool("check_stock_status", {"fields": ["name", "stock"]}),
+        )
+        return {"machines": machines, "stock": stock}
+
+    # ------------------ sections ------------------
+
+    @staticmethod
+    def _header(title: str, reason: str) -> List[str]:
+        return [
+            f"# {title} (degraded)",
+            f"⚠️ Automatic summary from live plant data: {REASONS.get(reason, reason)}.",
+            f"Generated at {datetime.utcnow().strftime('%Y-%m-%d %H:%M')} UTC.",
+            "",
+        ]
+
+    @staticmethod
+    def _machine_section(machines: Optional[Dict]) -> List[str]:
+        if machines is None:
+            return ["## Machines", "Machine data unavailable.", ""]
+        lines = ["## Machines at risk"]
+        for m in machines.get("machines", []):
+            reasons = ", ".join(m.get("reasons") or []) or "no rule triggered"
+            lines.append(f"- **{m.get('risk')}** {m.get('machine_id')} {m.get('machine_name')} "
+                         f"({m.get('status')}): {reasons}")
+        if len(lines) == 1:
+            lines.append("- No machine above LOW risk.")
+        lines.append(f"- LOW risk machines: {machines.get('low_risk_count', 0)}")
+        return lines + [""]
+
+    @staticmethod
+    def _stock_section(stock: Optional[Dict]) -> List[str]:
+        if stock is None:
+            return ["## Inventory", "Inventory data unavailable.", ""]
+        lines = ["## Inventory"]
+        low = stock.get("low_stock", [])
+        over = stock.get("over_stock", [])
+        lines.append(f"- Low stock ({len(low)}): " + (", ".join(f"{p['name']} ({p['stock']})" for p in low) or "none"))
+        lines.append(f"- Over stock ({len(over)}): " + (", ".join(f"{p['name']} ({p['stock']})" for p in over) or "none"))
+        lines.append(f"- Normal: {stock.get('normal_count', 0)} products")
+        return lines + [""]
+
+    # ------------------ reports ------------------
+
+    async def inventory_report(self, reason: str) -> str:
+        data = await self._data()
+        return "\n".join(self._header("Inventory report", reason) + self._stock_section(data["stock"]))
+
+    async def industry_report(self, reason: str) -> str:
+        data = await self._data()
+        return "\n".join(
+            self._header("Industry risk report", reason)
+            + self._machine_section(data["machines"])
+            + self._stock_section(data["stock"])
+        )
+
+    async def machine_risk_report(self, reason: str) -> str:
+        data = await self._data()
+        return "\n".join(self._header("Machine risk report", reason) + self._machine_section(data["machines"]))
+
+    async def orchestrator_reply(self, reason: str) -> str:
+        data = await self._data()
+        return "\n".join(
+            self._header("Factory status", reason)
+            + self._machine_section(data["machines"])
+            + self._stock_section(data["stock"])
+            + ["Ask again shortly for a full analysis of your question."]
+        )
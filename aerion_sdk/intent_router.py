@@ -0,0 +1,113 @@
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+# =========================================================
+# ✅ RULE-BASED INTENT ROUTER
+# =========================================================
+
+# intent -> [(pattern, weight)]; weights are independent evidence in [0, 1]
+INTENT_RULES: Dict[str, List[Tuple[str, float]]] = {
+    "downtime": [
+        (r"\boverheat\w*|\bover[- ]heat\w*", 0.9),
+        (r"\bvibrat\w*", 0.9),
+        (r"\bdown ?time\b", 0.9),
+        (r"\bmachine\w* (?:has )?(?:stop|stopp)\w*|\bstopp?ed\b", 0.8),
+        (r"\bbreak ?down\b|\bfail(?:ure|ed|ing)?\b", 0.7),
+        (r"\btemperature\b|\bhot\b", 0.5),
+        (r"\bmaintenance\b|\brepair\b", 0.5),
+        (r"\bmachine\w*\b|\b[A-Z]{3}-\d{2}\b", 0.3),
+    ],
+}
+
+INTENT_AGENTS = {
+    "downtime": "AutomotiveDowntimeAgent",
+}
+
+
+class RouteDecision:
+    def __init__(self, intent: Optional[str], agent_name: Optional[str], confidence: float, matched: List[str]):
+        self.intent = intent
+        self.agent_name = agent_name
+        self.confidence = confidence
+        self.matched = matched
+
+    def to_dict(self) -> Dict:
+        return {
+            "intent": self.intent,
+            "agent": self.agent_name,
+            "confidence": self.confidence,
+            "matched": self.matched,
+        }
+
+
+class IntentRouter:
+    """
+    Routes recognised intents straight to a specialist agent, skipping the
+    orchestrator LLM hop. Below `threshold` the caller falls back to the orchestrator.
+    """
+
+    def __init__(self, threshold: float = 0.75):
+        self.threshold = threshold
+        self._rules = {
+            intent: [(re.compile(p, re.IGNORECASE), w) for p, w in rules]
+            for intent, rules in INTENT_RULES.items()
+        }
+        self.decisions = {"direct": 0, "fallback": 0}
+        self.per_intent: Dict[str, int] = {}
+        self.confidence_total = 0.0
+        # observed end-to-end run times per path, used to estimate time saved
+        self._durations = {"direct": [0, 0.0], "fallback": [0, 0.0]}
+
+    def classify(self, message: str) -> RouteDecision:
+        best = RouteDecision(None, None, 0.0, [])
+        for intent, rules in self._rules.items():
+            miss = 1.0
+            matched = []
+            for pattern, weight in rules:
+                hit = pattern.search(message)
+                if hit:
+                    miss *= 1.0 - weight
+                    matched.append(hit.group(0))
+            confidence = round(1.0 - miss, 3)
+            if confidence > best.confidence:
+                best = RouteDecision(intent, INTENT_AGENTS[intent], confidence, matched)
+        return best
+
+    def route(self, message: str) -> Tuple[RouteDecision, bool]:
+        decision = self.classify(message)
+        direct = decision.agent_name is not None and decision.confidence >= self.threshold
+
+        path = "direct" if direct else "fallback"
+        self.decisions[path] += 1
+        self.confidence_total += decision.confidence
+        if direct:
+            self.per_intent[decision.intent] = self.per_intent.get(decision.intent, 0) + 1
+
+        print(f"🧭 Router → {decision.agent_name if direct else 'FactoryOrchestratorAgent'} "
+              f"(confidence {decision.confidence}, matched {decision.matched})")
+        return decision, direct
+
+    def record_duration(self, direct: bool, started_at: float):
+        bucket = self._durations["direct" if direct else "fallback"]
+        bucket[0] += 1
+        bucket[1] += time.perf_counter() - started_at
+
+    def stats(self) -> Dict:
+        total = self.decisions["direct"] + self.decisions["fallback"]
+        direct_n, direct_s = self._durations["direct"]
+        fallback_n, fallback_s = self._durations["fallback"]
+
+        saved_per_run = None
+        if direct_n and fallback_n:
+            saved_per_run = round(fallback_s / fallback_n - direct_s / direct_n, 3)
+
+        return {
+            "threshold": self.threshold,
+            "decisions": self.decisions,
+            "per_intent": self.per_intent,
+            "avg_confidence": round(self.confidence_total / total, 3) if total else 0.0,
+            "avg_seconds_saved_per_direct_run": saved_per_run,
+            "est_seconds_saved_total": round(saved_per_run * direct_n, 3) if saved_per_run is not None else None,
+        }
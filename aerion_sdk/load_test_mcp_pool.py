@@ -0,0 +1,71 @@
+"""
+Load test for the pooled MCP client.
+
+Start the MCP server first (aerion_mcp: `python server.py`, port 8003), then:
+
+    python load_test_mcp_pool.py --calls 200 --concurrency 20 --pool-sizes 1 4 8
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from agents.mcp import MCPServerStreamableHttpParams
+from mcp_pool import PooledMCPServer
+
+
+async def run_load(url: str, pool_size: int, calls: int, concurrency: int, tool: str) -> dict:
+    pool = PooledMCPServer(
+        params=MCPServerStreamableHttpParams(url=url),
+        name=f"LoadTestPool{pool_size}",
+        pool_size=pool_size,
+    )
+    await pool.connect()
+
+    latencies = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one_call():
+        nonlocal errors
+        async with gate:
+            started = time.perf_counter()
+            try:
+                await pool.call_tool(tool, {})
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_call() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    stats = pool.pool_stats()
+    await pool.cleanup()
+
+    latencies.sort()
+    return {
+        "pool_size": pool_size,
+        "throughput_rps": round(calls / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "errors": errors,
+        "avg_checkout_wait_ms": round(stats["wait_seconds_total"] / max(1, stats["checkouts"]) * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="MCP pool load test")
+    parser.add_argument("--url", default="http://localhost:8003/mcp")
+    parser.add_argument("--tool", default="analyze_machine_risk")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    for size in args.pool_sizes:
+        result = await run_load(args.url, size, args.calls, args.concurrency, args.tool)
+        print(f"📊 {result}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,34 @@
 import os
+import asyncio
 import threading, json
-from contextlib import asynccontextmanager
+import sqlite3
+import httpx
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
-from typing import List,Dict, Any, Optional
+from typing import List,Dict, Any, Optional, Tuple
 import re
-from fastapi import FastAPI
+import time
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-from agents import Agent, Runner
-from configuration import mcp_client
+from agents import Agent, Runner, function_tool
+from configuration import (
+    mcp_client, model, cached_model, completion_cache, ROUTER_CONFIDENCE_THRESHOLD,
+    SCHEDULER_ENABLED, SCHEDULE_INVENTORY_SECONDS, SCHEDULE_INDUSTRY_SECONDS, SCHEDULE_MACHINE_SECONDS, SNAPSHOT_MAX_AGE_SECONDS,
+    session_manager, SESSION_COMPACT_SECONDS,
+    external_client, MODEL_PROVIDER, MCP_TOOLS_CACHE_PATH, admission,
+    model_breaker, RUN_COALESCING_ENABLED, DATA_VERSION_TTL_SECONDS, DEADLINE_ORCHESTRATOR_SECONDS, DEADLINE_REPORT_SECONDS, FALLBACK_TOOL_TIMEOUT_SECONDS,
+    whatsapp, ADMIN_PHONE_NUMBER, CRUD_BASE_URL,
+)
+from admission import AdmissionRejected, PRIORITY_BACKGROUND, PRIORITY_DASHBOARD, PRIORITY_INCIDENT
+from resilience import DeadlineGuard
+from fallback import FallbackReporter
+from intent_router import IntentRouter
+from scheduler import ReportScheduler
+from warmup import Warmup
 from agents.tracing import add_trace_processor
 from agents.tracing.processor_interface import TracingProcessor
 from pydantic import BaseModel
@@ -74,7 +94,7 @@ class FileTracingProcessor(TracingProcessor):
     def _write_json(self, data: Dict):
         """Thread-safe JSON logging"""
         data["timestamp"] = datetime.now().isoformat()
-        data["trace_id"] = self.current_trace_id
+        data.setdefault("trace_id", self.current_trace_id)
         
         with self.lock:
             with open(self.json_path, "a", encoding="utf-8") as f:
@@ -109,6 +129,18 @@ class FileTracingProcessor(TracingProcessor):
                 print(f"⚠️ Duration error: {e}")
             return 0.0
     
+    def _duration_ms(self, span) -> float:
+        """Millisecond-precision span duration (tool calls are often < 10ms)"""
+        try:
+            from dateutil import parser
+            started_at = self._safe_getattr(span, 'started_at')
+            ended_at = self._safe_getattr(span, 'ended_at')
+            if not started_at or not ended_at:
+                return 0.0
+            return round((parser.parse(ended_at) - parser.parse(started_at)).total_seconds() * 1000, 2)
+        except Exception:
+            return 0.0
+    
     def _safe_getattr(self, obj, attr_name, default=None):
         """Safely get attribute (works with properties too)"""
         try:
@@ -440,6 +472,14 @@ class FileTracingProcessor(TracingProcessor):
             }
             self.generation_spans.append(gen_data)
             
+            self._write_json({
+                "event": "generation",
+                "trace_id": self._safe_getattr(span, 'trace_id', self.current_trace_id),
+                "agent": self.current_agent,
+                "tool_decision": tool_decision,
+                **gen_data,
+            })
+            
             trigger = self._extract_user_trigger(raw_input)
             if trigger:
                 self._write_readable(f"\n📥 USER: {trigger}\n")
@@ -515,6 +555,11 @@ class FileTracingProcessor(TracingProcessor):
                 'context_size': len(str(context)) if context else 0
             }
             self.handoffs.append(handoff_data)
+            self._write_json({
+                "event": "handoff",
+                "trace_id": self._safe_getattr(span, 'trace_id', self.current_trace_id),
+                **handoff_data,
+            })
             
             self.autonomous_decisions.append({
                 'type': 'HANDOFF',
@@ -539,6 +584,33 @@ class FileTracingProcessor(TracingProcessor):
             
             self._write_readable(output)
         
+        elif span_type == "FunctionSpanData":
+            tool_name = self._safe_getattr(span_data, 'name', 'unknown')
+            raw_args = self._safe_getattr(span_data, 'input')
+            tool_output = self._safe_getattr(span_data, 'output')
+            mcp_data = self._safe_getattr(span_data, 'mcp_data') or {}
+            
+            try:
+                arguments = json.loads(raw_args) if raw_args else {}
+            except (TypeError, json.JSONDecodeError):
+                arguments = {"raw": str(raw_args)[:500]}
+            
+            tool_call = {
+                'tool': tool_name,
+                'server': mcp_data.get('server'),
+                'arguments': arguments,
+                'duration_ms': self._duration_ms(span),
+                'output_chars': len(str(tool_output)) if tool_output is not None else 0,
+                'error': bool(self._safe_getattr(span, 'error')),
+            }
+            self.tool_calls.append(tool_call)
+            self._write_json({
+                "event": "tool_call",
+                "trace_id": self._safe_getattr(span, 'trace_id', self.current_trace_id),
+                "agent": self.current_agent,
+                **tool_call,
+            })
+        
         elif span_type == "MCPListToolsSpanData":
             server = self._safe_getattr(span_data, 'server', 'unknown')
             result = self._safe_getattr(span_data, 'result', [])
@@ -603,15 +675,26 @@ async def lifespan(app: FastAPI):
         await mcp_client.connect()
         print("✅ MCP connected!")
     except Exception as e:
+        # failed sessions keep reconnecting in the background
         print(f"❌ MCP connection failed: {e}")
+
+    warmup_task = asyncio.ensure_future(warmup.run())
+
+    if SCHEDULER_ENABLED:
+        report_scheduler.start()
+    session_manager.start(compact_interval=SESSION_COMPACT_SECONDS)
+    whatsapp.start()
      
     yield
 
+    warmup_task.cancel()
+    await report_scheduler.stop()
+    await session_manager.stop()
+    await whatsapp.stop()
 
     try:
-        if hasattr(mcp_client, "disconnect"):
-            await mcp_client.disconnect()
-            print("🔌 MCP disconnected")
+        await mcp_client.cleanup()
+        print("🔌 MCP disconnected")
     except:
         pass
 
@@ -631,12 +714,52 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    print(f"🚦 Rejected {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={"status": "error", "message": f"Service busy ({exc.reason})", "retry_after": exc.retry_after},
+    )
+
+
 # =========================================================
 # ✅ TWILIO CLIENT
 # =========================================================
 
+async def dedup_alert(kind: str, subject: str, severity: str, message: str) -> Dict:
+    """Ask the MCP alert deduplicator whether to send; if it can't be reached, send."""
+    try:
+        result = await asyncio.wait_for(
+            mcp_client.call_tool("check_alert", {"kind": kind, "subject": subject, "severity": severity, "message": message}),
+            timeout=FALLBACK_TOOL_TIMEOUT_SECONDS,
+        )
+        return json.loads(result.content[0].text)
+    except Exception as e:
+        print(f"⚠️ Alert dedup unavailable, sending anyway: {e}")
+        return {"decision": "new"}
+
+
+@function_tool
+async def notify_admin(machine_id: str, severity: str, message: str) -> str:
+    """
+    Send a short WhatsApp alert to the plant admin about one machine
+    (severity HIGH or CRITICAL). Repeats of an alert already sent are
+    suppressed. Returns immediately; alerts are batched.
+    """
+    if not whatsapp.enabled:
+        return "WhatsApp alerts are not configured; include the alert in your answer instead."
+    alert = await dedup_alert("admin", machine_id, severity, message)
+    if alert.get("decision") == "suppressed":
+        return f"Already reported to the admin (last sent {alert.get('last_sent_at')}); no new alert sent."
+    whatsapp.notify(ADMIN_PHONE_NUMBER, message)
+    return "Alert queued for the admin."
+
+
 class OrchestratorQuery(BaseModel):
     message: str
+    operator_id: Optional[str] = None
 
 
 
@@ -679,6 +802,7 @@ Steps:
 DO NOT send messages.
 ONLY return JSON.
 """,
+    model=cached_model("InventoryAgent"),
     mcp_servers=[mcp_client],
 )
 
@@ -700,6 +824,7 @@ Return STRICT JSON:
   "suppliers": []
 }
 """,
+    model=cached_model("IndustryRiskAgent"),
     mcp_servers=[mcp_client]
 )
 
@@ -716,9 +841,17 @@ Analyze:
 - downtime
 - machine failure
 
+Use analyze_downtime for MTBF, MTTR, availability and recurring failure reasons
+instead of estimating them.
+
 Provide maintenance advice and risk assessment.
+If a machine is DOWN or at HIGH risk, call notify_admin with its machine_id,
+severity (CRITICAL if DOWN, else HIGH) and a one-line alert. Do not retry
+an alert reported as already sent.
 """,
+    model=model,
     mcp_servers=[mcp_client],
+    tools=[notify_admin],
 )
 
 orchestrator_agent = Agent(
@@ -736,43 +869,231 @@ Delegate to AutomotiveDowntimeAgent.
 
 Return final professional response.
 """,
+    model=model,
     handoffs=[automotive_downtime_agent],
 )
 
 
-async def run_orchestrator_query(user_message: str) -> str:
-    try:
-        print("🧠 Orchestrator processing:", user_message)
+warmup = Warmup(
+    mcp_server=mcp_client,
+    agents=[inventory_agent, industry_risk_agent, automotive_downtime_agent, orchestrator_agent],
+    tools_cache_path=MCP_TOOLS_CACHE_PATH,
+    model_client=None if MODEL_PROVIDER == "fake" else external_client,
+)
+
+
+# =========================================================
+# ✅ SINGLE-FLIGHT RUN COALESCING
+# =========================================================
+
+
+class DataVersion:
+    """
+    Version stamp of the plant data from the MCP `data_version` tool, cached
+    for `ttl` seconds. When the tool can't be reached the last stamp is kept.
+    """
+
+    def __init__(self, mcp_server, ttl: float = 2.0, timeout: float = 2.0):
+        self.mcp_server = mcp_server
+        self.ttl = ttl
+        self.timeout = timeout
+        self.value = "unknown"
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def current(self) -> str:
+        async with self._lock:
+            if time.monotonic() - self._fetched_at < self.ttl:
+                return self.value
+            try:
+                result = await asyncio.wait_for(self.mcp_server.call_tool("data_version", {}), timeout=self.timeout)
+                self.value = json.loads(result.content[0].text)["version"]
+            except Exception as e:
+                print(f"⚠️ data_version unavailable, keeping {self.value}: {e}")
+            self._fetched_at = time.monotonic()
+            return self.value
+
+
+class RunCoalescer:
+    """
+    Shares one in-flight Runner.run between identical concurrent requests.
+    Key = (agent name, input, data version): a run started after the data
+    changed never joins one that read the old data.
+    Only the run that actually executes takes an admission slot in `lane`;
+    once every caller has given up on it (deadline, disconnect) the run is
+    cancelled, which frees that slot.
+    """
+
+    def __init__(self, admission=None, versions: Optional[DataVersion] = None, enabled: bool = True):
+        self.admission = admission
+        self.versions = versions
+        self.enabled = enabled
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self._admitted: Dict[tuple, List[asyncio.Event]] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def _key(self, agent: Agent, run_input: Any, data_version: str, session: Any) -> tuple:
+        session_id = getattr(session, "session_id", None)
+        return (agent.name, json.dumps(run_input, sort_keys=True, default=str), data_version, session_id)
+
+    def _mark_admitted(self, key: tuple):
+        for event in self._admitted.pop(key, []):
+            event.set()
+
+    def _finished(self, key: tuple, task: asyncio.Task):
+        # a run cancelled for lack of callers may already have been replaced under its key
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._mark_admitted(key)
+
+    async def _execute(self, key: tuple, agent: Agent, run_input: Any, lane: Optional[str], priority: int, kwargs: Dict):
+        if self.admission is None or lane is None:
+            self._mark_admitted(key)
+            return await Runner.run(agent, run_input, **kwargs)
+        async with self.admission.slot(lane, priority):
+            self._mark_admitted(key)
+            return await Runner.run(agent, run_input, **kwargs)
+
+    async def run(
+        self,
+        agent: Agent,
+        run_input: Any,
+        data_version: Optional[str] = None,
+        lane: Optional[str] = None,
+        priority: int = PRIORITY_DASHBOARD,
+        admitted: Optional[asyncio.Event] = None,
+        **kwargs,
+    ):
+        """`admitted` is set once the (shared) run holds its admission slot."""
+        if not self.enabled:
+            self.executed += 1
+            key = ("uncoalesced", id(run_input), time.monotonic())
+            self._admitted[key] = [admitted] if admitted is not None else []
+            return await self._execute(key, agent, run_input, lane, priority, kwargs)
+        if data_version is None:
+            data_version = await self.versions.current() if self.versions else "live"
+        key = self._key(agent, run_input, data_version, kwargs.get("session"))
+        task = self._inflight.get(key)
+
+        if task is not None:
+            self.coalesced += 1
+            print(f"🔗 Coalesced run for {agent.name} ({len(self._inflight)} in flight)")
+        else:
+            self.executed += 1
+            self._admitted[key] = []
+            task = asyncio.ensure_future(self._execute(key, agent, run_input, lane, priority, kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finished(k, t))
+
+        if admitted is not None:
+            if key in self._admitted:
+                self._admitted[key].append(admitted)
+            else:
+                admitted.set()
+
+        # shield: one caller disconnecting must not cancel the shared run ...
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # ... but the last one leaving does: stop it and free its slot
+                    self._inflight.pop(key, None)
+                    self._admitted.pop(key, None)
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "data_version": self.versions.value if self.versions else "live",
+        }
+
+
+run_coalescer = RunCoalescer(
+    admission,
+    DataVersion(mcp_client, ttl=DATA_VERSION_TTL_SECONDS, timeout=FALLBACK_TOOL_TIMEOUT_SECONDS),
+    enabled=RUN_COALESCING_ENABLED,
+)
+deadline_guard = DeadlineGuard(model_breaker, passthrough=(AdmissionRejected,))
+fallback_reporter = FallbackReporter(mcp_client, tool_timeout=FALLBACK_TOOL_TIMEOUT_SECONDS)
+intent_router = IntentRouter(threshold=ROUTER_CONFIDENCE_THRESHOLD)
+
+SPECIALIST_AGENTS = {
+    automotive_downtime_agent.name: automotive_downtime_agent,
+}
+
+
+def orchestrator_input(user_message: str, operator_id: Optional[str]):
+    """Per-operator runs keep bounded history; anonymous runs stay stateless."""
+    if operator_id:
+        return user_message, {"session": session_manager.for_operator(operator_id)}
+    return [{"role": "user", "content": user_message}], {}
 
-        result = await Runner.run(
-            orchestrator_agent,
-            [{"role": "user", "content": user_message}],
-        )
 
-        if hasattr(result, "final_output") and result.final_output:
-            return result.final_output
+async def _orchestrator_answer(user_message: str, operator_id: Optional[str], admitted: Optional[asyncio.Event] = None) -> str:
+    decision, direct = intent_router.route(user_message)
+    agent = SPECIALIST_AGENTS[decision.agent_name] if direct else orchestrator_agent
+    run_input, run_kwargs = orchestrator_input(user_message, operator_id)
 
-        if isinstance(result, str):
-            return result
+    started_at = time.perf_counter()
+    result = await run_coalescer.run(
+        agent, run_input, lane="orchestrator", priority=PRIORITY_INCIDENT, admitted=admitted, **run_kwargs
+    )
+    intent_router.record_duration(direct, started_at)
 
-        return "Analysis completed. No critical issues detected."
+    if hasattr(result, "final_output") and result.final_output:
+        return result.final_output
 
+    if isinstance(result, str):
+        return result
+
+    return "Analysis completed. No critical issues detected."
+
+
+async def run_orchestrator_query(user_message: str, operator_id: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """-> (reply, degraded reason or None)."""
+    try:
+        print("🧠 Orchestrator processing:", user_message)
+        return await deadline_guard.run(
+            "orchestrator",
+            lambda admitted: _orchestrator_answer(user_message, operator_id, admitted),
+            fallback_reporter.orchestrator_reply,
+            DEADLINE_ORCHESTRATOR_SECONDS,
+        )
+
+    except AdmissionRejected:
+        raise
     except Exception as e:
         print("❌ Orchestrator error:", e)
-        return "System error while analyzing factory data."
+        return "System error while analyzing factory data.", "error"
+
+
+def degraded_fields(reason: Optional[str]) -> Dict:
+    return {"degraded": True, "degraded_reason": reason} if reason else {}
 
 
 @app.post("/factory/orchestrator-query")
 async def factory_orchestrator_api(payload: OrchestratorQuery):
     try:
-        reply = await run_orchestrator_query(payload.message)
+        reply, degraded = await run_orchestrator_query(payload.message, payload.operator_id)
 
         return {
             "status": "success",
             "response": reply,
-            "checked_at": datetime.utcnow().isoformat()
+            "checked_at": datetime.utcnow().isoformat(),
+            **degraded_fields(degraded),
         }
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
         return {
             "status": "error",
@@ -787,20 +1108,81 @@ async def factory_orchestrator_api(payload: OrchestratorQuery):
 # =========================================================
 
      
+INVENTORY_PROMPT = "Generate latest inventory report"
+INDUSTRY_PROMPT = "Generate full industry risk report"
+MACHINE_RISK_PROMPT = "Assess current risk for every machine in the plant"
+
+
+async def produce_inventory_report(priority: int = PRIORITY_DASHBOARD, admitted: Optional[asyncio.Event] = None):
+    result = await run_coalescer.run(
+        inventory_agent, INVENTORY_PROMPT, lane="inventory", priority=priority, admitted=admitted
+    )
+    return result.final_output
+
+
+async def produce_industry_report(priority: int = PRIORITY_DASHBOARD, admitted: Optional[asyncio.Event] = None):
+    result = await run_coalescer.run(
+        industry_risk_agent, INDUSTRY_PROMPT, lane="industry_risk", priority=priority, admitted=admitted
+    )
+    return result.final_output
+
+
+async def produce_machine_risk_report(priority: int = PRIORITY_DASHBOARD, admitted: Optional[asyncio.Event] = None):
+    result = await run_coalescer.run(
+        automotive_downtime_agent, MACHINE_RISK_PROMPT, lane="machine_risk", priority=priority, admitted=admitted
+    )
+    return result.final_output
+
+
+# once admitted, dashboards wait at most DEADLINE_REPORT_SECONDS for the model; scheduled jobs are not guarded
+async def guarded_report(name: str, produce, fallback) -> Tuple[str, Optional[str]]:
+    return await deadline_guard.run(name, produce, fallback, DEADLINE_REPORT_SECONDS)
+
+
+# scheduled refreshes queue behind operators and dashboards
+report_scheduler = ReportScheduler()
+report_scheduler.add_job("inventory", SCHEDULE_INVENTORY_SECONDS,
+                         lambda: produce_inventory_report(PRIORITY_BACKGROUND), SNAPSHOT_MAX_AGE_SECONDS)
+report_scheduler.add_job("industry_risk", SCHEDULE_INDUSTRY_SECONDS,
+                         lambda: produce_industry_report(PRIORITY_BACKGROUND), SNAPSHOT_MAX_AGE_SECONDS)
+report_scheduler.add_job("machine_risk", SCHEDULE_MACHINE_SECONDS,
+                         lambda: produce_machine_risk_report(PRIORITY_BACKGROUND), SNAPSHOT_MAX_AGE_SECONDS)
+
+
+def latest_snapshot(name: str, response: Response, fresh: bool) -> Optional[Dict]:
+    """Latest scheduled snapshot, with Age headers set; None (missing or too old) -> compute on demand."""
+    if fresh:
+        return None
+    snapshot = report_scheduler.latest(name)
+    if snapshot is None:
+        return None
+    response.headers["Age"] = str(report_scheduler.age_seconds(name))
+    response.headers["X-Snapshot-Generated-At"] = snapshot["generated_at"].isoformat()
+    return snapshot
+
+     
 @app.get("/inventory/report")
-async def get_inventory_report():
+async def get_inventory_report(response: Response, fresh: bool = False):
     try:
         print("📦 Inventory report requested from frontend")
 
-        result = await Runner.run(
-            inventory_agent,
-            "Generate latest inventory report",
+        snapshot = latest_snapshot("inventory", response, fresh)
+        if snapshot:
+            return {
+                "status": "success",
+                "report": snapshot["report"],
+                "checked_at": snapshot["generated_at"].isoformat(),
+            }
+
+        report, degraded = await guarded_report(
+            "inventory", produce_inventory_report, fallback_reporter.inventory_report
         )
 
-        if hasattr(result, "final_output"):
+        if report:
             return {
                 "status": "success",
-                "report": result.final_output
+                "report": report,
+                **degraded_fields(degraded),
             }
 
         return {
@@ -808,6 +1190,8 @@ async def get_inventory_report():
             "message": "No report generated"
         }
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
         print("❌ Inventory API error:", e)
         return {
@@ -816,23 +1200,339 @@ async def get_inventory_report():
         }
     
 @app.get("/industry/analysis-report")
-async def industry_analysis_report():
+async def industry_analysis_report(response: Response, fresh: bool = False):
     try:
-        result = await Runner.run(
-            industry_risk_agent,
-            "Generate full industry risk report"
+        snapshot = latest_snapshot("industry_risk", response, fresh)
+        if snapshot:
+            return {
+                "status": "success",
+                "checked_at": snapshot["generated_at"].isoformat(),
+                "report": snapshot["report"]
+            }
+
+        report, degraded = await guarded_report(
+            "industry_risk", produce_industry_report, fallback_reporter.industry_report
         )
 
         return {
             "status": "success",
             "checked_at": datetime.utcnow().isoformat(),
-            "report": result.final_output
+            "report": report,
+            **degraded_fields(degraded),
         }
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+@app.get("/factory/machine-risk-report")
+async def machine_risk_report(response: Response, fresh: bool = False):
+    try:
+        snapshot = latest_snapshot("machine_risk", response, fresh)
+        if snapshot:
+            return {
+                "status": "success",
+                "checked_at": snapshot["generated_at"].isoformat(),
+                "report": snapshot["report"]
+            }
+
+        report, degraded = await guarded_report(
+            "machine_risk", produce_machine_risk_report, fallback_reporter.machine_risk_report
+        )
+
+        return {
+            "status": "success",
+            "checked_at": datetime.utcnow().isoformat(),
+            "report": report,
+            **degraded_fields(degraded),
+        }
+
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+# =========================================================
+# ✅ STREAMING (SSE) VARIANTS
+# =========================================================
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+
+async def stream_agent_run(
+    request: Request,
+    slot: AsyncExitStack,
+    lane: str,
+    agent: Agent,
+    run_input: Any,
+    deadline: float,
+    fallback,
+    meta: Optional[Dict] = None,
+    on_done=None,
+    **run_kwargs,
+):
+    """
+    Runner.run_streamed -> SSE: tokens, tool-call progress, handoffs, final output.
+    Runs inside an admission slot already held by the caller (`slot`, released
+    here) and under the lane's deadline; past it, or on a model error, the
+    stream ends with the deterministic degraded report. A client that goes
+    away cancels the run so it stops spending tokens.
+    """
+    yield _sse("start", {"agent": agent.name, **(meta or {})})
+
+    result = None
+    finished = False
+    try:
+        result = Runner.run_streamed(agent, run_input, **run_kwargs)
+        events = result.stream_events().__aiter__()
+        deadline_at = time.monotonic() + deadline
+
+        while True:
+            if await request.is_disconnected():
+                print(f"🔌 {lane}: client disconnected, cancelling streamed run")
+                return
+            try:
+                event = await asyncio.wait_for(events.__anext__(), timeout=max(0.0, deadline_at - time.monotonic()))
+            except StopAsyncIteration:
+                break
+
+            if event.type == "raw_response_event":
+                if getattr(event.data, "type", "") == "response.output_text.delta":
+                    yield _sse("token", {"delta": event.data.delta})
+
+            elif event.type == "agent_updated_stream_event":
+                yield _sse("agent", {"agent": event.new_agent.name})
+
+            elif event.type == "run_item_stream_event":
+                item = event.item
+                if event.name == "tool_called":
+                    yield _sse("tool_call", {"tool": getattr(item.raw_item, "name", None)})
+                elif event.name == "tool_output":
+                    yield _sse("tool_output", {"preview": str(item.output)[:200]})
+                elif event.name in ("handoff_occured", "handoff_occurred"):
+                    yield _sse("handoff", {
+                        "from": item.source_agent.name,
+                        "to": item.target_agent.name,
+                    })
+
+        finished = True
+        deadline_guard.succeeded(lane)
+        if on_done:
+            on_done()
+        yield _sse("done", {
+            "report": result.final_output,
+            "checked_at": datetime.utcnow().isoformat(),
+        })
+
+    except Exception as e:
+        finished = True
+        reason = "deadline" if isinstance(e, asyncio.TimeoutError) else "error"
+        if reason == "error":
+            print("❌ Streaming error:", e)
+        else:
+            print(f"⏱️ {lane}: streamed run passed {deadline}s, serving degraded report")
+        if result is not None:
+            result.cancel()
+        deadline_guard.failed(lane, reason)
+        yield _sse("done", {
+            "report": await fallback(reason),
+            "checked_at": datetime.utcnow().isoformat(),
+            **degraded_fields(reason),
+        })
+
+    finally:
+        if not finished:
+            # client gone (or response cancelled): stop spending model tokens
+            if result is not None:
+                result.cancel()
+            deadline_guard.abandoned(lane)
+        await slot.aclose()
+
+
+async def _degraded_stream(agent: Agent, meta: Optional[Dict], fallback, reason: str):
+    yield _sse("start", {"agent": agent.name, **(meta or {})})
+    yield _sse("done", {
+        "report": await fallback(reason),
+        "checked_at": datetime.utcnow().isoformat(),
+        **degraded_fields(reason),
+    })
+
+
+def _sse_response(generator, background: Optional[BackgroundTask] = None) -> StreamingResponse:
+    return StreamingResponse(
+        generator,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background,
+    )
+
+
+async def guarded_stream(
+    request: Request,
+    lane: str,
+    priority: int,
+    deadline: float,
+    fallback,
+    agent: Agent,
+    run_input: Any,
+    meta: Optional[Dict] = None,
+    on_done=None,
+    **run_kwargs,
+) -> StreamingResponse:
+    """
+    Same protections as the JSON endpoints: breaker, admission slot (a full
+    queue is a 429 before any byte is streamed), then the deadline.
+    Streams are not coalesced: every client gets its own token stream.
+    """
+    if not deadline_guard.admit(lane):
+        return _sse_response(_degraded_stream(agent, meta, fallback, "circuit_open"))
+
+    slot = AsyncExitStack()
+    try:
+        await slot.enter_async_context(admission.slot(lane, priority))
+    except AdmissionRejected:
+        deadline_guard.abandoned(lane, count=False)
+        raise
+
+    return _sse_response(
+        stream_agent_run(request, slot, lane, agent, run_input, deadline, fallback, meta, on_done, **run_kwargs),
+        # releases the slot even if the body never started (closing twice is a no-op)
+        background=BackgroundTask(slot.aclose),
+    )
+
+
+@app.post("/factory/orchestrator-query/stream")
+async def factory_orchestrator_stream(payload: OrchestratorQuery, request: Request):
+    decision, direct = intent_router.route(payload.message)
+    agent = SPECIALIST_AGENTS[decision.agent_name] if direct else orchestrator_agent
+    run_input, run_kwargs = orchestrator_input(payload.message, payload.operator_id)
+    started_at = time.perf_counter()
+    return await guarded_stream(
+        request, "orchestrator", PRIORITY_INCIDENT, DEADLINE_ORCHESTRATOR_SECONDS,
+        fallback_reporter.orchestrator_reply,
+        agent,
+        run_input,
+        meta={"route": decision.to_dict(), "direct": direct},
+        on_done=lambda: intent_router.record_duration(direct, started_at),
+        **run_kwargs,
+    )
+
+
+@app.get("/inventory/report/stream")
+async def inventory_report_stream(request: Request):
+    return await guarded_stream(
+        request, "inventory", PRIORITY_DASHBOARD, DEADLINE_REPORT_SECONDS,
+        fallback_reporter.inventory_report, inventory_agent, INVENTORY_PROMPT,
+    )
+
+
+@app.get("/industry/analysis-report/stream")
+async def industry_analysis_report_stream(request: Request):
+    return await guarded_stream(
+        request, "industry_risk", PRIORITY_DASHBOARD, DEADLINE_REPORT_SECONDS,
+        fallback_reporter.industry_report, industry_risk_agent, INDUSTRY_PROMPT,
+    )
+
+
+@app.get("/ready")
+async def readiness(response: Response):
+    if not warmup.ready:
+        response.status_code = 503
+    return warmup.status()
+
+
+@app.get("/metrics/coalescing")
+async def coalescing_metrics():
+    return {"status": "success", "coalescing": run_coalescer.stats()}
+
+
+@app.get("/metrics/mcp-pool")
+async def mcp_pool_metrics():
+    return {"status": "success", "mcp_pool": mcp_client.pool_stats()}
+
+
+@app.get("/metrics/llm-cache")
+async def llm_cache_metrics():
+    return {"status": "success", "llm_cache": completion_cache.stats()}
+
+
+@app.get("/metrics/intent-router")
+async def intent_router_metrics():
+    return {"status": "success", "intent_router": intent_router.stats()}
+
+
+@app.get("/metrics/admission")
+async def admission_metrics():
+    return {"status": "success", "admission": admission.stats()}
+
+
+@app.get("/metrics/resilience")
+async def resilience_metrics():
+    return {"status": "success", "resilience": deadline_guard.stats()}
+
+
+@app.get("/metrics/notifications")
+async def notification_metrics():
+    return {"status": "success", "whatsapp": whatsapp.stats()}
+
+
+@app.get("/metrics/scheduler")
+async def scheduler_metrics():
+    return {"status": "success", "scheduler": report_scheduler.stats()}
+
+
+# =========================================================
+# ✅ ADMIN (tokens issued by the CRUD service's admin login)
+# =========================================================
+
+admin_bearer = HTTPBearer(auto_error=False)
+
+
+async def get_current_admin(credentials: Optional[HTTPAuthorizationCredentials] = Depends(admin_bearer)) -> Dict:
+    """Same admin JWT as the CRUD admin routes; the CRUD service validates it (/api/admins/me)."""
+    unauthorized = HTTPException(
+        status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"}
+    )
+    if credentials is None:
+        raise unauthorized
+    if not CRUD_BASE_URL:
+        raise HTTPException(status_code=503, detail="Admin auth unavailable (CRUD_BASE_URL not set)")
+    try:
+        async with httpx.AsyncClient(base_url=CRUD_BASE_URL, timeout=5) as client:
+            response = await client.get(
+                "/api/admins/me", headers={"Authorization": f"Bearer {credentials.credentials}"}
+            )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=503, detail=f"Admin auth unavailable: {e}")
+    if response.status_code != 200:
+        raise unauthorized
+    return response.json().get("data", {})
+
+
+@app.post("/admin/sessions/maintenance")
+async def sessions_maintenance(current_admin: Dict = Depends(get_current_admin)):
+    try:
+        await session_manager.compact_all()
+        await session_manager.maintenance()
+    except sqlite3.Error as e:
+        print(f"❌ Session DB maintenance failed: {e}")
+        busy = "locked" in str(e) or "busy" in str(e)
+        return JSONResponse(
+            status_code=503 if busy else 500,
+            content={
+                "status": "error",
+                "message": f"Session DB maintenance failed: {e}",
+                **({"retry_after": 30} if busy else {}),
+            },
+        )
+    return {"status": "success", "db_path": session_manager.db_path}
+
+
 
 # =========================================================
 # ✅ RUN SERVER
@@ -0,0 +1,258 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from agents.mcp import MCPServer, MCPServerStreamableHttp, MCPServerStreamableHttpParams
+
+
+# =========================================================
+# ✅ POOLED MCP SERVER
+# =========================================================
+
+
+class PooledMCPServer(MCPServer):
+    """
+    Drop-in replacement for a single MCPServerStreamableHttp.
+    Keeps `pool_size` streamable-HTTP sessions and checks one out per call,
+    so concurrent agents do not queue on one session.
+    Broken sessions are replaced with exponential backoff by the slot's
+    owner task; cleanup() cancels every background task.
+    """
+
+    def __init__(
+        self,
+        params: MCPServerStreamableHttpParams,
+        name: str,
+        pool_size: int = 4,
+        cache_tools_list: bool = True,
+        health_check_interval: float = 30.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        checkout_timeout: float = 30.0,
+    ):
+        super().__init__()
+        self.params = params
+        self._name = name
+        self.pool_size = max(1, pool_size)
+        self.cache_tools_list = cache_tools_list
+        self.health_check_interval = health_check_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.checkout_timeout = checkout_timeout
+
+        self._slots: List[Optional[MCPServerStreamableHttp]] = [None] * self.pool_size
+        self._idle: "asyncio.Queue[int]" = asyncio.Queue()
+        self._queued: Set[int] = set()
+        self._failures: List[int] = [0] * self.pool_size
+        self._retire: List[asyncio.Event] = [asyncio.Event() for _ in range(self.pool_size)]
+        self._attempted: List[asyncio.Event] = [asyncio.Event() for _ in range(self.pool_size)]
+        self._owners: List[asyncio.Task] = []
+        self._closing = False
+        self._health_task: Optional[asyncio.Task] = None
+        self._tools_cache = None
+
+        self.stats: Dict[str, Any] = {
+            "checkouts": 0,
+            "reconnects": 0,
+            "failed_connects": 0,
+            "health_checks": 0,
+            "unhealthy": 0,
+            "wait_seconds_total": 0.0,
+        }
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def _new_session(self, slot: int) -> MCPServerStreamableHttp:
+        return MCPServerStreamableHttp(
+            params=self.params,
+            name=f"{self._name}#{slot}",
+            cache_tools_list=self.cache_tools_list,
+        )
+
+    # ------------------ connect / reconnect ------------------
+
+    async def _own_slot(self, slot: int):
+        """
+        One task per slot opens, serves and closes that slot's sessions:
+        the MCP client's anyio cancel scopes must be exited by the task that
+        entered them. A retired (broken) session is closed here and replaced
+        with exponential backoff; cancelling the task closes the live one.
+        """
+        connected_before = False
+        while True:
+            server = self._new_session(slot)
+            try:
+                await server.connect()
+            except Exception as e:
+                self._failures[slot] += 1
+                self.stats["failed_connects"] += 1
+                print(f"❌ MCP session {slot} connect failed: {e}")
+                self._attempted[slot].set()
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (self._failures[slot] - 1)))
+                await asyncio.sleep(delay)
+                continue
+
+            self._failures[slot] = 0
+            if connected_before:
+                self.stats["reconnects"] += 1
+                print(f"♻️ MCP session {slot} reconnected")
+            connected_before = True
+
+            self._retire[slot].clear()
+            self._slots[slot] = server
+            self._release(slot, server)
+            self._attempted[slot].set()
+            try:
+                await self._retire[slot].wait()
+            except asyncio.CancelledError:
+                # a dropped connection cancels the session's scope, i.e. this
+                # task: only a cancel from cleanup() ends the loop
+                if self._closing:
+                    raise
+                print(f"⚠️ MCP session {slot} connection lost")
+            finally:
+                self._slots[slot] = None
+                try:
+                    await server.cleanup()
+                except Exception:
+                    pass
+
+    def _retire_slot(self, slot: int, server: MCPServerStreamableHttp):
+        """Hand a broken session back to its owner task to be replaced."""
+        if self._slots[slot] is server:
+            self._retire[slot].set()
+
+    def _release(self, slot: int, server: MCPServerStreamableHttp):
+        # a slot whose session was replaced meanwhile may already be queued
+        if self._slots[slot] is server and slot not in self._queued:
+            self._queued.add(slot)
+            self._idle.put_nowait(slot)
+
+    def _claim(self, slot: int) -> Optional[MCPServerStreamableHttp]:
+        """Session of a slot taken off the idle queue (None if it was lost meanwhile)."""
+        self._queued.discard(slot)
+        return self._slots[slot]
+
+    async def connect(self):
+        """Open every session; failed slots keep retrying in the background."""
+        if not self._owners:
+            self._closing = False
+            for event in self._attempted:
+                event.clear()
+            self._owners = [asyncio.ensure_future(self._own_slot(i)) for i in range(self.pool_size)]
+        await asyncio.gather(*(event.wait() for event in self._attempted))
+
+        if self._health_task is None:
+            self._health_task = asyncio.ensure_future(self._health_loop())
+
+        connected = sum(1 for s in self._slots if s is not None)
+        print(f"✅ MCP pool: {connected}/{self.pool_size} sessions connected")
+        if connected == 0:
+            raise ConnectionError(f"MCP pool {self._name}: no session could connect")
+
+    async def cleanup(self):
+        self._closing = True
+        tasks = self._owners + ([self._health_task] if self._health_task else [])
+        self._owners, self._health_task = [], None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._idle = asyncio.Queue()
+        self._queued = set()
+
+    # ------------------ health checks ------------------
+
+    async def _is_healthy(self, server: MCPServerStreamableHttp) -> bool:
+        if server.session is None:
+            return False
+        try:
+            await asyncio.wait_for(server.session.send_ping(), timeout=5)
+            return True
+        except Exception:
+            return False
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            # only idle sessions are checked; busy ones prove themselves
+            for _ in range(self._idle.qsize()):
+                slot = self._idle.get_nowait()
+                server = self._claim(slot)
+                if server is None:
+                    continue
+                self.stats["health_checks"] += 1
+                if not await self._is_healthy(server):
+                    self.stats["unhealthy"] += 1
+                    print(f"⚠️ MCP session {slot} failed health check")
+                    self._retire_slot(slot, server)
+                    continue
+                self._release(slot, server)
+
+    # ------------------ checkout ------------------
+
+    async def _next_idle(self) -> Tuple[int, MCPServerStreamableHttp]:
+        while True:
+            slot = await self._idle.get()
+            server = self._claim(slot)
+            if server is not None:
+                return slot, server
+
+    @asynccontextmanager
+    async def checkout(self):
+        started = time.perf_counter()
+        slot, server = await asyncio.wait_for(self._next_idle(), timeout=self.checkout_timeout)
+        self.stats["checkouts"] += 1
+        self.stats["wait_seconds_total"] += time.perf_counter() - started
+
+        broken = False
+        try:
+            yield server
+        except Exception:
+            broken = not await self._is_healthy(server)
+            raise
+        finally:
+            if broken:
+                self._retire_slot(slot, server)
+            else:
+                self._release(slot, server)
+
+    # ------------------ MCPServer interface ------------------
+
+    async def list_tools(self, run_context=None, agent=None):
+        if self.cache_tools_list and self._tools_cache is not None:
+            return self._tools_cache
+        async with self.checkout() as server:
+            tools = await server.list_tools(run_context, agent)
+        if self.cache_tools_list:
+            self._tools_cache = tools
+        return tools
+
+    def seed_tools_cache(self, tools):
+        """Pre-load tool schemas (e.g. persisted at last boot) before any session is up."""
+        self._tools_cache = tools
+
+    def invalidate_tools_cache(self):
+        self._tools_cache = None
+
+    async def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]]):
+        async with self.checkout() as server:
+            return await server.call_tool(tool_name, arguments)
+
+    async def list_prompts(self):
+        async with self.checkout() as server:
+            return await server.list_prompts()
+
+    async def get_prompt(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+        async with self.checkout() as server:
+            return await server.get_prompt(name, arguments)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pool_size": self.pool_size,
+            "idle": self._idle.qsize(),
+            "connected": sum(1 for s in self._slots if s is not None),
+        }
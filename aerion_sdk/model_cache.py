@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from agents import OpenAIChatCompletionsModel
+
+
+# =========================================================
+# ✅ PERSISTENT COMPLETION CACHE (SQLite)
+# =========================================================
+
+
+class CompletionCache:
+    """
+    On-disk cache of model responses.
+    Entries expire after `ttl_seconds`; least recently used entries are
+    evicted once the stored payloads exceed `max_bytes`.
+    """
+
+    def __init__(self, db_path: str = "llm_cache.sqlite3", ttl_seconds: float = 3600, max_bytes: int = 50 * 1024 * 1024):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.metrics: Dict[str, Dict[str, int]] = {}
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                agent TEXT,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_hit_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_hit ON completions(last_hit_at)")
+        self._conn.commit()
+
+    def _record(self, agent: str, outcome: str):
+        counters = self.metrics.setdefault(agent, {"hits": 0, "misses": 0, "stores": 0})
+        counters[outcome] += 1
+
+    def _get_sync(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self.lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE completions SET last_hit_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return pickle.loads(row[0])
+
+    def _put_sync(self, key: str, agent: str, value: Any):
+        blob = pickle.dumps(value)
+        now = time.time()
+        with self.lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, agent, value, size, created_at, last_hit_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, agent, blob, len(blob), now, now),
+            )
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def _evict_locked(self, now: float):
+        self._conn.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM completions ORDER BY last_hit_at ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    async def get(self, key: str, agent: str) -> Optional[Any]:
+        value = await asyncio.to_thread(self._get_sync, key)
+        self._record(agent, "hits" if value is not None else "misses")
+        return value
+
+    async def put(self, key: str, agent: str, value: Any):
+        await asyncio.to_thread(self._put_sync, key, agent, value)
+        self._record(agent, "stores")
+
+    def stats(self) -> Dict[str, Any]:
+        per_agent = {}
+        for agent, c in self.metrics.items():
+            lookups = c["hits"] + c["misses"]
+            per_agent[agent] = {**c, "hit_rate": round(c["hits"] / lookups, 3) if lookups else 0.0}
+        with self.lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "agents": per_agent}
+
+
+# =========================================================
+# ✅ CACHED CHAT COMPLETIONS MODEL
+# =========================================================
+
+
+def _tool_signature(tool: Any) -> Dict[str, Any]:
+    return {
+        "name": getattr(tool, "name", None) or getattr(tool, "tool_name", None),
+        "description": getattr(tool, "description", None) or getattr(tool, "tool_description", None),
+        "schema": getattr(tool, "params_json_schema", None) or getattr(tool, "input_json_schema", None),
+    }
+
+
+class CachedChatCompletionsModel(OpenAIChatCompletionsModel):
+    """
+    OpenAIChatCompletionsModel that answers byte-identical turns from the
+    CompletionCache. Key = hash(model, instructions, messages incl. tool results, tools).
+    """
+
+    def __init__(self, model: str, openai_client, cache: CompletionCache, agent_name: str):
+        super().__init__(model=model, openai_client=openai_client)
+        self.model_name = model
+        self.cache = cache
+        self.agent_name = agent_name
+
+    def cache_key(self, system_instructions, input, model_settings, tools, output_schema, handoffs) -> str:
+        payload = {
+            "model": self.model_name,
+            "instructions": system_instructions,
+            "input": input,
+            "settings": model_settings,
+            "tools": [_tool_signature(t) for t in tools or []],
+            "handoffs": [_tool_signature(h) for h in handoffs or []],
+            "output_schema": output_schema.json_schema() if output_schema else None,
+        }
+        raw = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs):
+        key = self.cache_key(system_instructions, input, model_settings, tools, output_schema, handoffs)
+
+        cached = await self.cache.get(key, self.agent_name)
+        if cached is not None:
+            print(f"⚡ LLM cache hit for {self.agent_name}")
+            return cached
+
+        response = await super().get_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+        )
+        await self.cache.put(key, self.agent_name, response)
+        return response
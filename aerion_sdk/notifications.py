@@ -0,0 +1,240 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import httpx
+
+
+# =========================================================
+# ✅ ASYNC WHATSAPP DISPATCHER (Twilio REST, batched)
+# =========================================================
+
+TWILIO_BODY_LIMIT = 1600  # characters per WhatsApp message
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class _Digest:
+    def __init__(self, to: str, alerts: List[str], first_at: float):
+        self.to = to
+        self.alerts = alerts
+        self.first_at = first_at
+
+
+def digest_bodies(alerts: List[str], limit: int = TWILIO_BODY_LIMIT) -> List[str]:
+    """One alert goes out as-is; several become a bulleted digest, split to fit the body limit."""
+    if len(alerts) == 1:
+        return [alerts[0][:limit]]
+    bodies, lines = [], []
+    header = f"🚨 {len(alerts)} alerts"
+    size = len(header)
+    for alert in alerts:
+        line = f"• {alert}"[: limit - len(header) - 1]
+        if lines and size + 1 + len(line) > limit:
+            bodies.append("\n".join([header] + lines))
+            lines, size = [], len(header)
+        lines.append(line)
+        size += 1 + len(line)
+    bodies.append("\n".join([header] + lines))
+    return bodies
+
+
+class WhatsAppDispatcher:
+    """
+    `notify()` only enqueues, so agent code never waits on Twilio.
+    A batcher groups alerts per recipient for `digest_window` seconds (or
+    until `max_batch`), and `workers` tasks post the digests through a
+    pooled httpx client, retrying 429/5xx and network errors with
+    exponential backoff. When the queue is full the oldest alert is dropped.
+    """
+
+    def __init__(
+        self,
+        account_sid: Optional[str],
+        auth_token: Optional[str],
+        from_number: str,
+        api_base: str = "https://api.twilio.com",
+        workers: int = 2,
+        max_queue: int = 1000,
+        digest_window: float = 2.0,
+        max_batch: int = 10,
+        max_attempts: int = 4,
+        backoff_base: float = 0.5,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self.api_base = api_base.rstrip("/")
+        self.workers = max(1, workers)
+        self.digest_window = digest_window
+        self.max_batch = max(1, max_batch)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.transport = transport
+        self.enabled = bool(account_sid and auth_token)
+
+        self._inbox: deque = deque(maxlen=max_queue)
+        self._wakeup = asyncio.Event()
+        self._outbox: Optional[asyncio.Queue] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Dict[str, _Digest] = {}
+
+        self.counters = {"queued": 0, "dropped": 0, "messages_sent": 0, "alerts_sent": 0,
+                         "retries": 0, "failed": 0}
+        self.send_ms: deque = deque(maxlen=500)
+        self.last_error: Optional[str] = None
+
+    # ------------------ producer side ------------------
+
+    def notify(self, to: Optional[str], body: str) -> bool:
+        """Queue an alert for `to`; never blocks. False when disabled or no recipient."""
+        if not self.enabled or not to or not body:
+            return False
+        if len(self._inbox) == self._inbox.maxlen:
+            self.counters["dropped"] += 1
+        self._inbox.append((to if to.startswith("whatsapp:") else f"whatsapp:{to}", body, time.monotonic()))
+        self.counters["queued"] += 1
+        self._wakeup.set()
+        return True
+
+    # ------------------ lifecycle ------------------
+
+    def start(self):
+        if not self.enabled:
+            print("⚠️ WhatsApp dispatcher disabled (Twilio credentials missing)")
+            return
+        if self._tasks:
+            return
+        self._outbox = asyncio.Queue()
+        self._http = httpx.AsyncClient(
+            base_url=self.api_base,
+            auth=(self.account_sid, self.auth_token),
+            timeout=self.timeout,
+            transport=self.transport,
+            limits=httpx.Limits(max_connections=self.workers, max_keepalive_connections=self.workers),
+        )
+        self._tasks = [asyncio.ensure_future(self._batcher())]
+        self._tasks += [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        print(f"📨 WhatsApp dispatcher started ({self.workers} workers, {self.digest_window}s digest window)")
+
+    async def stop(self, drain_seconds: float = 5.0):
+        """Flush what is queued (bounded by `drain_seconds`), then shut down."""
+        if not self._tasks:
+            return
+        self._drain_inbox(time.monotonic())
+        for to in list(self._pending):
+            self._outbox.put_nowait(self._pending.pop(to))
+        try:
+            await asyncio.wait_for(self._outbox.join(), timeout=drain_seconds)
+        except asyncio.TimeoutError:
+            print(f"⚠️ WhatsApp dispatcher stopped with {self._outbox.qsize()} digests unsent")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._http.aclose()
+
+    # ------------------ batching ------------------
+
+    def _drain_inbox(self, now: float):
+        while self._inbox:
+            to, body, queued_at = self._inbox.popleft()
+            digest = self._pending.get(to)
+            if digest is None:
+                digest = self._pending[to] = _Digest(to, [], queued_at)
+            digest.alerts.append(body)
+            if len(digest.alerts) >= self.max_batch:
+                self._outbox.put_nowait(self._pending.pop(to))
+
+    async def _batcher(self):
+        while True:
+            now = time.monotonic()
+            self._drain_inbox(now)
+            for to, digest in list(self._pending.items()):
+                if now - digest.first_at >= self.digest_window:
+                    self._outbox.put_nowait(self._pending.pop(to))
+
+            if self._pending:
+                next_due = min(d.first_at for d in self._pending.values()) + self.digest_window
+                timeout = max(0.0, next_due - time.monotonic())
+            else:
+                timeout = None
+            self._wakeup.clear()
+            if self._inbox:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------ sending ------------------
+
+    async def _worker(self):
+        while True:
+            digest = await self._outbox.get()
+            try:
+                await self._deliver(digest)
+            except Exception as e:
+                # one bad digest must not take the worker down with it
+                self.counters["failed"] += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"❌ WhatsApp digest to {digest.to} dropped: {self.last_error}")
+            finally:
+                self._outbox.task_done()
+
+    async def _deliver(self, digest: _Digest):
+        for body in digest_bodies(digest.alerts):
+            if not await self._send(digest.to, body):
+                self.counters["failed"] += 1
+                return
+            self.counters["messages_sent"] += 1
+        self.counters["alerts_sent"] += len(digest.alerts)
+
+    async def _send(self, to: str, body: str) -> bool:
+        path = f"/2010-04-01/Accounts/{self.account_sid}/Messages.json"
+        data = {"From": self.from_number, "To": to, "Body": body}
+
+        for attempt in range(1, self.max_attempts + 1):
+            started = time.perf_counter()
+            retry_after = None
+            try:
+                response = await self._http.post(path, data=data)
+                if response.status_code < 300:
+                    self.send_ms.append((time.perf_counter() - started) * 1000)
+                    return True
+                self.last_error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code not in RETRY_STATUSES:
+                    print(f"❌ WhatsApp to {to} rejected: {self.last_error}")
+                    return False
+                retry_after = response.headers.get("Retry-After")
+            except httpx.HTTPError as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+
+            if attempt == self.max_attempts:
+                break
+            self.counters["retries"] += 1
+            delay = self.backoff_base * 2 ** (attempt - 1) * (0.5 + random.random())
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            await asyncio.sleep(delay)
+
+        print(f"❌ WhatsApp to {to} failed after {self.max_attempts} attempts: {self.last_error}")
+        return False
+
+    def stats(self) -> Dict:
+        send_ms = sorted(self.send_ms)
+        return {
+            "enabled": self.enabled,
+            "running": bool(self._tasks),
+            "inbox": len(self._inbox),
+            "pending_digests": len(self._pending),
+            "outbox": self._outbox.qsize() if self._outbox else 0,
+            **self.counters,
+            "send_p95_ms": round(send_ms[int(0.95 * (len(send_ms) - 1))], 1) if send_ms else 0.0,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+
+# =========================================================
+# ✅ DEADLINES & CIRCUIT BREAKER
+# =========================================================
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures (errors or
+    missed deadlines). While open every call is refused; after
+    `reset_seconds` one trial call is let through (half-open) and its outcome
+    closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_running = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                print(f"🔴 Model circuit breaker opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "open_for_s": round(time.monotonic() - self.opened_at, 1) if self.state == "open" else 0,
+        }
+
+
+class DeadlineGuard:
+    """
+    Runs a model-backed producer under a deadline and the circuit breaker.
+    On a missed deadline, an error or an open breaker the deterministic
+    `fallback(reason)` answers instead, and the result is flagged degraded.
+    A producer that misses its deadline (or whose caller goes away) is
+    cancelled, so it stops spending tokens and gives back its admission slot.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        passthrough: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.breaker = breaker
+        self.passthrough = passthrough
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, outcome: str):
+        self.counters.setdefault(name, {}).setdefault(outcome, 0)
+        self.counters[name][outcome] += 1
+
+    async def run(
+        self,
+        name: str,
+        produce: Callable[..., Awaitable[Any]],
+        fallback: Callable[[str], Awaitable[Any]],
+        deadline: float,
+    ) -> Tuple[Any, Optional[str]]:
+        """
+        -> (output, None) or (fallback output, degraded reason).
+        `produce(admitted=event)` sets the event once it holds its admission
+        slot; the deadline only starts then, so queueing (bounded by the
+        admission queue timeout) is never mistaken for a slow model.
+        """
+        if not self.admit(name):
+            return await fallback("circuit_open"), "circuit_open"
+
+        admitted = asyncio.Event()
+        task = asyncio.ensure_future(produce(admitted=admitted))
+        try:
+            waiter = asyncio.ensure_future(admitted.wait())
+            try:
+                await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+            output = await asyncio.wait_for(asyncio.shield(task), timeout=deadline)
+        except asyncio.TimeoutError:
+            task.cancel()
+            self.failed(name, "deadline")
+            print(f"⏱️ {name}: no model answer within {deadline}s, serving degraded report")
+            return await fallback("deadline"), "deadline"
+        except asyncio.CancelledError:
+            task.cancel()
+            self.abandoned(name)
+            raise
+        except self.passthrough:
+            # e.g. admission rejected: says nothing about model health
+            self.abandoned(name, count=False)
+            raise
+        except Exception as e:
+            self.failed(name, "error")
+            print(f"❌ {name}: model run failed ({e}), serving degraded report")
+            return await fallback("error"), "error"
+
+        self.succeeded(name)
+        return output, None
+
+    # ------------------ manual use (streamed runs) ------------------
+
+    def admit(self, name: str) -> bool:
+        if self.breaker.allow():
+            return True
+        self._count(name, "circuit_open")
+        return False
+
+    def succeeded(self, name: str):
+        self.breaker.record_success()
+        self._count(name, "ok")
+
+    def failed(self, name: str, reason: str):
+        self.breaker.record_failure()
+        self._count(name, reason)
+
+    def abandoned(self, name: str, count: bool = True):
+        """Run stopped for reasons unrelated to the model (rejected, client gone)."""
+        self.breaker.trial_running = False
+        if count:
+            self._count(name, "abandoned")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"breaker": self.breaker.stats(), "outcomes": self.counters}
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+
+# =========================================================
+# ✅ IN-PROCESS REPORT SCHEDULER
+# =========================================================
+
+
+class ReportScheduler:
+    """
+    Refreshes reports on fixed intervals and keeps the latest snapshot of each.
+    A job never overlaps with itself: a tick that finds the previous run still
+    going is skipped. A snapshot older than the job's max age (default two
+    intervals, i.e. refreshes keep failing) is not served.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.snapshots: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._runs: Set[asyncio.Task] = set()
+
+    def add_job(
+        self,
+        name: str,
+        interval_seconds: float,
+        produce: Callable[[], Awaitable[Any]],
+        max_age_seconds: Optional[float] = None,
+    ):
+        if interval_seconds <= 0:
+            print(f"⏸️ Scheduled job '{name}' disabled")
+            return
+        self.jobs[name] = {
+            "interval": interval_seconds,
+            "max_age": max_age_seconds or 2 * interval_seconds,
+            "produce": produce,
+            "lock": asyncio.Lock(),
+            "runs": 0,
+            "skipped": 0,
+            "stale": 0,
+            "failures": 0,
+            "last_error": None,
+        }
+
+    async def run_job(self, name: str) -> bool:
+        job = self.jobs[name]
+        if job["lock"].locked():
+            job["skipped"] += 1
+            print(f"⏭️ Scheduled job '{name}' still running, skipping tick")
+            return False
+
+        async with job["lock"]:
+            started = time.perf_counter()
+            try:
+                report = await job["produce"]()
+            except Exception as e:
+                job["failures"] += 1
+                job["last_error"] = str(e)
+                print(f"❌ Scheduled job '{name}' failed: {e}")
+                return False
+
+            job["runs"] += 1
+            self.snapshots[name] = {
+                "report": report,
+                "generated_at": datetime.utcnow(),
+                "generated_ts": time.time(),
+                "duration": round(time.perf_counter() - started, 2),
+            }
+            print(f"🗓️ Snapshot '{name}' refreshed in {self.snapshots[name]['duration']}s")
+            return True
+
+    async def _loop(self, name: str):
+        interval = self.jobs[name]["interval"]
+        while True:
+            run = asyncio.ensure_future(self.run_job(name))
+            self._runs.add(run)
+            run.add_done_callback(self._runs.discard)
+            await asyncio.sleep(interval)
+
+    def start(self):
+        for name in self.jobs:
+            if name not in self._tasks:
+                self._tasks[name] = asyncio.ensure_future(self._loop(name))
+        print(f"🗓️ Scheduler started: {', '.join(self.jobs) or 'no jobs'}")
+
+    async def stop(self):
+        """Cancel the loops and any refresh still in flight."""
+        tasks = [*self._tasks.values(), *self._runs]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = {}
+        self._runs = set()
+
+    def latest(self, name: str) -> Optional[Dict[str, Any]]:
+        """Latest snapshot, or None when there is none or it is past the job's max age."""
+        snapshot = self.snapshots.get(name)
+        if snapshot is None:
+            return None
+        job = self.jobs.get(name)
+        if job and time.time() - snapshot["generated_ts"] > job["max_age"]:
+            job["stale"] += 1
+            return None
+        return snapshot
+
+    def age_seconds(self, name: str) -> Optional[int]:
+        snapshot = self.snapshots.get(name)
+        if snapshot is None:
+            return None
+        return int(time.time() - snapshot["generated_ts"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "interval": job["interval"],
+                "max_age": job["max_age"],
+                "runs": job["runs"],
+                "skipped": job["skipped"],
+                "stale": job["stale"],
+                "failures": job["failures"],
+                "last_error": job["last_error"],
+                "running": job["lock"].locked(),
+                "age_seconds": self.age_seconds(name),
+            }
+            for name, job in self.jobs.items()
+        }
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import sqlite3
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from agents import SQLiteSession
+
+
+# =========================================================
+# ✅ TOKEN-BUDGETED, COMPACTING SESSIONS
+# =========================================================
+
+
+def estimate_tokens(item: Any) -> int:
+    """Cheap token estimate (~4 chars per token), good enough for budgeting."""
+    return max(1, len(json.dumps(item, default=str, ensure_ascii=False)) // 4)
+
+
+def _is_user_turn(item: Any) -> bool:
+    return isinstance(item, dict) and item.get("role") == "user"
+
+
+def _text_of(item: Any) -> str:
+    content = item.get("content") if isinstance(item, dict) else None
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(str(part.get("text", "")) for part in content if isinstance(part, dict))
+    return ""
+
+
+def _window(items: List[Any], budget: int) -> List[Any]:
+    """Newest items within `budget` tokens, starting on a user turn."""
+    used = 0
+    start = len(items)
+    for i in range(len(items) - 1, -1, -1):
+        used += estimate_tokens(items[i])
+        if used > budget:
+            break
+        start = i
+
+    # never start mid-turn
+    while start < len(items) and not _is_user_turn(items[start]):
+        start += 1
+    if start == len(items):
+        # a single turn bigger than the budget: keep it from its user message
+        for i in range(len(items) - 1, -1, -1):
+            if _is_user_turn(items[i]):
+                return items[i:]
+    return items[start:]
+
+
+def _summary_of(dropped: List[Any]) -> Dict[str, str]:
+    lines = []
+    for item in dropped:
+        text = _text_of(item).strip().replace("\n", " ")
+        if text and isinstance(item, dict) and item.get("role") in ("user", "assistant"):
+            lines.append(f"- {item['role']}: {text[:160]}")
+    return {
+        "role": "user",
+        "content": "Summary of earlier conversation (compacted):\n" + "\n".join(lines[-20:]),
+    }
+
+
+def compact_session(
+    db_path: str,
+    session_id: str,
+    token_budget: int,
+    compact_above: int,
+    messages_table: str = "agent_messages",
+) -> Dict[str, int]:
+    """
+    Fold everything outside the budget window into one summary message, in a
+    single write transaction. Only the dropped rows are replaced (the summary
+    takes the id of the last one), so items a live run appends concurrently
+    are never touched. Blocking: call through asyncio.to_thread.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            f"SELECT id, message_data FROM {messages_table} WHERE session_id = ? ORDER BY id",
+            (session_id,),
+        ).fetchall()
+        items = [json.loads(data) for _, data in rows]
+        total = sum(estimate_tokens(i) for i in items)
+        dropped = len(items) - len(_window(items, token_budget))
+        if total <= compact_above or not dropped:
+            conn.rollback()
+            return {"before": total, "after": total}
+
+        summary = _summary_of(items[:dropped])
+        last_dropped_id = rows[dropped - 1][0]
+        conn.execute(
+            f"DELETE FROM {messages_table} WHERE session_id = ? AND id <= ?", (session_id, last_dropped_id)
+        )
+        conn.execute(
+            f"INSERT INTO {messages_table} (id, session_id, message_data) VALUES (?, ?, ?)",
+            (last_dropped_id, session_id, json.dumps(summary)),
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    after = total - sum(estimate_tokens(i) for i in items[:dropped]) + estimate_tokens(summary)
+    print(f"🗜️ Session {session_id} compacted: {total} → {after} tokens")
+    return {"before": total, "after": after}
+
+
+class BoundedSQLiteSession(SQLiteSession):
+    """
+    SQLiteSession whose history sent to the model is capped at `token_budget`.
+    The window always starts on a user turn so tool calls stay paired with
+    their outputs. `compact()` folds turns beyond `compact_above` tokens into
+    one summary message.
+    """
+
+    def __init__(self, session_id: str, db_path: str, token_budget: int = 6000, compact_above: int = 12000):
+        super().__init__(session_id, db_path=db_path)
+        self.token_budget = token_budget
+        self.compact_above = compact_above
+
+    async def get_items(self, limit: Optional[int] = None) -> List[Any]:
+        items = await super().get_items(limit)
+        return _window(items, self.token_budget)
+
+    async def compact(self) -> Dict[str, int]:
+        """Summarise (by truncation) everything outside the budget window."""
+        return await asyncio.to_thread(
+            compact_session, str(self.db_path), self.session_id,
+            self.token_budget, self.compact_above, self.messages_table,
+        )
+
+
+class SessionManager:
+    """One bounded session per operator key, all in a single SQLite file."""
+
+    def __init__(self, db_path: str, token_budget: int = 6000, compact_above: int = 12000, max_cached: int = 256):
+        self.db_path = db_path
+        self.token_budget = token_budget
+        self.compact_above = compact_above
+        self.max_cached = max_cached
+        self._sessions: "OrderedDict[str, BoundedSQLiteSession]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, key: str) -> BoundedSQLiteSession:
+        session = self._sessions.get(key)
+        if session is None:
+            session = BoundedSQLiteSession(key, self.db_path, self.token_budget, self.compact_above)
+            self._sessions[key] = session
+            if len(self._sessions) > self.max_cached:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(key)
+        return session
+
+    def for_operator(self, operator_id: str) -> BoundedSQLiteSession:
+        return self.get(f"operator:{operator_id}")
+
+    def _oversized_sync(self) -> List[str]:
+        """Every session in the DB (cached or not) whose history may exceed `compact_above`."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            rows = conn.execute(
+                "SELECT session_id FROM agent_messages GROUP BY session_id HAVING SUM(LENGTH(message_data)) / 4 > ?",
+                (self.compact_above,),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            if "no such table" in str(e):
+                return []  # no session written yet
+            raise
+        finally:
+            conn.close()
+        return [session_id for (session_id,) in rows]
+
+    async def compact_all(self):
+        for session_id in await asyncio.to_thread(self._oversized_sync):
+            try:
+                await asyncio.to_thread(
+                    compact_session, self.db_path, session_id, self.token_budget, self.compact_above
+                )
+            except Exception as e:
+                print(f"⚠️ Compaction failed for {session_id}: {e}")
+
+    def _maintenance_sync(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA optimize")
+        finally:
+            conn.close()
+
+    async def maintenance(self):
+        """WAL checkpoint + VACUUM so the file shrinks after compaction."""
+        await asyncio.to_thread(self._maintenance_sync)
+        print(f"🧹 Session DB maintenance done: {self.db_path}")
+
+    async def _loop(self, compact_interval: float, maintenance_every: int):
+        ticks = 0
+        while True:
+            await asyncio.sleep(compact_interval)
+            await self.compact_all()
+            ticks += 1
+            if ticks % maintenance_every == 0:
+                try:
+                    await self.maintenance()
+                except Exception as e:
+                    print(f"⚠️ Session DB maintenance failed: {e}")
+
+    def start(self, compact_interval: float = 300, maintenance_every: int = 12):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._loop(compact_interval, maintenance_every))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,182 @@
+"""
+Replay recorded traces against the current MCP server and flag regressions.
+
+Reads the JSONL written by FileTracingProcessor, re-executes every recorded
+MCP tool call in order, and compares tool latency, tool-output tokens and
+tool-call counts with the recorded baseline.
+
+    python trace_replay.py --log agent_logs_autonomous.jsonl --url http://localhost:8003/mcp
+    python trace_replay.py --log prod.jsonl --latency-threshold 1.3 --out replay_report.json
+
+Exit code 1 when any trace regresses (handy in CI).
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+from agents.mcp import MCPServerStreamableHttp, MCPServerStreamableHttpParams
+
+
+# =========================================================
+# ✅ LOAD RECORDED TRACES
+# =========================================================
+
+
+def load_traces(path: str) -> Dict[str, Dict[str, Any]]:
+    traces: Dict[str, Dict[str, Any]] = {}
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            trace = traces.setdefault(event.get("trace_id") or "unknown", {
+                "generations": [],
+                "tool_calls": [],
+                "handoffs": [],
+                "metrics": None,
+            })
+            kind = event.get("event")
+            if kind == "generation":
+                trace["generations"].append(event)
+            elif kind == "tool_call":
+                trace["tool_calls"].append(event)
+            elif kind == "handoff":
+                trace["handoffs"].append(event)
+            elif kind == "trace_end":
+                trace["metrics"] = event.get("metrics")
+
+    return traces
+
+
+def baseline_of(trace: Dict[str, Any]) -> Dict[str, Any]:
+    calls = [c for c in trace["tool_calls"] if c.get("server")]
+    return {
+        "tool_calls": len(calls),
+        "tool_latency_ms": round(sum(c.get("duration_ms", 0) for c in calls), 2),
+        "tool_output_tokens": sum(c.get("output_chars", 0) for c in calls) // 4,
+        "llm_calls": len(trace["generations"]),
+        "llm_tokens": sum(g.get("total_tokens", 0) for g in trace["generations"]),
+        "handoffs": len(trace["handoffs"]),
+    }
+
+
+# =========================================================
+# ✅ REPLAY
+# =========================================================
+
+
+def _result_chars(result: Any) -> int:
+    """Size of the tool output as the agents SDK hands it to the model."""
+    content = getattr(result, "content", None) or []
+    if len(content) == 1:
+        return len(content[0].model_dump_json())
+    return len(json.dumps([item.model_dump(mode="json") for item in content]))
+
+
+async def replay_trace(server: MCPServerStreamableHttp, trace: Dict[str, Any], mcp_tools: set) -> Dict[str, Any]:
+    replayed = {"tool_calls": 0, "tool_latency_ms": 0.0, "tool_output_tokens": 0, "errors": [], "missing_tools": []}
+
+    for call in trace["tool_calls"]:
+        tool = call.get("tool")
+        if not call.get("server"):
+            # local function tools are not served by MCP
+            continue
+        if tool not in mcp_tools:
+            replayed["missing_tools"].append(tool)
+            continue
+
+        started = time.perf_counter()
+        try:
+            result = await server.call_tool(tool, call.get("arguments") or {})
+            if getattr(result, "isError", False):
+                replayed["errors"].append(tool)
+            replayed["tool_output_tokens"] += _result_chars(result) // 4
+        except Exception as e:
+            replayed["errors"].append(f"{tool}: {e}")
+        replayed["tool_latency_ms"] += (time.perf_counter() - started) * 1000
+        replayed["tool_calls"] += 1
+
+    replayed["tool_latency_ms"] = round(replayed["tool_latency_ms"], 2)
+    return replayed
+
+
+def compare(baseline: Dict[str, Any], replayed: Dict[str, Any], latency_threshold: float, token_threshold: float) -> List[str]:
+    regressions = []
+
+    if baseline["tool_latency_ms"] and replayed["tool_latency_ms"] > baseline["tool_latency_ms"] * latency_threshold:
+        regressions.append(
+            f"tool latency {baseline['tool_latency_ms']}ms → {replayed['tool_latency_ms']}ms"
+        )
+    if baseline["tool_output_tokens"] and replayed["tool_output_tokens"] > baseline["tool_output_tokens"] * token_threshold:
+        regressions.append(
+            f"tool output tokens {baseline['tool_output_tokens']} → {replayed['tool_output_tokens']}"
+        )
+    if replayed["tool_calls"] < baseline["tool_calls"]:
+        regressions.append(f"tool calls {baseline['tool_calls']} → {replayed['tool_calls']}")
+    if replayed["missing_tools"]:
+        regressions.append(f"missing tools: {', '.join(sorted(set(replayed['missing_tools'])))}")
+    if replayed["errors"]:
+        regressions.append(f"tool errors: {', '.join(replayed['errors'][:3])}")
+
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded agent traces against the MCP server")
+    parser.add_argument("--log", default="agent_logs_autonomous.jsonl")
+    parser.add_argument("--url", default="http://localhost:8003/mcp")
+    parser.add_argument("--latency-threshold", type=float, default=1.2, help="flag if replayed/baseline latency exceeds this")
+    parser.add_argument("--token-threshold", type=float, default=1.1, help="flag if replayed/baseline tool tokens exceed this")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    traces = load_traces(args.log)
+    replayable = {tid: t for tid, t in traces.items() if t["tool_calls"]}
+    print(f"📂 {len(traces)} traces loaded, {len(replayable)} with replayable tool calls")
+
+    server = MCPServerStreamableHttp(
+        params=MCPServerStreamableHttpParams(url=args.url),
+        name="TraceReplay",
+        cache_tools_list=True,
+    )
+    await server.connect()
+
+    report = {"traces": {}, "regressions": 0}
+    try:
+        mcp_tools = {t.name for t in await server.list_tools()}
+
+        for trace_id, trace in replayable.items():
+            baseline = baseline_of(trace)
+            replayed = await replay_trace(server, trace, mcp_tools)
+            regressions = compare(baseline, replayed, args.latency_threshold, args.token_threshold)
+
+            report["traces"][trace_id] = {"baseline": baseline, "replayed": replayed, "regressions": regressions}
+            if regressions:
+                report["regressions"] += 1
+                print(f"🚨 {trace_id}: {'; '.join(regressions)}")
+            else:
+                print(f"✅ {trace_id}: {replayed['tool_calls']} calls, "
+                      f"{baseline['tool_latency_ms']}ms → {replayed['tool_latency_ms']}ms, "
+                      f"{baseline['tool_output_tokens']} → {replayed['tool_output_tokens']} tool tokens")
+    finally:
+        await server.cleanup()
+
+    print(f"📊 {report['regressions']} regressed / {len(replayable)} replayed")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
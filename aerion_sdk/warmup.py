@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from agents import Agent, RunContextWrapper, trace
+from mcp.types import Tool as MCPTool
+
+
+# =========================================================
+# ✅ WARM-UP & READINESS
+# =========================================================
+
+
+class Warmup:
+    """
+    Boot-time warm-up so the first dashboard hit is not a cold one:
+      1. MCP tool schemas: fetched live (and persisted) or loaded from disk
+      2. Model endpoint: one cheap call opens the pooled TLS connections
+      3. Agent tool definitions: built once so the first run skips it
+    `ready` flips only when all phases ran and tool schemas are known;
+    until then the MCP phase is retried every `retry_seconds`.
+    """
+
+    def __init__(self, mcp_server, agents: List[Agent], tools_cache_path: str, model_client=None):
+        self.mcp_server = mcp_server
+        self.agents = agents
+        self.tools_cache_path = tools_cache_path
+        self.model_client = model_client
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.ready = False
+        self.tools_known = False
+
+    def _phase(self, name: str, started: float, ok: bool, detail: Optional[str] = None):
+        self.phases[name] = {
+            "ok": ok,
+            "seconds": round(time.perf_counter() - started, 3),
+            "detail": detail,
+        }
+        print(f"{'🔥' if ok else '⚠️'} Warm-up {name}: {detail or ('ok' if ok else 'failed')}")
+
+    def _persist_tools(self, tools: List[MCPTool]):
+        tmp_path = self.tools_cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([t.model_dump(mode="json") for t in tools], f, indent=2)
+        os.replace(tmp_path, self.tools_cache_path)
+
+    def _load_persisted_tools(self) -> List[MCPTool]:
+        with open(self.tools_cache_path, "r", encoding="utf-8") as f:
+            return [MCPTool.model_validate(t) for t in json.load(f)]
+
+    async def warm_mcp_tools(self):
+        started = time.perf_counter()
+        try:
+            tools = await self.mcp_server.list_tools()
+            self._persist_tools(tools)
+            self.tools_known = True
+            self._phase("mcp_tools", started, True, f"{len(tools)} tools fetched and persisted")
+            return
+        except Exception as e:
+            live_error = str(e)
+
+        # MCP not reachable yet: serve the last known schemas until it is
+        try:
+            tools = self._load_persisted_tools()
+            self.mcp_server.seed_tools_cache(tools)
+            self.tools_known = True
+            self._phase("mcp_tools", started, True, f"{len(tools)} tools loaded from {self.tools_cache_path}")
+        except Exception:
+            self._phase("mcp_tools", started, False, f"live fetch failed ({live_error}), no persisted schemas")
+
+    async def warm_model_connection(self):
+        started = time.perf_counter()
+        if self.model_client is None:
+            self._phase("model_connection", started, True, "skipped (offline model)")
+            return
+        try:
+            # listing models costs no tokens but pays DNS + TLS + HTTP/2 setup
+            await self.model_client.models.list()
+            self._phase("model_connection", started, True)
+        except Exception as e:
+            self._phase("model_connection", started, False, str(e))
+
+    async def warm_agent_tools(self):
+        started = time.perf_counter()
+        built = 0
+        try:
+            context = RunContextWrapper(context=None)
+            with trace("Service warm-up"):
+                for agent in self.agents:
+                    built += len(await agent.get_all_tools(context))
+            self._phase("agent_tools", started, True, f"{built} tool definitions across {len(self.agents)} agents")
+        except Exception as e:
+            self._phase("agent_tools", started, False, str(e))
+
+    async def run(self, retry_seconds: float = 5.0):
+        started = time.perf_counter()
+        await self.warm_mcp_tools()
+        await self.warm_model_connection()
+
+        while not self.tools_known:
+            await asyncio.sleep(retry_seconds)
+            await self.warm_mcp_tools()
+
+        await self.warm_agent_tools()
+        self.ready = True
+        print(f"✅ Warm-up finished in {time.perf_counter() - started:.2f}s, service ready")
+
+    def status(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "phases": self.phases}